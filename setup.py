@@ -28,9 +28,9 @@ setup(
 
     zip_safe = True,
 
-    install_requires = [ "numpy >= 1.10, < 2",
-                         "scipy >= 0.17, < 2",
-                         "sympy >= 1, < 2" ],
+    install_requires = [ "numpy >= 1.15, < 2",
+                         "scipy >= 1.0, < 2",
+                         "sympy >= 1.7, < 2" ],
 
     author = "Alexey Muranov",
     author_email = "alexeymuranov@users.noreply.github.com",
@@ -1,9 +1,15 @@
 # XXX:  In spite of Style Guide for Python Code (PEP 8), not all imports in
 #   this file are necessarily at the beginning.
 import math
-from scipy.linalg import eigvalsh
+import numpy as nmp
+from collections import deque
+from itertools import repeat
 from sys import stderr, stdout
-from time import process_time
+from time import process_time, thread_time
+
+from .pipelining import DEFAULT_QUEUE_DEPTH, run_pipeline
+from .sampling import hermitize_bands
+from .solving import solve_eigenvalues
 
 
 def make_eigenvalues_analyser(eigenvalue_zero_threshold):
@@ -71,6 +77,74 @@ def make_eigenvalues_analyser(eigenvalue_zero_threshold):
     return eigenvalues_analyser
 
 
+def make_batch_eigenvalues_analyser(eigenvalue_zero_threshold):
+
+    if nmp.ndim(eigenvalue_zero_threshold):
+        # Analyse with all the thresholds at once, along a new first axis
+        eigenvalue_zero_threshold = nmp.asarray(
+            eigenvalue_zero_threshold,
+            dtype = float
+        )[:, None, None]
+
+    eigenvalue_zero_suspicion_threshold = nmp.sqrt(
+        eigenvalue_zero_threshold
+    )
+
+    def batch_eigenvalues_analyser(eigenvalues_block):
+        """
+        Do for every row of a (batch, k) array of eigenvalues what the
+        function made by `make_eigenvalues_analyser` does for a single
+        vector of eigenvalues, and also find the minimal by absolute value
+        eigenvalue that is treated as non-zero.
+        The eigenvalues in every row must be given in the ascending order.
+        Return a triple of
+          - an integer array of shape (batch, 3) whose rows are the
+            signatures (p, n, z),
+          - a pair of boolean arrays of shape (batch, k) that mark the
+            negative and the positive "suspicious" eigenvalues,
+          - an array of shape (batch,) of the minimal by absolute value
+            non-zero eigenvalues (NaN if all the eigenvalues are zero).
+        If the analyser has been made with a sequence of T zero thresholds,
+        all the returned arrays have an additional first axis of length T.
+        """
+        negative = eigenvalues_block < -eigenvalue_zero_threshold
+        zero = ( (eigenvalues_block >= -eigenvalue_zero_threshold) &
+                 (eigenvalues_block <= eigenvalue_zero_threshold) )
+
+        n = negative.sum(axis=-1)
+        z = zero.sum(axis=-1)
+        # NOTE: like `eigenvalues_analyser`, count everything else (NaN
+        #   included) as positive
+        p = eigenvalues_block.shape[-1] - (n + z)
+
+        neg_suspicious = negative & (
+            eigenvalues_block >= -eigenvalue_zero_suspicion_threshold
+        )
+        pos_suspicious = (
+            (eigenvalues_block > eigenvalue_zero_threshold) &
+            (eigenvalues_block <= eigenvalue_zero_suspicion_threshold)
+        )
+
+        moduli = nmp.where(zero, nmp.inf, nmp.abs(eigenvalues_block))
+        min_modulus_inds = nmp.argmin(moduli, axis=-1)[..., None]
+        min_moduli = nmp.take_along_axis(moduli, min_modulus_inds, -1)
+        min_nonzero_vals = nmp.where(
+            nmp.isinf(min_moduli[..., 0]),
+            nmp.nan,
+            nmp.take_along_axis(
+                nmp.broadcast_to(eigenvalues_block, moduli.shape),
+                min_modulus_inds,
+                -1
+            )[..., 0]
+        )
+
+        return ( nmp.stack((p, n, z), axis=-1),
+                 (neg_suspicious, pos_suspicious),
+                 min_nonzero_vals )
+
+    return batch_eigenvalues_analyser
+
+
 def make_interesting_signature_detector(interesting_signature_parameter):
 
     if interesting_signature_parameter:
@@ -84,6 +158,199 @@ def make_interesting_signature_detector(interesting_signature_parameter):
         return lambda _signature: True
 
 
+def report_suspicious_eigenvalues( inds,
+                                   neg_suspicious_vals,
+                                   pos_suspicious_vals,
+                                   message_output_dest = stderr,
+                                   eigenvalue_zero_threshold = None ):
+
+    if eigenvalue_zero_threshold is None:
+        attention = ": Attention!"
+    else:
+        attention = ( ": Attention! (zero threshold {})"
+                      .format(eigenvalue_zero_threshold) )
+
+    print( inds,
+           attention + "\n"
+           "  The following eigenvalues have been treated as "
+           "non-zero, but are\n"
+           "  suspiciously close to 0:\n"
+           "    {}"
+           .format((neg_suspicious_vals, pos_suspicious_vals)),
+           file = message_output_dest )
+
+
+def make_result_writer( signature_is_interesting,
+                        output_dest = stdout,
+                        index_expander = None,
+                        record_dtype = None ):
+    """
+    Make a function that takes an iterable of results, quadruples of an
+    n-uple of indices, a signature, the minimal by absolute value non-zero
+    eigenvalue (or `None`) and the flag telling whether the signature has
+    been verified with high precision, and writes the interesting results to
+    `output_dest`: as text lines, or, if `record_dtype` is given, as raw
+    binary records of this type (see `result_dtype`).
+    """
+    def write_results(results):
+        rows = []
+        for inds, signature, min_nonzero_val, verified in results:
+            signature = tuple(signature)
+            if signature_is_interesting(signature):
+                inds = tuple(inds)
+                rows.append((inds, signature, min_nonzero_val, verified))
+                if index_expander is not None:
+                    rows.extend( (other_inds,
+                                  signature,
+                                  min_nonzero_val,
+                                  verified)
+                                 for other_inds in index_expander(inds) )
+
+        if record_dtype is None:
+            for inds, signature, _, verified in rows:
+                if verified:
+                    print(inds, ":", signature, "verified", file=output_dest)
+                else:
+                    print(inds, ":", signature, file=output_dest)
+
+        elif rows:
+            records = nmp.empty(len(rows), dtype=record_dtype)
+            (records["inds"], signatures, records["min_nonzero"],
+             records["verified"]) = zip(*rows)
+            (records["p"], records["n"], records["z"]) = zip(*signatures)
+            output_dest.write(records.tobytes())
+
+    return write_results
+
+
+def make_multiresolution_result_writer(steps, result_writers):
+    """
+    Make a function that takes an iterable of results at the sample points
+    of the grid with `steps` steps on a semicircle (see
+    `make_result_writer`), and writes the results at the points of the grid
+    with q steps, for every q in the dictionary `result_writers`, with the
+    result writer `result_writers[q]`.  The q must divide `steps`, and the
+    index i of such a point on the grid with `steps` steps becomes the index
+    i*q/steps.  Since this map is monotone, the results written with every
+    result writer are in the usual order if the given results are.
+    """
+    ratios_and_result_writers = [ (steps//q, write_results)
+                                  for q, write_results
+                                  in sorted(result_writers.items()) ]
+
+    def write_results_at_all_resolutions(results):
+        results = list(results)
+
+        for ratio, write_results in ratios_and_result_writers:
+            write_results(
+                ( tuple(i//ratio for i in inds),
+                  signature,
+                  min_nonzero_val,
+                  verified )
+                for inds, signature, min_nonzero_val, verified in results
+                if all(i % ratio == 0 for i in inds)
+            )
+
+    return write_results_at_all_resolutions
+
+
+def make_eigenvalue_classifier( eigenvalue_zero_thresholds,
+                                interesting_signature_parameters,
+                                result_writers ):
+    """
+    Make a function that takes an integer array of shape (batch, n) of
+    index n-uples, the array of shape (batch, k) of the eigenvalues of the
+    corresponding matrices in the ascending order, and a message output
+    destination, and finds the signatures with every one of the
+    `eigenvalue_zero_thresholds` at once.  For every zero threshold z and
+    every one of the `interesting_signature_parameters` g, the results with
+    interesting signatures are written with the result writer
+    `result_writers[(z, g)]` (see `make_result_writer`, the writers need not
+    check the signatures themselves).  The "suspicious" eigenvalues are
+    reported for every zero threshold.
+    """
+    analyse_eigenvalues = make_batch_eigenvalues_analyser(
+        eigenvalue_zero_thresholds
+    )
+
+    # NOTE:  As in `make_interesting_signature_detector`, all the
+    #   signatures are interesting if the parameter is `None` or 0.
+    parameters = nmp.array( [ g if g else -nmp.inf
+                              for g in interesting_signature_parameters ] )
+
+    def eigenvalue_classifier( inds_block,
+                               eigenvalues_block,
+                               message_output_dest = stderr ):
+        (signatures, (neg_suspicious, pos_suspicious), min_nonzero_vals) = (
+            analyse_eigenvalues(eigenvalues_block)
+        )
+        p, n, z = nmp.moveaxis(signatures, -1, 0)
+        # The array of shape (thresholds, parameters, batch)
+        interesting = (
+            nmp.abs(p - n)[:, None, :] >=
+            z[:, None, :] + parameters[None, :, None]
+        )
+
+        for t, eigenvalue_zero_threshold in enumerate(
+            eigenvalue_zero_thresholds
+        ):
+            suspicious = (neg_suspicious[t] | pos_suspicious[t]).any(axis=1)
+            for j in nmp.flatnonzero(suspicious):
+                eigenvalues = eigenvalues_block[j]
+                report_suspicious_eigenvalues(
+                    tuple(inds_block[j].tolist()),
+                    list(eigenvalues[neg_suspicious[t, j]]),
+                    list(eigenvalues[pos_suspicious[t, j]]),
+                    message_output_dest,
+                    eigenvalue_zero_threshold
+                )
+
+            for l, g in enumerate(interesting_signature_parameters):
+                rows = interesting[t, l]
+                result_writers[(eigenvalue_zero_threshold, g)](zip(
+                    inds_block[rows].tolist(),
+                    signatures[t, rows].tolist(),
+                    min_nonzero_vals[t, rows].tolist(),
+                    repeat(False)
+                ))
+
+    return eigenvalue_classifier
+
+
+def make_ordered_result_queue(write_results):
+    """
+    Make a queue of results that may still be waiting for verification.
+    Return the pair of functions `put` and `flush`.  `put` takes an n-uple
+    of indices, a signature, the minimal by absolute value non-zero
+    eigenvalue and either `None` or a `Future` of the verified pair of the
+    signature and the minimal non-zero eigenvalue.  `flush` writes out with
+    `write_results` the results at the start of the queue that are ready,
+    or, if `wait` is true, waits for and writes out all of them, so that the
+    results are written in the order they have been put.
+    """
+    pending = deque()
+
+    def put(inds, signature, min_nonzero_val, verification=None):
+        pending.append((inds, signature, min_nonzero_val, verification))
+
+    def flush(wait=False):
+        results = []
+        while pending:
+            inds, signature, min_nonzero_val, verification = pending[0]
+            if verification is None:
+                results.append((inds, signature, min_nonzero_val, False))
+            elif wait or verification.done():
+                signature, min_nonzero_val = verification.result()
+                results.append((inds, signature, min_nonzero_val, True))
+            else:
+                break
+            pending.popleft()
+
+        write_results(results)
+
+    return (put, flush)
+
+
 # TODO: use `logging` module instead of printing to `stderr`
 def process_data( matrix_sampler,
                   sample_index_iterator_maker,
@@ -91,13 +358,51 @@ def process_data( matrix_sampler,
                   interesting_signature_parameter,
                   caution = False,
                   output_dest = stdout,
-                  message_output_dest = stderr ):
-
+                  message_output_dest = stderr,
+                  with_timing_report = True,
+                  index_expander = None,
+                  verifier = None,
+                  result_writer = None,
+                  eigenvalue_solver = None,
+                  progress_reporter = None ):
+    """
+    Sample the matrices, compute and analyse their eigenvalues, and print
+    out the results.  Return the timing counters (the total time spent in
+    the main loop and the times spent computing matrices, computing
+    eigenvalues and analysing eigenvalues), which are also reported at the
+    end if `with_timing_report` is true.
+    If `index_expander` is given, it must be a function that takes an
+    n-uple of indices and returns a list of other n-uples with the same
+    results (see `make_conjugate_index_expander`), and the results are also
+    printed out for them.
+    If `verifier` is given, it must be a function that takes an n-uple of
+    indices and returns a `Future` of the pair of the signature and the
+    minimal by absolute value non-zero eigenvalue recomputed with high
+    precision (see `verifying`).  It is called for every point with
+    suspicious eigenvalues, and the verified signature is printed out
+    instead of the computed one, marked as verified.  The output is kept in
+    the order of the sample points.
+    If `result_writer` is given (see `make_result_writer`), the results are
+    written with it instead of being printed out to `output_dest`.
+    The eigenvalues are computed with `eigenvalue_solver`, which is called
+    like `scipy.linalg.eigvalsh` (and can be an instrumented version of it,
+    see `make_stage_instrumenter`), by default with
+    `scipy.linalg.eigvalsh` itself.
+    If `progress_reporter` is given (see `make_progress_reporter`), it is
+    called after every sample point with the numbers of the points and of
+    the points with suspicious eigenvalues processed so far, and the timing
+    counters so far.
+    """
     if caution:
         # NOTE: putting imports here seems to be against Style Guide for
         #   Python Code (PEP 8)
         from .checking_matrices import is_hermitian
 
+    if eigenvalue_solver is None:
+        # NOTE:  SciPy is imported only when needed, to make the startup
+        #   faster.
+        from scipy.linalg import eigvalsh as eigenvalue_solver
+
     analyse_eigenvalues = make_eigenvalues_analyser(
         eigenvalue_zero_threshold
     )
@@ -106,6 +411,14 @@ def process_data( matrix_sampler,
         interesting_signature_parameter
     )
 
+    if result_writer is None and verifier is not None:
+        result_writer = make_result_writer( signature_is_interesting,
+                                            output_dest,
+                                            index_expander )
+
+    if verifier is not None:
+        put_result, flush_results = make_ordered_result_queue(result_writer)
+
     get_sample_matrix = matrix_sampler
 
     make_sample_index_iterator = sample_index_iterator_maker
@@ -114,6 +427,9 @@ def process_data( matrix_sampler,
     eigval_comput_time = 0
     eigval_analys_time = 0
 
+    point_count = 0
+    suspicious_count = 0
+
     main_loop_start_time = process_time()
 
     for inds in make_sample_index_iterator():
@@ -133,7 +449,7 @@ def process_data( matrix_sampler,
         # Transform the matrix to a truly Hermitian one:
         mat += mat.H
         time1 = process_time()
-        eigenvalues = eigvalsh(mat, check_finite=False)
+        eigenvalues = eigenvalue_solver(mat, check_finite=False)
         time2 = process_time()
         (signature, (neg_suspicious_vals, pos_suspicious_vals)) = (
             analyse_eigenvalues(eigenvalues)
@@ -151,25 +467,345 @@ def process_data( matrix_sampler,
         #        .format(time1, time2, time3),
         #        file = message_output_dest )
 
+        point_count += 1
+
         if neg_suspicious_vals or pos_suspicious_vals:
-            print( inds,
-                   ": Attention!\n"
-                   "  The following eigenvalues have been treated as "
-                   "non-zero, but are\n"
-                   "  suspiciously close to 0:\n"
-                   "    {}"
-                   .format((neg_suspicious_vals, pos_suspicious_vals)),
-                   file = message_output_dest )
+            suspicious_count += 1
+            report_suspicious_eigenvalues( inds,
+                                           neg_suspicious_vals,
+                                           pos_suspicious_vals,
+                                           message_output_dest )
+
+        if verifier is None:
+            if result_writer is not None:
+                result_writer([(inds, signature, None, False)])
+            elif signature_is_interesting(signature):
+                print(inds, ":", signature, file=output_dest)
+                if index_expander is not None:
+                    for other_inds in index_expander(inds):
+                        print(other_inds, ":", signature, file=output_dest)
+
+        else:
+            if neg_suspicious_vals or pos_suspicious_vals:
+                put_result(inds, signature, None, verifier(inds))
+            else:
+                put_result(inds, signature, None)
+            flush_results()
+
+        if progress_reporter is not None:
+            progress_reporter( point_count,
+                               suspicious_count,
+                               ( process_time() - main_loop_start_time,
+                                 matrix_comput_time,
+                                 eigval_comput_time,
+                                 eigval_analys_time ) )
+
+    if verifier is not None:
+        flush_results(wait=True)
+
+    timing = ( process_time() - main_loop_start_time,
+               matrix_comput_time,
+               eigval_comput_time,
+               eigval_analys_time )
+
+    if progress_reporter is not None:
+        progress_reporter(point_count, suspicious_count, timing, final=True)
+
+    if with_timing_report:
+        report_timing(*timing, message_output_dest=message_output_dest)
+
+    return timing
+
+
+def process_data_in_blocks( batch_matrix_sampler,
+                            sample_index_block_iterator_maker,
+                            eigenvalue_zero_threshold,
+                            interesting_signature_parameter,
+                            caution = False,
+                            output_dest = stdout,
+                            message_output_dest = stderr,
+                            with_timing_report = True,
+                            eigenvalue_solver = solve_eigenvalues,
+                            bandwidth = None,
+                            index_expander = None,
+                            record_dtype = None,
+                            verifier = None,
+                            result_writer = None,
+                            result_finisher = None,
+                            eigenvalue_classifier = None,
+                            eigenvalue_recorder = None,
+                            progress_reporter = None,
+                            pipeline_threads = None,
+                            pipeline_queue_depth = DEFAULT_QUEUE_DEPTH,
+                            hermiticity_checker = None ):
+    """
+    Do the same as `process_data`, but sample and solve whole blocks of
+    matrices at a time.  The sampler is expected to be a batch matrix
+    sampler, and the iterators made by `sample_index_block_iterator_maker`
+    are expected to iterate over integer arrays of index n-uples.  The
+    eigenvalues of a block of matrices are computed with
+    `eigenvalue_solver` (see `make_eigenvalue_solver`).  If `bandwidth` is
+    given, the sampler is expected to return the matrices in the band
+    storage, and the solver to accept them in the upper band storage (see
+    `hermitize_bands`).  If `record_dtype` is given (see `result_dtype`),
+    the results are written to `output_dest`, which must be a binary
+    stream, as raw records of this type, with the minimal by absolute
+    value non-zero eigenvalues.  The `verifier` and the `result_writer` are
+    used as by `process_data`.  If `result_finisher` is given, it is called
+    after all the results have been written (see
+    `make_run_length_result_writer`).
+    If `eigenvalue_classifier` is given (see `make_eigenvalue_classifier`),
+    the eigenvalues are analysed and the results are written by it instead.
+    If `eigenvalue_recorder` is given (see `make_eigenvalue_recorder`), it
+    is called with every block of index n-uples and their eigenvalues.
+    The `progress_reporter` is called after every block as by
+    `process_data` (with `None` for the number of the suspicious points if
+    the `eigenvalue_classifier` is given).
+    If `pipeline_threads` is given, the blocks are processed in a pipeline
+    (see `run_pipeline`): they are sampled in a separate thread, solved in
+    `pipeline_threads` threads, and analysed and written out in the current
+    thread in the usual order, with at most `pipeline_queue_depth` blocks
+    waiting.  The `eigenvalue_solver` must then be safe to call from
+    several threads at once.  The processor times of the stages are then
+    measured in their threads, while the main loop time is the total
+    processor time of all the threads.
+    If `caution` is true, the matrices are checked for being "almost"
+    Hermitian with `hermiticity_checker` (see `make_hermiticity_checker`),
+    or else all of them, and, with the timing report, the worst
+    discrepancy found is reported instead of every offending matrix.
+    Return the same timing counters as `process_data`.
+    """
+    if caution:
+        # NOTE: putting imports here seems to be against Style Guide for
+        #   Python Code (PEP 8)
+        from .checking_matrices import ( make_hermiticity_checker,
+                                         report_hermiticity_check )
+
+        if hermiticity_checker is None:
+            hermiticity_checker = make_hermiticity_checker()
+        check_hermiticity, get_hermiticity_check_summary, _ = (
+            hermiticity_checker
+        )
+
+    analyse_eigenvalues = make_batch_eigenvalues_analyser(
+        eigenvalue_zero_threshold
+    )
+
+    signature_is_interesting = make_interesting_signature_detector(
+        interesting_signature_parameter
+    )
+
+    if result_writer is None:
+        write_results = make_result_writer( signature_is_interesting,
+                                            output_dest,
+                                            index_expander,
+                                            record_dtype )
+    else:
+        write_results = result_writer
+
+    if verifier is not None:
+        put_result, flush_results = make_ordered_result_queue(write_results)
+
+    get_sample_matrices = batch_matrix_sampler
+
+    make_sample_index_block_iterator = sample_index_block_iterator_maker
+
+    matrix_comput_time = 0
+    eigval_comput_time = 0
+    eigval_analys_time = 0
+
+    point_count = 0
+    if eigenvalue_classifier is None:
+        suspicious_count = 0
+    else:
+        suspicious_count = None
+
+    if pipeline_threads is None:
+        stage_clock = process_time
+    else:
+        # NOTE:  The stages run in different threads, so the processor time
+        #   of every stage is measured in its own thread.
+        stage_clock = thread_time
+
+    def sample_block(inds_block):
+        time0 = stage_clock()
+        mats = get_sample_matrices(inds_block)
+
+        # If `caution` is true, check that the matrices are "almost"
+        # Hermitian:
+        if caution:
+            check_hermiticity( inds_block,
+                               mats,
+                               banded = bandwidth is not None )
+
+        # Transform the matrices to truly Hermitian ones:
+        if bandwidth is None:
+            mats += mats.conj().swapaxes(-1, -2)
+        else:
+            mats = hermitize_bands(mats)
+
+        return (mats, stage_clock() - time0)
+
+    def solve_block(sampled_block):
+        mats, matrix_time = sampled_block
+        time1 = stage_clock()
+        eigenvalues_block = eigenvalue_solver(mats)
+        return (eigenvalues_block, matrix_time, stage_clock() - time1)
+
+    def finish_block(inds_block, solved_block):
+        nonlocal matrix_comput_time, eigval_comput_time, eigval_analys_time
+        nonlocal point_count, suspicious_count
+
+        eigenvalues_block, matrix_time, eigval_time = solved_block
+        time2 = stage_clock()
 
-        if signature_is_interesting(signature):
-            print(inds, ":", signature, file=output_dest)
+        if eigenvalue_recorder is not None:
+            eigenvalue_recorder(inds_block, eigenvalues_block)
+
+        if eigenvalue_classifier is not None:
+            eigenvalue_classifier( inds_block,
+                                   eigenvalues_block,
+                                   message_output_dest )
+        else:
+            ( signatures,
+              (neg_suspicious, pos_suspicious),
+              min_nonzero_vals ) = analyse_eigenvalues(eigenvalues_block)
+            suspicious = (neg_suspicious | pos_suspicious).any(axis=1)
+        time3 = stage_clock()
+        time3 -= time2
+        matrix_comput_time += matrix_time
+        eigval_comput_time += eigval_time
+        eigval_analys_time += time3
+
+        point_count += len(inds_block)
+
+        if eigenvalue_classifier is not None:
+            if progress_reporter is not None:
+                progress_reporter( point_count,
+                                   suspicious_count,
+                                   ( process_time() - main_loop_start_time,
+                                     matrix_comput_time,
+                                     eigval_comput_time,
+                                     eigval_analys_time ) )
+            return
+
+        suspicious_count += int(nmp.count_nonzero(suspicious))
+
+        for j in nmp.flatnonzero(suspicious):
+            eigenvalues = eigenvalues_block[j]
+            neg_suspicious_vals = list(eigenvalues[neg_suspicious[j]])
+            pos_suspicious_vals = list(eigenvalues[pos_suspicious[j]])
+            report_suspicious_eigenvalues( tuple(inds_block[j].tolist()),
+                                           neg_suspicious_vals,
+                                           pos_suspicious_vals,
+                                           message_output_dest )
+
+        if verifier is None:
+            write_results(zip( inds_block.tolist(),
+                               signatures.tolist(),
+                               min_nonzero_vals.tolist(),
+                               repeat(False) ))
+
+        else:
+            for inds, signature, min_nonzero_val, is_suspicious in zip(
+                inds_block.tolist(),
+                signatures.tolist(),
+                min_nonzero_vals.tolist(),
+                suspicious.tolist()
+            ):
+                if is_suspicious:
+                    put_result( inds, signature, min_nonzero_val,
+                                verifier(inds) )
+                else:
+                    put_result(inds, signature, min_nonzero_val)
+            flush_results()
+
+        if progress_reporter is not None:
+            progress_reporter( point_count,
+                               suspicious_count,
+                               ( process_time() - main_loop_start_time,
+                                 matrix_comput_time,
+                                 eigval_comput_time,
+                                 eigval_analys_time ) )
+
+    main_loop_start_time = process_time()
+
+    if pipeline_threads is None:
+        for inds_block in make_sample_index_block_iterator():
+            finish_block(inds_block, solve_block(sample_block(inds_block)))
+    else:
+        run_pipeline( make_sample_index_block_iterator(),
+                      sample_block,
+                      solve_block,
+                      finish_block,
+                      pipeline_threads,
+                      pipeline_queue_depth )
+
+    if verifier is not None:
+        flush_results(wait=True)
+
+    if result_finisher is not None:
+        result_finisher()
+
+    timing = ( process_time() - main_loop_start_time,
+               matrix_comput_time,
+               eigval_comput_time,
+               eigval_analys_time )
+
+    if progress_reporter is not None:
+        progress_reporter(point_count, suspicious_count, timing, final=True)
+
+    if with_timing_report:
+        report_timing(*timing, message_output_dest=message_output_dest)
+        if caution:
+            report_hermiticity_check( get_hermiticity_check_summary(),
+                                      message_output_dest =
+                                          message_output_dest )
+
+    return timing
+
+
+def process_stored_eigenvalues( eigenvalue_records,
+                                eigenvalue_classifier,
+                                block_size,
+                                message_output_dest = stderr,
+                                with_timing_report = True ):
+    """
+    Analyse the eigenvalues saved by a function made by
+    `make_eigenvalue_recorder` (an array of records with the fields "inds"
+    and "eigenvalues", see `load_results`) in blocks with the
+    `eigenvalue_classifier` (see `make_eigenvalue_classifier`).  Return the
+    same timing counters as `process_data`.
+    """
+    main_loop_start_time = process_time()
+
+    for start in range(0, len(eigenvalue_records), block_size):
+        records = eigenvalue_records[start:(start + block_size)]
+        eigenvalue_classifier( nmp.asarray(records["inds"], dtype=int),
+                               nmp.asarray(records["eigenvalues"]),
+                               message_output_dest )
+
+    main_loop_time = process_time() - main_loop_start_time
+    timing = (main_loop_time, 0, 0, main_loop_time)
+
+    if with_timing_report:
+        report_timing(*timing, message_output_dest=message_output_dest)
+
+    return timing
+
+
+def report_timing( main_loop_time,
+                   matrix_comput_time,
+                   eigval_comput_time,
+                   eigval_analys_time,
+                   message_output_dest = stderr ):
 
     print( "Total time spent in the main loop: {:.3g}s.\n"
            "This includes the time spent\n"
            "  - computing matrices:    {:.3g}s,\n"
            "  - computing eigenvalues: {:.3g}s,\n"
            "  - analysing eigenvalues: {:.3g}s."
-           .format( (process_time() - main_loop_start_time),
+           .format( main_loop_time,
                     matrix_comput_time,
                     eigval_comput_time,
                     eigval_analys_time ),
@@ -186,8 +822,148 @@ if __name__ == "__main__":
     from ._basic_testing_tools import run_and_time
 
     def _basic_tests():
-        # TODO: implement
-        assert False
+        eigenvalue_zero_threshold = 1e-4
+        analyse_eigenvalues = make_eigenvalues_analyser(
+            eigenvalue_zero_threshold
+        )
+        analyse_eigenvalues_block = make_batch_eigenvalues_analyser(
+            eigenvalue_zero_threshold
+        )
+        eigenvalues_block = nmp.sort(
+            nmp.array([ [-3, -1e-2, -1e-3, -1e-4, 0, 1e-5, 1e-2, 2],
+                        [-3, -2, -1, -0.5, 0.5, 1, 2, 3],
+                        [-1e-5, 0, 0, 0, 0, 0, 0, 1e-4],
+                        [-9, -8, -7, -6, -5, -4, -3, -1e-3],
+                        [1e-3, 1e-2, 1, 2, 3, 4, 5, 6] ]),
+            axis = 1
+        )
+        (signatures, (neg_suspicious, pos_suspicious), min_nonzero_vals) = (
+            analyse_eigenvalues_block(eigenvalues_block)
+        )
+        for j, eigenvalues in enumerate(eigenvalues_block):
+            (signature, (neg_suspicious_vals, pos_suspicious_vals)) = (
+                analyse_eigenvalues(eigenvalues)
+            )
+            assert tuple(signatures[j].tolist()) == signature
+            assert ( list(eigenvalues[neg_suspicious[j]]) ==
+                     neg_suspicious_vals )
+            assert ( list(eigenvalues[pos_suspicious[j]]) ==
+                     pos_suspicious_vals )
+        assert min_nonzero_vals[0] == -1e-3
+        assert min_nonzero_vals[1] == -0.5
+        assert nmp.isnan(min_nonzero_vals[2])
+        assert min_nonzero_vals[3] == -1e-3
+        assert min_nonzero_vals[4] == 1e-3
+
+        written = {2: [], 3: []}
+        write_results = make_multiresolution_result_writer(
+            6,
+            {q: written[q].extend for q in written}
+        )
+        write_results([ ((2, -4), (1, 1, 0), 0.5, False),
+                        ((3, 3), (2, 0, 0), 0.25, True),
+                        ((6, -2), (0, 2, 0), -0.5, False) ])
+        assert written[2] == [ ((1, 1), (2, 0, 0), 0.25, True) ]
+        assert written[3] == [ ((1, -2), (1, 1, 0), 0.5, False),
+                               ((3, -1), (0, 2, 0), -0.5, False) ]
+
+        eigenvalue_zero_thresholds = [1e-6, eigenvalue_zero_threshold]
+        interesting_signature_parameters = [None, 2]
+        written = { (z, g): []
+                    for z in eigenvalue_zero_thresholds
+                    for g in interesting_signature_parameters }
+        classify_eigenvalues = make_eigenvalue_classifier(
+            eigenvalue_zero_thresholds,
+            interesting_signature_parameters,
+            {key: written[key].extend for key in written}
+        )
+        from io import StringIO
+        message_output_dest = StringIO()
+        inds_block = nmp.arange(10).reshape(5, 2)
+        classify_eigenvalues( inds_block,
+                              eigenvalues_block,
+                              message_output_dest )
+        for z in eigenvalue_zero_thresholds:
+            signatures, _, min_nonzero_vals = (
+                make_batch_eigenvalues_analyser(z)(eigenvalues_block)
+            )
+            for g in interesting_signature_parameters:
+                signature_is_interesting = (
+                    make_interesting_signature_detector(g)
+                )
+                assert [ (inds, signature, verified)
+                         for inds, signature, _, verified
+                         in written[(z, g)] ] == [
+                    (inds, signature, False)
+                    for inds, signature in zip( inds_block.tolist(),
+                                                signatures.tolist() )
+                    if signature_is_interesting(tuple(signature))
+                ]
+                assert nmp.allclose( [ v for _, _, v, _ in written[(z, g)] ],
+                                     [ v for signature, v in zip(
+                                           signatures.tolist(),
+                                           min_nonzero_vals.tolist()
+                                       )
+                                       if signature_is_interesting(
+                                           tuple(signature)
+                                       ) ],
+                                     equal_nan = True )
+        assert message_output_dest.getvalue().count("Attention") == sum(
+            ( neg_suspicious | pos_suspicious ).any(axis=1).sum()
+            for _, (neg_suspicious, pos_suspicious), _ in map(
+                lambda z: make_batch_eigenvalues_analyser(z)(
+                    eigenvalues_block
+                ),
+                eigenvalue_zero_thresholds
+            )
+        )
+
+        from sympy import symbols, sympify
+        from .sampling import make_batch_matrix_sampler, make_matrix_sampler
+        from .sweeping import ( make_sample_index_block_iterator_maker,
+                                make_sample_index_iterator_maker )
+        indeterminates = symbols("s t")
+        e_mat = [ [sympify(e) for e in row]
+                  for row in [ ["-1 - s - t - s*t", "s + s*t", "0"],
+                               ["1 + t", "-1 - s - t - s*t", "s + s*t"],
+                               ["0", "1 + t", "-1 - s - t - s*t"] ] ]
+        steps = 6
+        matrix_sampler = make_matrix_sampler(e_mat, indeterminates, steps)
+        batch_matrix_sampler = make_batch_matrix_sampler( e_mat,
+                                                          indeterminates,
+                                                          steps )
+        for r in [None, 2]:
+            output_dest = StringIO()
+            process_data( matrix_sampler,
+                          make_sample_index_iterator_maker(2, steps, r),
+                          1e-12,
+                          None,
+                          caution = True,
+                          output_dest = output_dest,
+                          message_output_dest = StringIO(),
+                          with_timing_report = False )
+            expected_output = output_dest.getvalue()
+            assert expected_output
+
+            for block_size in [1, 5, 7, 1000]:
+                output_dest = StringIO()
+                message_output_dest = StringIO()
+                timing = process_data_in_blocks(
+                    batch_matrix_sampler,
+                    make_sample_index_block_iterator_maker( 2,
+                                                            steps,
+                                                            r,
+                                                            block_size ),
+                    1e-12,
+                    None,
+                    caution = True,
+                    output_dest = output_dest,
+                    message_output_dest = message_output_dest,
+                    with_timing_report = False
+                )
+                assert output_dest.getvalue() == expected_output
+                assert len(timing) == 4
+                assert not message_output_dest.getvalue()
 
     t = run_and_time(_basic_tests)
     print("The module passed basic tests in {:.3g}s.".format(t))
@@ -0,0 +1,16 @@
+# This module is the startup script of the benchmark suite (see
+# `benchmarking`), to be run with
+#
+#     python3 -m sig.bench
+#
+# The results are printed out as JSON, so that the timings of the stages
+# can be compared between versions.
+
+from sys import argv
+# NOTE: `exit` already means something in Python
+from sys import exit as sys_exit
+
+from .benchmarking import main
+
+if __name__ == "__main__":
+    sys_exit(main(argv))
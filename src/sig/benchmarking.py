@@ -0,0 +1,445 @@
+# XXX:  In spite of Style Guide for Python Code (PEP 8), not all imports in
+#   this file are necessarily at the beginning: there can be more somewhere
+#   inside `main` function.
+import numpy as nmp
+from argparse import ArgumentParser
+from itertools import islice
+from itertools import product as iter_product
+from json import dump as dump_json
+from platform import python_version
+from sys import stderr, stdout
+from time import process_time
+
+from . import __version__
+from .analysing import ( make_batch_eigenvalues_analyser,
+                         make_eigenvalues_analyser )
+from .cli import ( parse_positive_int_arg,
+                   parse_sampling_numbers_arg,
+                   parse_zero_threshold_arg )
+from .compiling import compile_matrix
+from .sampling import ( hermitize_bands,
+                        make_compiled_batch_matrix_sampler,
+                        make_compiled_fft_batch_matrix_sampler,
+                        make_compiled_matrix_sampler,
+                        make_compiled_tensor_batch_matrix_sampler )
+from .solving import make_eigenvalue_solver
+from .sweeping import ( make_sample_index_block_iterator_maker,
+                        make_sample_index_iterator_maker )
+
+# The version of the format of the benchmark results
+BENCHMARK_RESULTS_VERSION = 1
+
+
+def synthetic_input_data( k,
+                          n,
+                          density = 1.0,
+                          bandwidth = None,
+                          degree = 1,
+                          seed = 0 ):
+    """
+    Generate the input data (as loaded from a JSON input file) of a random
+    k-by-k matrix of polynomials in n indeterminates of degree at most
+    `degree` in every indeterminate with small integer coefficients.  The
+    entries farther than `bandwidth` from the diagonal are zero, and so is
+    every other off-diagonal entry with probability `1 - density`.  The
+    matrices sampled from it are Hermitian on the torus, as for any input.
+    """
+    rng = nmp.random.RandomState(seed)
+
+    indeterminates = ["x{}".format(i) for i in range(1, n + 1)]
+    monomials = [ "*".join( ["1"] +
+                            [ "{}**{}".format(x, e)
+                              for x, e in zip(indeterminates, exponents)
+                              if e ] )
+                  for exponents in iter_product( range(degree + 1),
+                                                 repeat = n ) ]
+
+    def random_entry():
+        coefficients = rng.randint(-3, 4, size=len(monomials))
+        terms = [ "({})*{}".format(c, m)
+                  for c, m in zip(coefficients, monomials) if c ]
+        return " + ".join(terms) or "0"
+
+    matrix = [ [ "0" if ( bandwidth is not None and abs(j - l) > bandwidth or
+                          j != l and rng.random_sample() >= density )
+                 else random_entry()
+                 for l in range(k) ]
+               for j in range(k) ]
+
+    return {"indeterminates": " ".join(indeterminates), "matrix": matrix}
+
+
+def _best_time(f, repeat):
+    """
+    Call `f` `repeat` times.  Return the minimal processor time of a call and
+    the value returned by the last call.
+    """
+    best_time = None
+    for _ in range(repeat):
+        start_time = process_time()
+        value = f()
+        t = process_time() - start_time
+        if best_time is None or t < best_time:
+            best_time = t
+    return (best_time, value)
+
+
+def benchmark_sampling_number( compiled_matrix,
+                               sampling_number,
+                               eigenvalue_zero_threshold = 1e-12,
+                               point_count = 10000,
+                               block_size = 1000,
+                               repeat = 3 ):
+    """
+    Time every stage of the processing of the first `point_count` sample
+    points of the grid with `sampling_number` steps: the sweep iterators,
+    the matrix samplers, the eigenvalue solvers and the eigenvalue
+    analysers.  Return the list of the results as dictionaries with the
+    keys "stage", "method", "sampling_number", "points", "setup_seconds"
+    (the time of making the functions) and "seconds" (the best of `repeat`
+    runs).
+    """
+    n = len(compiled_matrix["indeterminates"])
+    steps = sampling_number
+    bandwidth = compiled_matrix["bandwidth"]
+
+    results = []
+
+    def record(stage, method, points, setup_seconds, seconds):
+        results.append(dict( stage = stage,
+                             method = method,
+                             sampling_number = sampling_number,
+                             points = points,
+                             setup_seconds = setup_seconds,
+                             seconds = seconds ))
+
+    def time_stage(make_function, run):
+        setup_seconds, function = _best_time(make_function, 1)
+        seconds, value = _best_time(lambda: run(function), repeat)
+        return (setup_seconds, seconds, value)
+
+    # The sweep
+    setup_seconds, seconds, inds_list = time_stage(
+        lambda: make_sample_index_iterator_maker(n, steps, None),
+        lambda make_iterator: list(islice(make_iterator(), point_count))
+    )
+    record("sweeping", "points", len(inds_list), setup_seconds, seconds)
+    point_count = len(inds_list)
+
+    setup_seconds, seconds, inds_blocks = time_stage(
+        lambda: make_sample_index_block_iterator_maker( n,
+                                                        steps,
+                                                        None,
+                                                        block_size ),
+        lambda make_iterator: list(islice(
+            make_iterator(),
+            -(-point_count//block_size)
+        ))
+    )
+    inds_blocks[-1] = inds_blocks[-1][:(point_count - sum(
+        len(inds_block) for inds_block in inds_blocks[:-1]
+    ))]
+    record("sweeping", "blocks", point_count, setup_seconds, seconds)
+
+    # The sampling
+    setup_seconds, seconds, _ = time_stage(
+        lambda: make_compiled_matrix_sampler(compiled_matrix, steps),
+        lambda get_sample_matrix: [ get_sample_matrix(inds)
+                                    for inds in inds_list ]
+    )
+    record("sampling", "point", point_count, setup_seconds, seconds)
+
+    batch_sampler_makers = [
+        ("lambdify", make_compiled_batch_matrix_sampler),
+        ("fft", make_compiled_fft_batch_matrix_sampler),
+        ("tensor", make_compiled_tensor_batch_matrix_sampler)
+    ]
+    for method, make_batch_matrix_sampler in batch_sampler_makers:
+        setup_seconds, seconds, mats_blocks = time_stage(
+            lambda: make_batch_matrix_sampler(compiled_matrix, steps),
+            lambda get_sample_matrices: [ get_sample_matrices(inds_block)
+                                          for inds_block in inds_blocks ]
+        )
+        record("sampling", method, point_count, setup_seconds, seconds)
+
+    for mats in mats_blocks:
+        mats += mats.conj().swapaxes(-1, -2)
+
+    # The solving
+    solving_methods = [("eigvalsh", False), ("ldl", False)]
+    if 2*bandwidth + 1 < compiled_matrix["size"]:
+        get_sample_bands = make_compiled_batch_matrix_sampler(
+            compiled_matrix,
+            steps,
+            bandwidth = bandwidth
+        )
+        bands_blocks = [ hermitize_bands(get_sample_bands(inds_block))
+                         for inds_block in inds_blocks ]
+        solving_methods.append(("eigvalsh", True))
+    solving_methods.append(("continuation", False))
+
+    for method, banded in solving_methods:
+        setup_seconds, seconds, eigenvalues_blocks = time_stage(
+            lambda: make_eigenvalue_solver( eigenvalue_zero_threshold,
+                                            method,
+                                            banded ),
+            lambda solve_eigenvalues: [
+                solve_eigenvalues(mats)
+                for mats in (bands_blocks if banded else mats_blocks)
+            ]
+        )
+        record( "solving",
+                method + ("-banded" if banded else ""),
+                point_count,
+                setup_seconds,
+                seconds )
+        if method == "eigvalsh" and not banded:
+            exact_eigenvalues_blocks = eigenvalues_blocks
+
+    # The analysis
+    setup_seconds, seconds, _ = time_stage(
+        lambda: make_eigenvalues_analyser(eigenvalue_zero_threshold),
+        lambda analyse_eigenvalues: [
+            analyse_eigenvalues(eigenvalues)
+            for eigenvalues_block in exact_eigenvalues_blocks
+            for eigenvalues in eigenvalues_block
+        ]
+    )
+    record("analysing", "point", point_count, setup_seconds, seconds)
+
+    setup_seconds, seconds, _ = time_stage(
+        lambda: make_batch_eigenvalues_analyser(eigenvalue_zero_threshold),
+        lambda analyse_eigenvalues: [
+            analyse_eigenvalues(eigenvalues_block)
+            for eigenvalues_block in exact_eigenvalues_blocks
+        ]
+    )
+    record("analysing", "batch", point_count, setup_seconds, seconds)
+
+    return results
+
+
+def parse_argv(argv):
+    arg_parser = ArgumentParser(
+        prog = argv[0],
+        description = ( "Time the stages of the processing on a synthetic "
+                        "input matrix and print out the results as JSON." )
+    )
+    arg_parser.add_argument(
+        "-k", "--size",
+        dest = "size",
+        metavar = "int",
+        type = parse_positive_int_arg,
+        default = 8,
+        help = "the size of the matrix, the default value is 8"
+    )
+    arg_parser.add_argument(
+        "-n", "--indeterminates",
+        dest = "indeterminate_count",
+        metavar = "int",
+        type = parse_positive_int_arg,
+        default = 2,
+        help = "the number of indeterminates, the default value is 2"
+    )
+    arg_parser.add_argument(
+        "--density",
+        dest = "density",
+        metavar = "float",
+        type = float,
+        default = 1.0,
+        help = ( "the probability of an off-diagonal entry in the band to "
+                 "be nonzero, the default value is 1" )
+    )
+    arg_parser.add_argument(
+        "--bandwidth",
+        dest = "bandwidth",
+        metavar = "int",
+        type = int,
+        help = ( "the maximal distance of a nonzero entry from the "
+                 "diagonal, unlimited by default" )
+    )
+    arg_parser.add_argument(
+        "--degree",
+        dest = "degree",
+        metavar = "int",
+        type = int,
+        default = 1,
+        help = ( "the maximal degree of the entries in every "
+                 "indeterminate, the default value is 1" )
+    )
+    arg_parser.add_argument(
+        "-s", "--sampling-numbers",
+        dest = "sampling_numbers",
+        metavar = "int[,int...]",
+        type = parse_sampling_numbers_arg,
+        default = [16, 64, 256],
+        help = ( "the comma-separated numbers of sampling steps on a "
+                 "semicircle to benchmark, the default is 16,64,256" )
+    )
+    arg_parser.add_argument(
+        "-z", "--zero-threshold",
+        dest = "zero_threshold",
+        metavar = "delta",
+        type = parse_zero_threshold_arg,
+        default = 1e-12,
+        help = "the zero threshold, the default value is 1e-12"
+    )
+    arg_parser.add_argument(
+        "-p", "--points",
+        dest = "point_count",
+        metavar = "int",
+        type = parse_positive_int_arg,
+        default = 10000,
+        help = ( "the maximal number of the sample points to process for "
+                 "every sampling number, the default value is 10000" )
+    )
+    arg_parser.add_argument(
+        "-b", "--block-size",
+        dest = "block_size",
+        metavar = "int",
+        type = parse_positive_int_arg,
+        default = 1000,
+        help = "the block size, the default value is 1000"
+    )
+    arg_parser.add_argument(
+        "--repeat",
+        dest = "repeat",
+        metavar = "int",
+        type = parse_positive_int_arg,
+        default = 3,
+        help = ( "the number of runs of every stage, of which the best one "
+                 "is reported, the default value is 3" )
+    )
+    arg_parser.add_argument(
+        "--seed",
+        dest = "seed",
+        metavar = "int",
+        type = int,
+        default = 0,
+        help = ( "the seed of the random input matrix, the default value "
+                 "is 0" )
+    )
+    arg_parser.add_argument(
+        "-o", "--output",
+        dest = "output_file_name",
+        metavar = "filename",
+        help = ( "write the results to this file instead of the standard "
+                 "output" )
+    )
+
+    return arg_parser.parse_args(argv[1:])
+
+
+def main(argv):
+    parsed_args = parse_argv(argv)
+
+    # NOTE: putting imports here seems to be against Style Guide for Python
+    #   Code (PEP 8)
+    from .runner import parse_input_data
+    from scipy import __version__ as scipy_version
+
+    parameters = dict(
+        size = parsed_args.size,
+        indeterminate_count = parsed_args.indeterminate_count,
+        density = parsed_args.density,
+        bandwidth = parsed_args.bandwidth,
+        degree = parsed_args.degree,
+        seed = parsed_args.seed,
+        eigenvalue_zero_threshold = parsed_args.zero_threshold,
+        point_count = parsed_args.point_count,
+        block_size = parsed_args.block_size,
+        repeat = parsed_args.repeat
+    )
+
+    data = synthetic_input_data( parsed_args.size,
+                                 parsed_args.indeterminate_count,
+                                 parsed_args.density,
+                                 parsed_args.bandwidth,
+                                 parsed_args.degree,
+                                 parsed_args.seed )
+
+    compilation_start_time = process_time()
+    indeterminates, e_mat = parse_input_data(data)
+    compiled_matrix = compile_matrix(e_mat, indeterminates)
+    compilation_time = process_time() - compilation_start_time
+
+    results = [dict( stage = "compiling",
+                     method = "sympy",
+                     sampling_number = None,
+                     points = None,
+                     setup_seconds = 0,
+                     seconds = compilation_time )]
+
+    for sampling_number in parsed_args.sampling_numbers:
+        print( "Benchmarking the sampling number {}..."
+               .format(sampling_number),
+               file = stderr )
+        results.extend(benchmark_sampling_number(
+            compiled_matrix,
+            sampling_number,
+            parsed_args.zero_threshold,
+            parsed_args.point_count,
+            parsed_args.block_size,
+            parsed_args.repeat
+        ))
+
+    report = dict(
+        version = BENCHMARK_RESULTS_VERSION,
+        sig_version = __version__,
+        python_version = python_version(),
+        numpy_version = nmp.__version__,
+        scipy_version = scipy_version,
+        parameters = parameters,
+        results = results
+    )
+
+    if parsed_args.output_file_name is None:
+        dump_json(report, stdout, indent=1)
+        print()
+    else:
+        with open(parsed_args.output_file_name, "w") as f:
+            dump_json(report, f, indent=1)
+
+    return 0
+
+
+# *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
+# --------------------------------------------------------------------------
+# ## Basic testing
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    from ._basic_testing_tools import run_and_time
+
+    def _basic_tests():
+        from .runner import parse_input_data
+        data = synthetic_input_data(6, 2, density=0.5, bandwidth=2, seed=1)
+        assert data == synthetic_input_data( 6, 2,
+                                             density = 0.5,
+                                             bandwidth = 2,
+                                             seed = 1 )
+        assert all( data["matrix"][j][l] == "0"
+                    for j in range(6) for l in range(6) if abs(j - l) > 2 )
+        indeterminates, e_mat = parse_input_data(data)
+        compiled_matrix = compile_matrix(e_mat, indeterminates)
+        assert compiled_matrix["bandwidth"] <= 2
+        results = benchmark_sampling_number( compiled_matrix,
+                                             8,
+                                             point_count = 100,
+                                             block_size = 30,
+                                             repeat = 1 )
+        assert all(result["points"] == 100 for result in results)
+        assert {
+            (result["stage"], result["method"]) for result in results
+        } == {
+            ("sweeping", "points"), ("sweeping", "blocks"),
+            ("sampling", "point"), ("sampling", "lambdify"),
+            ("sampling", "fft"), ("sampling", "tensor"),
+            ("solving", "eigvalsh"), ("solving", "ldl"),
+            ("solving", "eigvalsh-banded"), ("solving", "continuation"),
+            ("analysing", "point"), ("analysing", "batch")
+        }
+
+    t = run_and_time(_basic_tests)
+    print("The module passed basic tests in {:.3g}s.".format(t))
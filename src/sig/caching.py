@@ -0,0 +1,222 @@
+import logging
+from hashlib import sha256
+from json import dump as dump_json
+from json import dumps as dumps_json
+from json import load as load_json
+from os import ( environ, fsync, makedirs, remove, replace, scandir, stat,
+                 utime )
+from os.path import expanduser, join
+from tempfile import NamedTemporaryFile
+
+try:
+    from os import getuid
+except ImportError:
+    # NOTE: there are no user ids on Windows
+    getuid = None
+
+from .compiling import COMPILED_MATRIX_VERSION
+
+# NOTE:  The cached compiled matrices contain the Python source code of the
+#   entries, which is evaluated when a cached matrix is used (see
+#   `entry_functions`), so the cache must be trusted like the input files:
+#   anyone who can write to the cache directory can make the next run
+#   execute any code.  The cache directory is created accessible only to
+#   the user, and the cached files are ignored if they or the directory
+#   belong to another user or are writable by others (see `_is_private`).
+
+# The default limit of the total size of the cached files
+DEFAULT_CACHE_SIZE_LIMIT = 256*2**20
+
+# The logger of the warnings about the cache, which never stop a run
+cache_logger = logging.getLogger("sig.cache")
+
+
+def default_cache_dir():
+    """
+    Return the cache directory given by the environment variable
+    `SIG_CACHE_DIR`, or else the "sig" directory in the user's cache
+    directory.
+    """
+    if "SIG_CACHE_DIR" in environ:
+        return environ["SIG_CACHE_DIR"]
+
+    return join( environ.get("XDG_CACHE_HOME") or expanduser("~/.cache"),
+                 "sig" )
+
+
+def cache_key(data):
+    """
+    Return the key of the compiled matrix of the input data loaded from a
+    JSON input file: a hash of the indeterminates and the matrix.
+    """
+    return sha256(dumps_json(
+        [COMPILED_MATRIX_VERSION, data["indeterminates"], data["matrix"]]
+    ).encode()).hexdigest()
+
+
+def _cache_file_name(cache_dir, key):
+    return join(cache_dir, key + ".json")
+
+
+def _is_private(path):
+    """
+    Tell if the file or directory belongs to the user (where this can be
+    told) and is not writable by the group or by others.
+    """
+    stat_result = stat(path)
+    return ( stat_result.st_mode & 0o022 == 0 and
+             (getuid is None or stat_result.st_uid == getuid()) )
+
+
+def load_cached_matrix(cache_dir, key):
+    """
+    Load the compiled matrix with the key `key` from the cache, and mark it
+    as recently used.  Return `None` if it is not in the cache, or if the
+    cache cannot be trusted (see the note above), in which case a warning is
+    logged.
+    """
+    file_name = _cache_file_name(cache_dir, key)
+
+    try:
+        with open(file_name) as f:
+            if not (_is_private(cache_dir) and _is_private(file_name)):
+                cache_logger.warning( "Warning: the cache in '%s' is not "
+                                      "used, since it is writable by other "
+                                      "users", cache_dir )
+                return None
+            compiled_matrix = load_json(f)
+    except (OSError, ValueError):
+        return None
+
+    if compiled_matrix.get("version") != COMPILED_MATRIX_VERSION:
+        return None
+
+    # NOTE: the modification times are used for the LRU eviction
+    try:
+        utime(file_name)
+    except OSError:
+        pass
+
+    return compiled_matrix
+
+
+def evict_cached_matrices(cache_dir, size_limit=DEFAULT_CACHE_SIZE_LIMIT):
+    """
+    Remove the least recently used files from the cache until their total
+    size is at most `size_limit`, but keep the most recently used one.
+    Raise `OSError` if the cache directory cannot be read.
+    """
+    entries = []
+    for entry in scandir(cache_dir):
+        try:
+            if entry.name.endswith(".json") and entry.is_file():
+                entries.append((entry, entry.stat()))
+        except OSError:
+            # The file has been removed meanwhile
+            pass
+    entries.sort(key=lambda item: item[1].st_mtime, reverse=True)
+
+    total_size = 0
+    for j, (entry, stat_result) in enumerate(entries):
+        total_size += stat_result.st_size
+        if j > 0 and total_size > size_limit:
+            try:
+                remove(entry.path)
+            except OSError:
+                pass
+
+
+def store_cached_matrix( cache_dir,
+                         key,
+                         compiled_matrix,
+                         size_limit = DEFAULT_CACHE_SIZE_LIMIT ):
+    """
+    Save the compiled matrix to the cache atomically (see `save_checkpoint`)
+    and evict the least recently used files if the cache is too large.
+    If the cache cannot be written (for example, if the directory is
+    read-only or the disk is full), only log a warning and return `False`;
+    otherwise return `True`.
+    """
+    temp_file_name = None
+    try:
+        makedirs(cache_dir, mode=0o700, exist_ok=True)
+
+        with NamedTemporaryFile( "w",
+                                 dir = cache_dir,
+                                 prefix = ".tmp-",
+                                 delete = False ) as f:
+            temp_file_name = f.name
+            dump_json(compiled_matrix, f)
+            f.flush()
+            fsync(f.fileno())
+
+        replace(temp_file_name, _cache_file_name(cache_dir, key))
+
+    except OSError as e:
+        cache_logger.warning( "Warning: the compiled matrix could not be "
+                              "stored in the cache: %s", e )
+        if temp_file_name is not None:
+            try:
+                remove(temp_file_name)
+            except OSError:
+                pass
+        return False
+
+    try:
+        evict_cached_matrices(cache_dir, size_limit)
+    except OSError as e:
+        cache_logger.warning( "Warning: the old files could not be removed "
+                              "from the cache: %s", e )
+
+    return True
+
+
+# *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
+# --------------------------------------------------------------------------
+# ## Basic testing
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    from ._basic_testing_tools import run_and_time
+
+    def _basic_tests():
+        from os import chmod, listdir, rmdir
+        from tempfile import mkdtemp
+        from time import time
+        cache_dir = mkdtemp()
+        data = {"indeterminates": "s t", "matrix": [["s*t"]]}
+        key = cache_key(data)
+        assert cache_key(dict(data, matrix=[["s*t + 1"]])) != key
+        assert load_cached_matrix(cache_dir, key) is None
+        compiled_matrix = { "version": COMPILED_MATRIX_VERSION,
+                            "entries": [] }
+        store_cached_matrix(cache_dir, key, compiled_matrix)
+        assert load_cached_matrix(cache_dir, key) == compiled_matrix
+        other_key = cache_key(dict(data, indeterminates="t s"))
+        store_cached_matrix(cache_dir, other_key, compiled_matrix)
+        # Make the first file the most recently used one
+        utime(_cache_file_name(cache_dir, key), (time() + 10,)*2)
+        evict_cached_matrices(cache_dir, size_limit=0)
+        assert listdir(cache_dir) == [key + ".json"]
+
+        # A cache that cannot be written or trusted is only warned about
+        null_handler = logging.NullHandler()
+        cache_logger.addHandler(null_handler)
+        try:
+            file_cache_dir = _cache_file_name(cache_dir, key)
+            assert not store_cached_matrix( file_cache_dir,
+                                            key,
+                                            compiled_matrix )
+            chmod(cache_dir, 0o777)
+            assert load_cached_matrix(cache_dir, key) is None
+            chmod(cache_dir, 0o700)
+            assert load_cached_matrix(cache_dir, key) == compiled_matrix
+        finally:
+            cache_logger.removeHandler(null_handler)
+
+        remove(_cache_file_name(cache_dir, key))
+        rmdir(cache_dir)
+
+    t = run_and_time(_basic_tests)
+    print("The module passed basic tests in {:.3g}s.".format(t))
@@ -1,5 +1,10 @@
-from scipy import inf
-from scipy.linalg import norm
+import numpy as nmp
+from math import inf
+from numpy.linalg import norm
+from random import getrandbits
+from sys import stderr
+
+from .sampling import bands_to_dense
 
 
 def is_hermitian(mat, relative_discrepancy_limit=1e-10):
@@ -19,6 +24,177 @@ def is_hermitian(mat, relative_discrepancy_limit=1e-10):
     return dmat_scale <= relative_discrepancy_limit*mat_scale
 
 
+def _norm_scales(mats):
+    """
+    Compute the sums of the 1- and the infinity-norms of the real and the
+    imaginary parts of the matrices of a stack of matrices.
+    """
+    scales = 0
+    for part in (mats.real, mats.imag):
+        abs_part = nmp.abs(part)
+        scales = ( scales +
+                   abs_part.sum(axis=-2).max(axis=-1) +
+                   abs_part.sum(axis=-1).max(axis=-1) )
+    return scales
+
+
+def hermiticity_discrepancies(mats):
+    """
+    Compute the relative discrepancies from being Hermitian of the matrices
+    of a stack of square matrices of shape (batch, k, k), as measured by
+    `is_hermitian`: the ratios of the scales of the differences of the
+    matrices with their conjugate transposes to the scales of the matrices
+    (see `_norm_scales`), with a few reductions over the whole stack.
+    """
+    dmat_scales = _norm_scales(mats - mats.conj().swapaxes(-1, -2))
+    mat_scales = _norm_scales(mats)
+    with nmp.errstate(divide="ignore", invalid="ignore"):
+        discrepancies = dmat_scales/mat_scales
+    discrepancies[dmat_scales == 0] = 0
+    return discrepancies
+
+
+def _sweep_positions(inds_block, steps):
+    """
+    Compute the positions (modulo 2**64) of the index n-uples of the
+    integer array `inds_block` in the sweep of the whole grid with the
+    given number of steps, as made by `make_sample_index_iterator_maker`
+    without the periodicity parameter and `canonical`.
+    """
+    positions = (inds_block[:, 0] - 1).astype(nmp.uint64)
+    for inds in inds_block[:, 1:].T:
+        positions = ( positions*nmp.uint64(2*steps - 1) +
+                      ((inds - 1) % (2*steps)).astype(nmp.uint64) )
+    return positions
+
+
+def _mix(z):
+    # The finalizer of the SplitMix64 generator
+    z = z + nmp.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> nmp.uint64(30)))*nmp.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> nmp.uint64(27)))*nmp.uint64(0x94D049BB133111EB)
+    return z ^ (z >> nmp.uint64(31))
+
+
+def _uniform_hashes(inds_block, seed):
+    """
+    Map the index n-uples of the integer array `inds_block` to
+    pseudorandom numbers uniformly distributed in [0, 1), which only depend
+    on the n-uples and `seed`.
+    """
+    hashes = nmp.full(len(inds_block), seed, dtype=nmp.uint64)
+    for inds in inds_block.T:
+        hashes = _mix(hashes ^ inds.astype(nmp.uint64))
+    return (hashes >> nmp.uint64(11))*2.0**-53
+
+
+def make_hermiticity_checker( relative_discrepancy_limit = 1e-10,
+                              check_interval = 1,
+                              random_fraction = 0.0,
+                              seed = None,
+                              steps = None ):
+    """
+    Make a function `check(inds_block, mats, banded=False)` that computes
+    the relative discrepancies from being Hermitian (see
+    `hermiticity_discrepancies`) of some of the matrices of a block with
+    the index n-uples in the integer array `inds_block`: those at every
+    `check_interval`-th position of the sweep of the whole grid with the
+    given number of `steps` (see `_sweep_positions`), which is required if
+    `check_interval` is not 1, and every other one with probability
+    `random_fraction`.  The matrices checked only depend on their index
+    n-uples (and on `seed`), and not on how the points are split into
+    blocks, slabs or shards.  If `banded` is true, the matrices are
+    expected in the LAPACK general band storage (see `bands_to_dense`).
+
+    Return the triple of this function, the function returning the summary
+    of the checks so far (a dictionary with the numbers of the points
+    seen, checked and exceeding `relative_discrepancy_limit`, and the worst
+    discrepancy with its index n-uple), and the function adding up a
+    summary of other checks (made in another process) to it.
+    """
+    if check_interval != 1 and steps is None:
+        raise ValueError("the check interval requires the number of steps")
+
+    if seed is None:
+        seed = getrandbits(64)
+
+    summary = dict( points = 0,
+                    checked_points = 0,
+                    exceeding_points = 0,
+                    worst_discrepancy = None,
+                    worst_inds = None )
+
+    def check(inds_block, mats, banded=False):
+        if check_interval == 1:
+            selected = nmp.ones(len(inds_block), dtype=bool)
+        else:
+            selected = (
+                _sweep_positions(inds_block, steps) %
+                nmp.uint64(check_interval) == 0
+            )
+        if random_fraction > 0:
+            selected |= _uniform_hashes(inds_block, seed) < random_fraction
+        summary["points"] += len(inds_block)
+
+        if not selected.any():
+            return
+
+        selected_mats = mats[selected]
+        if banded:
+            selected_mats = bands_to_dense(selected_mats)
+        discrepancies = hermiticity_discrepancies(selected_mats)
+
+        add_summary(dict(
+            points = 0,
+            checked_points = len(discrepancies),
+            exceeding_points = int(nmp.count_nonzero(
+                discrepancies > relative_discrepancy_limit
+            )),
+            worst_discrepancy = float(discrepancies.max()),
+            worst_inds = (
+                inds_block[selected][nmp.argmax(discrepancies)].tolist()
+            )
+        ))
+
+    def get_summary():
+        return dict(summary)
+
+    def add_summary(other_summary):
+        for name in ["points", "checked_points", "exceeding_points"]:
+            summary[name] += other_summary[name]
+        if other_summary["worst_discrepancy"] is not None and (
+            summary["worst_discrepancy"] is None or
+            other_summary["worst_discrepancy"] > summary["worst_discrepancy"]
+        ):
+            summary["worst_discrepancy"] = other_summary["worst_discrepancy"]
+            summary["worst_inds"] = other_summary["worst_inds"]
+
+    return (check, get_summary, add_summary)
+
+
+def report_hermiticity_check( summary,
+                              relative_discrepancy_limit = 1e-10,
+                              message_output_dest = stderr ):
+
+    print( "Checked the matrices at {} of {} sample points for being "
+           "Hermitian:\n"
+           "  {} of them exceed the relative discrepancy limit {:.3g}"
+           .format( summary["checked_points"],
+                    summary["points"],
+                    summary["exceeding_points"],
+                    relative_discrepancy_limit ),
+           end = "",
+           file = message_output_dest )
+
+    if summary["worst_discrepancy"] is None:
+        print(".", file=message_output_dest)
+    else:
+        print( ",\n  the worst relative discrepancy is {:.3g} at {}."
+               .format( summary["worst_discrepancy"],
+                        tuple(summary["worst_inds"]) ),
+               file = message_output_dest )
+
+
 # *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
 # --------------------------------------------------------------------------
 # ## Basic testing
@@ -71,5 +247,65 @@ if __name__ == "__main__":
         assert not is_hermitian( almost_hermitian_matrix2,
                                  relative_discrepancy_limit = 1e-12 )
 
+        mats = nmp.array([ hermitian_matrix,
+                           almost_hermitian_matrix1,
+                           non_hermitian_matrix1,
+                           non_hermitian_matrix2,
+                           non_hermitian_matrix3,
+                           nmp.zeros((2, 2)) ])
+        discrepancies = hermiticity_discrepancies(mats)
+        for mat, discrepancy in zip(mats, discrepancies):
+            for limit in [1e-12, 1e-10]:
+                assert ( is_hermitian(nmp.asmatrix(mat), limit) ==
+                         (discrepancy <= limit) )
+        # The first 6 points of the sweep of the grid with 3 steps
+        inds_block = nmp.array([ [1, 1], [1, 2], [1, 3], [1, -2], [1, -1],
+                                 [2, 1] ])
+        assert _sweep_positions(inds_block, 3).tolist() == list(range(6))
+        check, get_summary, add_summary = make_hermiticity_checker(
+            check_interval = 2,
+            steps = 3
+        )
+        check(inds_block[:3], mats[:3])
+        check(inds_block[3:], mats[3:])
+        summary = get_summary()
+        assert summary["points"] == 6
+        assert summary["checked_points"] == 3
+        assert summary["exceeding_points"] == 2
+        assert summary["worst_discrepancy"] == discrepancies[4]
+        assert summary["worst_inds"] == [1, -1]
+        add_summary(dict( summary,
+                          worst_discrepancy = 10.0,
+                          worst_inds = [0, 0] ))
+        assert get_summary()["checked_points"] == 6
+        assert get_summary()["worst_inds"] == [0, 0]
+        # The same matrices are checked in separately processed blocks
+        check, get_summary, _ = make_hermiticity_checker(
+            check_interval = 2,
+            steps = 3
+        )
+        check(inds_block[3:], mats[3:])
+        assert get_summary()["checked_points"] == 1
+        assert get_summary()["worst_inds"] == [1, -1]
+        inds_block = nmp.array([ [i, j] for i in range(1, 101)
+                                        for j in range(-99, 101) if j ])
+        mats = nmp.zeros((len(inds_block), 2, 2))
+        checked_counts = []
+        for block_count in [1, 7]:
+            check, get_summary, _ = make_hermiticity_checker(
+                check_interval = 5,
+                random_fraction = 0.1,
+                seed = 1,
+                steps = 100
+            )
+            for blocks in nmp.array_split(
+                nmp.arange(len(inds_block)),
+                block_count
+            ):
+                check(inds_block[blocks], mats[blocks])
+            checked_counts.append(get_summary()["checked_points"])
+        assert checked_counts[0] == checked_counts[1]
+        assert 0.25 < checked_counts[0]/len(inds_block) < 0.31
+
     t = run_and_time(_basic_tests)
     print("The module passed basic tests in {:.3g}s.".format(t))
@@ -0,0 +1,143 @@
+from json import dump as dump_json
+from json import load as load_json
+from os import fsync, remove, replace
+from os.path import abspath, dirname
+from tempfile import NamedTemporaryFile
+from time import monotonic
+
+
+def load_checkpoint(checkpoint_file_name):
+    """
+    Load the checkpoint saved by a function made by `make_checkpointer`.
+    """
+    with open(checkpoint_file_name) as f:
+        return load_json(f)
+
+
+def save_checkpoint(checkpoint_file_name, checkpoint):
+    """
+    Save the checkpoint atomically: write it to a temporary file in the same
+    directory and then rename the temporary file.  If writing fails, the
+    temporary file is removed and the previous checkpoint is left intact.
+    """
+    with NamedTemporaryFile( "w",
+                             dir = dirname(abspath(checkpoint_file_name)),
+                             prefix = ".checkpoint-",
+                             delete = False ) as f:
+        try:
+            dump_json(checkpoint, f)
+            f.flush()
+            fsync(f.fileno())
+        except BaseException:
+            f.close()
+            remove(f.name)
+            raise
+
+    replace(f.name, checkpoint_file_name)
+
+
+def make_checkpointer( checkpoint_file_name,
+                       parameters,
+                       output_dest,
+                       interval = 60 ):
+    """
+    Make a function that takes the first index of the next slab to process
+    and the accumulated timing counters, and saves a checkpoint if at least
+    `interval` seconds have passed since the last one was saved (or if
+    called with `force=True`).  The checkpoint records the parameters of the
+    run (which must not change on resuming) and the size of the output
+    written so far, so that the output written after the checkpoint can be
+    discarded on resuming.
+    """
+    last_save_time = monotonic()
+
+    def checkpointer(next_first_index, timing, force=False):
+        nonlocal last_save_time
+
+        if not force and monotonic() - last_save_time < interval:
+            return
+
+        output_dest.flush()
+        save_checkpoint( checkpoint_file_name,
+                         { "parameters": parameters,
+                           "next_first_index": next_first_index,
+                           "output_size": output_dest.tell(),
+                           "timing": list(timing) } )
+        last_save_time = monotonic()
+
+    return checkpointer
+
+
+# *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
+# --------------------------------------------------------------------------
+# ## Basic testing
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    from ._basic_testing_tools import run_and_time
+
+    def _basic_tests():
+        from os import listdir
+        from os.path import join
+        from tempfile import TemporaryDirectory
+
+        with TemporaryDirectory() as dir_name:
+            checkpoint_file_name = join(dir_name, "checkpoint.json")
+
+            save_checkpoint(checkpoint_file_name, {"next_first_index": 3})
+            save_checkpoint(checkpoint_file_name, {"next_first_index": 5})
+            assert listdir(dir_name) == ["checkpoint.json"]
+            assert load_checkpoint(checkpoint_file_name) == {
+                "next_first_index": 5
+            }
+
+            # A checkpoint that cannot be written must not replace the
+            # previous one or leave a temporary file behind.
+            try:
+                save_checkpoint( checkpoint_file_name,
+                                 {"next_first_index": object()} )
+            except TypeError:
+                pass
+            else:
+                assert False
+            assert listdir(dir_name) == ["checkpoint.json"]
+            assert load_checkpoint(checkpoint_file_name) == {
+                "next_first_index": 5
+            }
+
+            parameters = {"sampling_number": 8, "input": "abc"}
+            with open(join(dir_name, "output.txt"), "w") as output_dest:
+                checkpointer = make_checkpointer( checkpoint_file_name,
+                                                  parameters,
+                                                  output_dest,
+                                                  interval = 3600 )
+                print("(1, 1) : (2, 0, 0)", file=output_dest)
+                checkpointer(2, (0.5, 0, 0, 0))
+                assert load_checkpoint(checkpoint_file_name) == {
+                    "next_first_index": 5
+                }
+
+                checkpointer(2, (0.5, 0, 0, 0), force=True)
+                checkpoint = load_checkpoint(checkpoint_file_name)
+                assert checkpoint == { "parameters": parameters,
+                                       "next_first_index": 2,
+                                       "output_size": output_dest.tell(),
+                                       "timing": [0.5, 0, 0, 0] }
+                assert checkpoint["output_size"] == 19
+
+                checkpointer = make_checkpointer( checkpoint_file_name,
+                                                  parameters,
+                                                  output_dest,
+                                                  interval = 0 )
+                print("(2, 1) : (2, 0, 0)", file=output_dest)
+                checkpointer(3, (1.5, 0, 0, 0))
+                checkpoint = load_checkpoint(checkpoint_file_name)
+                assert checkpoint["next_first_index"] == 3
+                assert checkpoint["output_size"] == 38
+
+            assert sorted(listdir(dir_name)) == [ "checkpoint.json",
+                                                  "output.txt" ]
+
+    t = run_and_time(_basic_tests)
+    print("The module passed basic tests in {:.3g}s.".format(t))
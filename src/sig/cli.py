@@ -4,9 +4,10 @@
 from argparse import ArgumentParser, ArgumentTypeError
 # NOTE: `exit` already means something in Python
 from sys import exit as sys_exit
+from sys import stdout
 
 
-def parse_sampling_number_arg(s):
+def parse_positive_int_arg(s):
     try:
         v = int(s)
     except ValueError:
@@ -18,6 +19,48 @@ def parse_sampling_number_arg(s):
     return v
 
 
+def parse_sampling_numbers_arg(s):
+    return [parse_positive_int_arg(v) for v in s.split(",")]
+
+
+def parse_precision_arg(s):
+    try:
+        v = int(s)
+    except ValueError:
+        raise ArgumentTypeError("invalid int value '{}'".format(s))
+
+    if not v >= 16:
+        raise ArgumentTypeError("{} is less than 16".format(v))
+
+    return v
+
+
+def parse_interval_arg(s):
+    try:
+        v = float(s)
+    except ValueError:
+        raise ArgumentTypeError("invalid float value '{}'".format(s))
+
+    if not v > 0:
+        raise ArgumentTypeError("{} is not positive".format(v))
+
+    return v
+
+
+def parse_fraction_arg(s):
+    try:
+        v = float(s)
+    except ValueError:
+        raise ArgumentTypeError("invalid float value '{}'".format(s))
+
+    if not 0 <= v <= 1:
+        raise ArgumentTypeError(
+          "{} is not in the interval [0, 1]".format(v)
+        )
+
+    return v
+
+
 def parse_zero_threshold_arg(s):
     try:
         v = float(s)
@@ -32,43 +75,84 @@ def parse_zero_threshold_arg(s):
     return v
 
 
+def parse_zero_thresholds_arg(s):
+    return [parse_zero_threshold_arg(v) for v in s.split(",")]
+
+
+def parse_signature_parameters_arg(s):
+    try:
+        return [int(v) for v in s.split(",")]
+    except ValueError:
+        raise ArgumentTypeError("invalid int list '{}'".format(s))
+
+
+def parse_shard_arg(s):
+    try:
+        shard_index, shard_count = (int(v) for v in s.split("/"))
+    except ValueError:
+        raise ArgumentTypeError("invalid shard '{}'".format(s))
+
+    if not 1 <= shard_index <= shard_count:
+        raise ArgumentTypeError(
+          "{} is not in the interval [1, {}]".format(shard_index, shard_count)
+        )
+
+    return (shard_index, shard_count)
+
+
 def parse_argv(argv):
     arg_parser = ArgumentParser(
         prog = argv[0],
-        description = "Some algebraic numerical calculations."
+        description = "Some algebraic numerical calculations.",
+        epilog = ( "Run \"{0} compile -h\" for compiling the input matrix "
+                   "for faster startup, \"{0} merge -h\" for merging the "
+                   "outputs of the shards of a run, and \"{0} decode -h\" "
+                   "for expanding the runs or regions of points."
+                   .format(argv[0]) )
     )
     arg_parser.add_argument(
         "input_file_name",
         metavar = "filename",
-        help = "JSON input file name"
+        help = ( "JSON input file name (possibly of an input matrix "
+                 "compiled with the \"compile\" subcommand), or the name of "
+                 "a .npy file of eigenvalues with --from-eigenvalues" )
     )
     arg_parser.add_argument(
         "-s", "-n", "--sampling-number",
-        dest = "sampling_number",
-        metavar = "int",
-        type = parse_sampling_number_arg,
-        required = True,
-        help = "number of sampling steps on a semicircle"
+        dest = "sampling_numbers",
+        metavar = "int[,int...]",
+        type = parse_sampling_numbers_arg,
+        help = ( "number of sampling steps on a semicircle, or a "
+                 "comma-separated list of them, in which case the grid for "
+                 "their least common multiple is sampled once, and the "
+                 "results for every one of them are written to a separate "
+                 "file (see --output); required unless --from-eigenvalues "
+                 "is given" )
     )
     default_eigenvalue_zero_threshold = 1e-12
     arg_parser.add_argument(
         "-z", "--zero-threshold",
-        dest = "zero_threshold",
-        metavar = "delta",
-        type = parse_zero_threshold_arg,
-        default = default_eigenvalue_zero_threshold,
+        dest = "zero_thresholds",
+        metavar = "delta[,delta...]",
+        type = parse_zero_thresholds_arg,
+        default = [default_eigenvalue_zero_threshold],
         help = ( "the minimal positive value considered zero when "
                  "computing the signature, must be in the interval "
-                 "[0, 1), the default value is {}"
+                 "[0, 1), the default value is {}; several comma-separated "
+                 "values select the results for every one of them from "
+                 "the same eigenvalues (see --output)"
                  .format(default_eigenvalue_zero_threshold) )
     )
     arg_parser.add_argument(
         "-g", "--signature-parameter",
-        dest = "signature_parameter",
-        metavar = "int",
-        type = int,
+        dest = "signature_parameters",
+        metavar = "int[,int...]",
+        type = parse_signature_parameters_arg,
+        default = [None],
         help = ( "the parameter used to detect interesting "
-                 "signatures" )
+                 "signatures; several comma-separated values select the "
+                 "results for every one of them from the same eigenvalues "
+                 "(see --output)" )
     )
     arg_parser.add_argument(
         "-r", "--periodicity-parameter",
@@ -83,32 +167,718 @@ def parse_argv(argv):
         dest = "caution",
         action = "store_true",
         help = ( "test the computed matrices for being not too far "
-                 "from being Hermitian" )
+                 "from being Hermitian; with a block size, only the worst "
+                 "discrepancy is reported, with the timing" )
+    )
+    arg_parser.add_argument(
+        "--caution-interval",
+        dest = "caution_interval",
+        metavar = "m",
+        type = parse_positive_int_arg,
+        default = 1,
+        help = ( "with -c and a block size, test only every m-th matrix "
+                 "(and those selected by --caution-random), the default "
+                 "value is 1" )
+    )
+    arg_parser.add_argument(
+        "--caution-random",
+        dest = "caution_random_fraction",
+        metavar = "fraction",
+        type = parse_fraction_arg,
+        default = 0.0,
+        help = ( "with -c and a block size, also test this fraction of the "
+                 "other matrices, chosen at random, the default value is 0" )
+    )
+    arg_parser.add_argument(
+        "-b", "--block-size",
+        dest = "block_size",
+        metavar = "int",
+        type = parse_positive_int_arg,
+        help = ( "process the sample points in blocks of this size, "
+                 "computing the eigenvalues of a whole block of matrices "
+                 "at once" )
+    )
+    arg_parser.add_argument(
+        "-j", "--jobs",
+        dest = "jobs",
+        metavar = "N",
+        type = parse_positive_int_arg,
+        default = 1,
+        help = ( "the number of worker processes among which to split "
+                 "the sampling, the default value is 1" )
+    )
+    arg_parser.add_argument(
+        "--pipeline",
+        dest = "pipeline_threads",
+        metavar = "N",
+        type = parse_positive_int_arg,
+        help = ( "sample the blocks of matrices in a separate thread, "
+                 "compute their eigenvalues in N threads, and write out "
+                 "the results in the main thread, all at the same time; "
+                 "requires a block size" )
+    )
+    arg_parser.add_argument(
+        "--pipeline-depth",
+        dest = "pipeline_queue_depth",
+        metavar = "N",
+        type = parse_positive_int_arg,
+        help = ( "the maximal number of blocks of matrices sampled ahead "
+                 "of writing out their results with --pipeline, the "
+                 "default value is 4" )
+    )
+    arg_parser.add_argument(
+        "--sampling-method",
+        dest = "sampling_method",
+        choices = ["lambdify", "fft", "tensor"],
+        default = "lambdify",
+        help = ( "the method of computing the matrix entries in the block "
+                 "processing mode: either evaluate them at every sample "
+                 "point, or compute the values of the Laurent polynomial "
+                 "entries on whole rows of the grid with FFT, or compute "
+                 "them for a block of points as one product of the values "
+                 "of the monomials by the array of their coefficients; "
+                 "the default is \"lambdify\"" )
+    )
+    arg_parser.add_argument(
+        "--solving-method",
+        dest = "solving_method",
+        choices = ["eigvalsh", "ldl", "continuation"],
+        default = "eigvalsh",
+        help = ( "the method of finding the signatures in the block "
+                 "processing mode: either compute all the eigenvalues, or "
+                 "find the inertia from LDL factorizations of the whole "
+                 "block and compute the eigenvalues only when some "
+                 "eigenvalue may be suspiciously close to 0 (this is "
+                 "faster only for matrices up to about 6 by 6), or take "
+                 "the signature from the previously solved matrix when the "
+                 "difference from it is too small to change the inertia "
+                 "(by Weyl's inequality) and compute the eigenvalues "
+                 "otherwise; with the last two, the "
+                 "minimal non-zero eigenvalues printed out are only "
+                 "estimates; the default is \"eigvalsh\"" )
+    )
+    arg_parser.add_argument(
+        "--band-storage",
+        dest = "band_storage",
+        choices = ["auto", "always", "never"],
+        default = "auto",
+        help = ( "whether to store the matrices in the band storage and "
+                 "to use band eigenvalue solvers in the block processing "
+                 "mode; with \"auto\", the default, it is done if the "
+                 "input matrix is at least 32 by 32 and its band of "
+                 "nonzero entries is at most an eighth of its size wide "
+                 "(for smaller matrices, the dense solver is faster)" )
+    )
+    arg_parser.add_argument(
+        "--refine-from",
+        dest = "coarse_sampling_number",
+        metavar = "int",
+        type = parse_positive_int_arg,
+        help = ( "sample first the points of the grid with this number of "
+                 "sampling steps on a semicircle, which must divide the "
+                 "sampling number, and then refine the grid only near the "
+                 "points where the signature changes or some eigenvalues "
+                 "are suspicious; requires a block size" )
+    )
+    arg_parser.add_argument(
+        "--no-cache",
+        dest = "cache",
+        action = "store_false",
+        help = ( "do not look up the compiled input matrix in the cache, "
+                 "and do not save it there" )
+    )
+    arg_parser.add_argument(
+        "--cache-dir",
+        dest = "cache_dir",
+        metavar = "dirname",
+        help = ( "the directory of the cache of compiled input matrices, "
+                 "the default is $SIG_CACHE_DIR or ~/.cache/sig; the cached "
+                 "matrices contain Python code that is run, so the cache "
+                 "is not used if the directory or the files are writable "
+                 "by other users, and it must not be writable by anyone "
+                 "untrusted; if the cache cannot be written, only a "
+                 "warning is printed" )
+    )
+    arg_parser.add_argument(
+        "--verify",
+        dest = "verification_precision",
+        metavar = "digits",
+        type = parse_precision_arg,
+        help = ( "recompute the signatures at the points with suspicious "
+                 "eigenvalues with this number of significant decimal "
+                 "digits (at least 16), and print out the recomputed "
+                 "signatures marked as verified" )
+    )
+    arg_parser.add_argument(
+        "--verification-jobs",
+        dest = "verification_jobs",
+        metavar = "N",
+        type = parse_positive_int_arg,
+        default = 1,
+        help = ( "the number of worker processes for the recomputation "
+                 "with --verify in a run without --jobs, the default "
+                 "value is 1" )
+    )
+    arg_parser.add_argument(
+        "--save-eigenvalues",
+        dest = "eigenvalues_file_name",
+        metavar = "filename",
+        help = ( "also save all the computed eigenvalues to this .npy file "
+                 "(with the parameters of the run in an accompanying .json "
+                 "file), so that they can be analysed again with "
+                 "--from-eigenvalues; requires a block size" )
+    )
+    arg_parser.add_argument(
+        "--from-eigenvalues",
+        dest = "from_eigenvalues",
+        action = "store_true",
+        help = ( "analyse the eigenvalues saved with --save-eigenvalues "
+                 "in the given file instead of sampling the matrix, "
+                 "possibly with other values of -z and -g" )
     )
 
-    return arg_parser.parse_args(argv[1:])
+    arg_parser.add_argument(
+        "-o", "--output",
+        dest = "output_file_name",
+        metavar = "filename",
+        help = ( "write the results to this file instead of the standard "
+                 "output; with several sampling numbers, the name may "
+                 "contain \"{q}\" to be replaced by the sampling number, "
+                 "or else \".q<sampling number>\" is inserted before the "
+                 "extension; similarly, with several values of -z or -g, "
+                 "\"{z}\" and \"{g}\" are replaced by them, or else "
+                 "\".z<delta>.g<int>\" is inserted" )
+    )
+    arg_parser.add_argument(
+        "--output-format",
+        dest = "output_format",
+        choices = ["text", "npy", "runs", "regions"],
+        default = "text",
+        help = ( "the format of the results: either text lines, or binary "
+                 "records in a .npy file (with the parameters of the run "
+                 "in an accompanying .json file), which requires --output "
+                 "and a block size, or text lines of runs of points with "
+                 "the same signature along the last index (\"runs\"), or, "
+                 "for 2 indeterminates, of the connected regions of such "
+                 "points (\"regions\"), which require a block size and "
+                 "can be expanded to text lines with the \"decode\" "
+                 "subcommand; the default is \"text\"" )
+    )
+    arg_parser.add_argument(
+        "--checkpoint",
+        dest = "checkpoint_file_name",
+        metavar = "filename",
+        help = ( "process the sample points in slabs by the first index "
+                 "and periodically save the progress to this file" )
+    )
+    arg_parser.add_argument(
+        "--checkpoint-interval",
+        dest = "checkpoint_interval",
+        metavar = "seconds",
+        type = float,
+        default = 60,
+        help = ( "the minimal time between saving checkpoints, the "
+                 "default value is 60" )
+    )
+    arg_parser.add_argument(
+        "--resume",
+        dest = "resume",
+        action = "store_true",
+        help = ( "resume the processing from the checkpoint, appending to "
+                 "the output file" )
+    )
+    arg_parser.add_argument(
+        "--shard",
+        dest = "shard",
+        metavar = "K/N",
+        type = parse_shard_arg,
+        help = ( "process only the K-th of N slabs of the range of the "
+                 "first index, which must be at most the sampling number, "
+                 "so that the N shards can be run separately and their "
+                 "outputs merged with the \"merge\" subcommand; requires "
+                 "--output" )
+    )
+    arg_parser.add_argument(
+        "--canonical",
+        dest = "canonical",
+        action = "store_true",
+        help = ( "sample only one point of every pair of points that "
+                 "differ by the conjugation of all the parameters (the "
+                 "signatures at such points are the same)" )
+    )
+    arg_parser.add_argument(
+        "--expand-conjugates",
+        dest = "expand_conjugates",
+        action = "store_true",
+        help = ( "with --canonical, print out the results also for the "
+                 "points that are not sampled because they are conjugate "
+                 "to sampled ones" )
+    )
+
+    arg_parser.add_argument(
+        "--progress",
+        dest = "progress_interval",
+        metavar = "seconds",
+        type = parse_interval_arg,
+        help = ( "report the progress (the number of the sample points "
+                 "processed, the speed, the estimated remaining time, the "
+                 "times of the stages) at most this often" )
+    )
+    arg_parser.add_argument(
+        "--progress-file",
+        dest = "progress_file_name",
+        metavar = "filename",
+        help = ( "append the progress reports to this file as lines of JSON "
+                 "instead of printing them to the standard error output; "
+                 "implies --progress 10 unless --progress is given" )
+    )
+    arg_parser.add_argument(
+        "--profile",
+        dest = "profile_file_name",
+        metavar = "filename",
+        help = ( "profile the computation of the matrices and of the "
+                 "eigenvalues with cProfile and save the statistics to this "
+                 "file (to be read with pstats)" )
+    )
+
+    parsed_args = arg_parser.parse_args(argv[1:])
+
+    if ( parsed_args.progress_file_name is not None and
+         parsed_args.progress_interval is None ):
+        parsed_args.progress_interval = 10
+
+    if parsed_args.resume and ( parsed_args.checkpoint_file_name is None or
+                                parsed_args.output_file_name is None ):
+        arg_parser.error("--resume requires --checkpoint and --output")
+
+    if parsed_args.output_format == "npy" and (
+        parsed_args.output_file_name is None or
+        parsed_args.block_size is None and not parsed_args.from_eigenvalues
+    ):
+        arg_parser.error( "the output format \"npy\" requires --output and "
+                          "a block size" )
+
+    if parsed_args.output_format in ("runs", "regions"):
+        run_length_format_restrictions = [
+            ("--from-eigenvalues", parsed_args.from_eigenvalues),
+            ( "several sampling numbers",
+              parsed_args.sampling_numbers is not None and
+              len(set(parsed_args.sampling_numbers)) > 1 ),
+            ( "several values of -z or -g",
+              len(set(parsed_args.zero_thresholds)) > 1 or
+              len(set(parsed_args.signature_parameters)) > 1 ),
+            ("--refine-from", parsed_args.coarse_sampling_number is not None)
+        ]
+        if parsed_args.output_format == "regions":
+            run_length_format_restrictions += [
+                ("--jobs", parsed_args.jobs > 1),
+                ( "--checkpoint",
+                  parsed_args.checkpoint_file_name is not None ),
+                ("--shard", parsed_args.shard is not None),
+                ("-r", parsed_args.periodicity_parameter is not None),
+                ("--expand-conjugates", parsed_args.expand_conjugates)
+            ]
+        for option, is_given in run_length_format_restrictions:
+            if is_given:
+                arg_parser.error( "the output format \"{}\" cannot be used "
+                                  "with {}"
+                                  .format(parsed_args.output_format, option) )
+        if parsed_args.block_size is None:
+            arg_parser.error( "the output format \"{}\" requires a block "
+                              "size".format(parsed_args.output_format) )
+
+    parsed_args.zero_thresholds = list(dict.fromkeys(
+        parsed_args.zero_thresholds
+    ))
+    parsed_args.signature_parameters = list(dict.fromkeys(
+        parsed_args.signature_parameters
+    ))
+
+    several_criteria = ( len(parsed_args.zero_thresholds) > 1 or
+                         len(parsed_args.signature_parameters) > 1 )
+
+    if parsed_args.from_eigenvalues:
+        if several_criteria and parsed_args.output_file_name is None:
+            arg_parser.error("several values of -z or -g require --output")
+        for option, is_given in [
+            ("-s", parsed_args.sampling_numbers is not None),
+            ("-r", parsed_args.periodicity_parameter is not None),
+            ("-c", parsed_args.caution),
+            ("--jobs", parsed_args.jobs > 1),
+            ("--refine-from", parsed_args.coarse_sampling_number is not None),
+            ("--verify", parsed_args.verification_precision is not None),
+            ( "--save-eigenvalues",
+              parsed_args.eigenvalues_file_name is not None ),
+            ("--checkpoint", parsed_args.checkpoint_file_name is not None),
+            ("--canonical", parsed_args.canonical),
+            ("--shard", parsed_args.shard is not None)
+        ]:
+            if is_given:
+                arg_parser.error( "--from-eigenvalues cannot be used with {}"
+                                  .format(option) )
+        return (arg_parser, parsed_args)
+
+    if parsed_args.sampling_numbers is None:
+        arg_parser.error("the sampling number (-s) is required")
+
+    parsed_args.sampling_numbers = sorted(set(parsed_args.sampling_numbers))
+
+    if len(parsed_args.sampling_numbers) > 1:
+        if parsed_args.output_file_name is None:
+            arg_parser.error("several sampling numbers require --output")
+        for option, is_given in [
+            ("-r", parsed_args.periodicity_parameter is not None),
+            ("--refine-from", parsed_args.coarse_sampling_number is not None),
+            ("--checkpoint", parsed_args.checkpoint_file_name is not None)
+        ]:
+            if is_given:
+                arg_parser.error( "several sampling numbers cannot be used "
+                                  "with {}".format(option) )
+
+    if several_criteria:
+        if parsed_args.output_file_name is None:
+            arg_parser.error("several values of -z or -g require --output")
+        if parsed_args.block_size is None:
+            arg_parser.error("several values of -z or -g require a block size")
+        for option, is_given in [
+            ( "several sampling numbers",
+              len(parsed_args.sampling_numbers) > 1 ),
+            ("--refine-from", parsed_args.coarse_sampling_number is not None),
+            ("--verify", parsed_args.verification_precision is not None),
+            ("--checkpoint", parsed_args.checkpoint_file_name is not None),
+            ( "the solving method \"{}\"".format(parsed_args.solving_method),
+              parsed_args.solving_method != "eigvalsh" )
+        ]:
+            if is_given:
+                arg_parser.error( "several values of -z or -g cannot be used "
+                                  "with {}".format(option) )
+
+    if parsed_args.eigenvalues_file_name is not None:
+        if parsed_args.block_size is None:
+            arg_parser.error("--save-eigenvalues requires a block size")
+        for option, is_given in [
+            ("--jobs", parsed_args.jobs > 1),
+            ("--refine-from", parsed_args.coarse_sampling_number is not None),
+            ("--checkpoint", parsed_args.checkpoint_file_name is not None),
+            ( "the solving method \"{}\"".format(parsed_args.solving_method),
+              parsed_args.solving_method != "eigvalsh" )
+        ]:
+            if is_given:
+                arg_parser.error( "--save-eigenvalues cannot be used with {}"
+                                  .format(option) )
+
+    if parsed_args.coarse_sampling_number is not None:
+        if ( parsed_args.sampling_numbers[0] %
+             parsed_args.coarse_sampling_number ):
+            arg_parser.error( "the number given to --refine-from must "
+                              "divide the sampling number" )
+        if parsed_args.block_size is None:
+            arg_parser.error("--refine-from requires a block size")
+        for option, is_given in [
+            ("-r", parsed_args.periodicity_parameter is not None),
+            ("-c", parsed_args.caution),
+            ("--jobs", parsed_args.jobs > 1),
+            ("--canonical", parsed_args.canonical),
+            ("--checkpoint", parsed_args.checkpoint_file_name is not None),
+            ("--verify", parsed_args.verification_precision is not None),
+            ("--progress", parsed_args.progress_interval is not None),
+            ("--profile", parsed_args.profile_file_name is not None),
+            ("--shard", parsed_args.shard is not None),
+            ("--pipeline", parsed_args.pipeline_threads is not None)
+        ]:
+            if is_given:
+                arg_parser.error( "--refine-from cannot be used with {}"
+                                  .format(option) )
+
+    if parsed_args.shard is not None:
+        from .sweeping import lcm
+
+        if parsed_args.output_file_name is None:
+            arg_parser.error("--shard requires --output")
+        if parsed_args.shard[1] > lcm(*parsed_args.sampling_numbers):
+            arg_parser.error( "the number of shards must be at most the "
+                              "sampling number" )
+
+    if parsed_args.pipeline_threads is not None:
+        if parsed_args.block_size is None:
+            arg_parser.error("--pipeline requires a block size")
+        for option, is_given in [
+            ("--profile", parsed_args.profile_file_name is not None),
+            ( "the solving method \"continuation\"",
+              parsed_args.solving_method == "continuation" )
+        ]:
+            if is_given:
+                arg_parser.error( "--pipeline cannot be used with {}"
+                                  .format(option) )
+    elif parsed_args.pipeline_queue_depth is not None:
+        arg_parser.error("--pipeline-depth requires --pipeline")
+
+    if parsed_args.profile_file_name is not None and parsed_args.jobs > 1:
+        arg_parser.error("--profile cannot be used with --jobs")
+
+    if ( parsed_args.caution_interval != 1 or
+         parsed_args.caution_random_fraction != 0 ) and not (
+        parsed_args.caution and parsed_args.block_size is not None
+    ):
+        arg_parser.error( "--caution-interval and --caution-random require "
+                          "-c and a block size" )
+
+    if parsed_args.expand_conjugates and not parsed_args.canonical:
+        arg_parser.error("--expand-conjugates requires --canonical")
+
+    if ( parsed_args.sampling_method != "lambdify" and
+         parsed_args.block_size is None ):
+        arg_parser.error( "the sampling method \"{}\" requires a block size"
+                          .format(parsed_args.sampling_method) )
+
+    if ( parsed_args.solving_method != "eigvalsh" and
+         parsed_args.block_size is None ):
+        arg_parser.error( "the solving method \"{}\" requires a block size"
+                          .format(parsed_args.solving_method) )
+
+    if parsed_args.band_storage == "always":
+        if parsed_args.block_size is None:
+            arg_parser.error("the band storage requires a block size")
+        if parsed_args.solving_method == "ldl":
+            arg_parser.error( "the solving method \"{}\" does not support "
+                              "the band storage"
+                              .format(parsed_args.solving_method) )
+
+    return (arg_parser, parsed_args)
+
+
+def parse_compile_argv(argv):
+    arg_parser = ArgumentParser(
+        prog = "{} compile".format(argv[0]),
+        description = ( "Compile the input matrix for sampling it without "
+                        "parsing the expressions, which makes the startup "
+                        "faster.  The compiled file can be given instead of "
+                        "the input file." )
+    )
+    arg_parser.add_argument(
+        "input_file_name",
+        metavar = "filename",
+        help = "JSON input file name"
+    )
+    arg_parser.add_argument(
+        "-o", "--output",
+        dest = "output_file_name",
+        metavar = "filename",
+        help = ( "write the compiled matrix to this file instead of the "
+                 "standard output" )
+    )
+
+    return arg_parser.parse_args(argv[2:])
+
+
+def compile_main(argv):
+    parsed_args = parse_compile_argv(argv)
+
+    from .runner import go_compile
+
+    go_compile(parsed_args.input_file_name, parsed_args.output_file_name)
+
+    sys_exit(0)
+
+
+def parse_merge_argv(argv):
+    arg_parser = ArgumentParser(
+        prog = "{} merge".format(argv[0]),
+        description = ( "Merge the output files of all the shards of a run "
+                        "(see --shard) into one output file, checking that "
+                        "the shards have been run with the same parameters "
+                        "and input, and that none is missing." )
+    )
+    arg_parser.add_argument(
+        "file_names",
+        metavar = "filename",
+        nargs = "+",
+        help = "output file name of a shard, in any order"
+    )
+    arg_parser.add_argument(
+        "-o", "--output",
+        dest = "output_file_name",
+        metavar = "filename",
+        required = True,
+        help = "write the merged results to this file"
+    )
+
+    return (arg_parser, arg_parser.parse_args(argv[2:]))
+
+
+def merge_main(argv):
+    arg_parser, parsed_args = parse_merge_argv(argv)
+
+    from .merging import merge_shard_outputs
+
+    try:
+        merge_shard_outputs( parsed_args.file_names,
+                             parsed_args.output_file_name )
+    except (OSError, ValueError) as e:
+        arg_parser.exit(1, "{}: error: {}\n".format(arg_parser.prog, e))
+
+    sys_exit(0)
+
+
+def parse_decode_argv(argv):
+    arg_parser = ArgumentParser(
+        prog = "{} decode".format(argv[0]),
+        description = ( "Expand the runs or the regions of points written "
+                        "with the output format \"runs\" or \"regions\" "
+                        "to the text lines of the output format \"text\"." )
+    )
+    arg_parser.add_argument(
+        "file_name",
+        metavar = "filename",
+        help = "output file name of a run"
+    )
+    arg_parser.add_argument(
+        "-o", "--output",
+        dest = "output_file_name",
+        metavar = "filename",
+        help = ( "write the decoded results to this file instead of the "
+                 "standard output" )
+    )
+
+    return (arg_parser, arg_parser.parse_args(argv[2:]))
+
+
+def decode_main(argv):
+    arg_parser, parsed_args = parse_decode_argv(argv)
+
+    from .compressing import decode_run_length_output
+
+    try:
+        with open(parsed_args.file_name) as f:
+            if parsed_args.output_file_name is None:
+                stdout.writelines(decode_run_length_output(f))
+            else:
+                with open(parsed_args.output_file_name, "w") as output_dest:
+                    output_dest.writelines(decode_run_length_output(f))
+    except (OSError, ValueError, SyntaxError) as e:
+        arg_parser.exit(1, "{}: error: {}\n".format(arg_parser.prog, e))
+
+    sys_exit(0)
 
 
 def main(argv):
+    # NOTE:  The subcommands are dispatched on the first argument, so that an
+    #   input file cannot be named like a subcommand (but "./compile" is
+    #   fine).
+    if len(argv) > 1 and argv[1] == "compile":
+        compile_main(argv)
+    if len(argv) > 1 and argv[1] == "merge":
+        merge_main(argv)
+    if len(argv) > 1 and argv[1] == "decode":
+        decode_main(argv)
+
     # NOTE:  If parsing arguments fails or if the program is run with `-h`
     #   switch to just get the help message, the rest of the function will
     #   not be executed.  Parsing arguments before importing and defining
     #   everything thus saves time if the user runs the program with `-h`
     #   flag or if the user makes a mistake in command line arguments.
-    parsed_args = parse_argv(argv)
+    arg_parser, parsed_args = parse_argv(argv)
 
     # NOTE:  Putting imports here seems to be against Style Guide for
     #   Python Code (PEP 8).  However, having imports in the body of
     #   `main` function looks more justifiable than in the bodies of
     #   other functions.
-    from .runner import go
+    from .caching import default_cache_dir
+    from .runner import go, go_from_eigenvalues, input_indeterminate_count
+
+    if len(parsed_args.zero_thresholds) == 1:
+        criteria_options = {}
+    else:
+        criteria_options = dict(
+            eigenvalue_zero_thresholds = parsed_args.zero_thresholds
+        )
+    if len(parsed_args.signature_parameters) > 1:
+        criteria_options.update(
+            interesting_signature_parameters =
+                parsed_args.signature_parameters
+        )
 
-    go( parsed_args.input_file_name,
-        parsed_args.sampling_number,
-        parsed_args.zero_threshold,
-        parsed_args.signature_parameter,
-        parsed_args.periodicity_parameter,
-        parsed_args.caution )
+    if parsed_args.from_eigenvalues:
+        go_from_eigenvalues( parsed_args.input_file_name,
+                             parsed_args.zero_thresholds[0],
+                             parsed_args.signature_parameters[0],
+                             parsed_args.block_size or 4096,
+                             output_file_name = parsed_args.output_file_name,
+                             output_format = parsed_args.output_format,
+                             **criteria_options )
+        sys_exit(0)
+
+    if parsed_args.pipeline_queue_depth is None:
+        pipeline_options = {}
+    else:
+        pipeline_options = dict(
+            pipeline_queue_depth = parsed_args.pipeline_queue_depth
+        )
+
+    if not parsed_args.cache:
+        cache_dir = None
+    elif parsed_args.cache_dir is not None:
+        cache_dir = parsed_args.cache_dir
+    else:
+        cache_dir = default_cache_dir()
+
+    if len(parsed_args.sampling_numbers) == 1:
+        sampling_number = parsed_args.sampling_numbers[0]
+        processing_options = dict(criteria_options)
+    else:
+        from .sweeping import lcm
+
+        sampling_number = lcm(*parsed_args.sampling_numbers)
+        processing_options = dict(
+            criteria_options,
+            sampling_numbers = parsed_args.sampling_numbers
+        )
+
+    try:
+        # NOTE:  This is checked before running, since it requires reading
+        #   the input.
+        if ( parsed_args.output_format == "regions" and
+             input_indeterminate_count(parsed_args.input_file_name) != 2 ):
+            arg_parser.error( "the output format \"regions\" requires 2 "
+                              "indeterminates" )
+
+        go( parsed_args.input_file_name,
+            sampling_number,
+            parsed_args.zero_thresholds[0],
+            parsed_args.signature_parameters[0],
+            parsed_args.periodicity_parameter,
+            parsed_args.caution,
+            parsed_args.block_size,
+            parsed_args.jobs,
+            canonical = parsed_args.canonical,
+            coarse_sampling_number = parsed_args.coarse_sampling_number,
+            output_file_name = parsed_args.output_file_name,
+            output_format = parsed_args.output_format,
+            checkpoint_file_name = parsed_args.checkpoint_file_name,
+            checkpoint_interval = parsed_args.checkpoint_interval,
+            resume = parsed_args.resume,
+            cache_dir = cache_dir,
+            verification_jobs = parsed_args.verification_jobs,
+            eigenvalues_file_name = parsed_args.eigenvalues_file_name,
+            progress_interval = parsed_args.progress_interval,
+            progress_file_name = parsed_args.progress_file_name,
+            profile_file_name = parsed_args.profile_file_name,
+            shard = parsed_args.shard,
+            pipeline_threads = parsed_args.pipeline_threads,
+            caution_interval = parsed_args.caution_interval,
+            caution_random_fraction = parsed_args.caution_random_fraction,
+            **pipeline_options,
+            verification_precision = parsed_args.verification_precision,
+            expand_conjugates = parsed_args.expand_conjugates,
+            sampling_method = parsed_args.sampling_method,
+            solving_method = parsed_args.solving_method,
+            band_storage = parsed_args.band_storage,
+            **processing_options )
+    except (OSError, ValueError) as e:
+        # NOTE:  This reports the errors of the input and of the checkpoint
+        #   to resume from (for example, a missing checkpoint file or one
+        #   saved with different parameters).
+        arg_parser.exit(1, "{}: error: {}\n".format(arg_parser.prog, e))
 
     # NOTE:  Apparently according to current practices, `main` function
     #   is expected to return the exit status (with `return`, instead of
@@ -132,8 +902,96 @@ if __name__ == "__main__":
     from ._basic_testing_tools import run_and_time
 
     def _basic_tests():
-        # TODO: implement
-        assert False
+        import numpy as nmp
+        from json import dump as dump_json
+        from json import load as load_json
+        from os.path import abspath, dirname, join
+        from subprocess import run
+        from sys import executable
+        from tempfile import TemporaryDirectory
+        from .runner import parse_input_data
+        from .sampling import ( make_batch_matrix_sampler,
+                                make_compiled_batch_matrix_sampler,
+                                make_compiled_matrix_sampler,
+                                make_compiled_tensor_batch_matrix_sampler,
+                                make_matrix_sampler,
+                                make_tensor_batch_matrix_sampler )
+
+        data = { "indeterminates": "s t",
+                 "matrix": [ ["-1 - s - t - s*t/3", "s + s*t", "0"],
+                             ["1 + t", "2", "s + sqrt(t)"],
+                             ["0", "1 + t", "-1 - s - t - s*t"] ] }
+        indeterminates, e_mat = parse_input_data(data)
+        steps = 6
+        inds_block = nmp.array([(1, 1), (3, -2), (6, 6), (2, -5)])
+
+        with TemporaryDirectory() as dir_name:
+            input_file_name = join(dir_name, "input.json")
+            with open(input_file_name, "w") as f:
+                dump_json(data, f)
+            compiled_file_name = join(dir_name, "compiled.json")
+            try:
+                main(["sig", "compile", input_file_name,
+                      "-o", compiled_file_name])
+            except SystemExit as e:
+                assert e.code == 0
+            else:
+                assert False
+            with open(compiled_file_name) as f:
+                compiled_matrix = load_json(f)
+
+            # The compiled file gives the same samples as the input file
+            matrix_sampler = make_matrix_sampler( e_mat,
+                                                  indeterminates,
+                                                  steps )
+            compiled_matrix_sampler = make_compiled_matrix_sampler(
+                compiled_matrix,
+                steps
+            )
+            for inds in inds_block.tolist():
+                assert nmp.array_equal( compiled_matrix_sampler(tuple(inds)),
+                                        matrix_sampler(tuple(inds)) )
+            assert nmp.array_equal(
+                make_compiled_batch_matrix_sampler( compiled_matrix,
+                                                    steps )(inds_block),
+                make_batch_matrix_sampler( e_mat,
+                                           indeterminates,
+                                           steps )(inds_block)
+            )
+            assert nmp.array_equal(
+                make_compiled_tensor_batch_matrix_sampler(
+                    compiled_matrix,
+                    steps
+                )(inds_block),
+                make_tensor_batch_matrix_sampler( e_mat,
+                                                  indeterminates,
+                                                  steps )(inds_block)
+            )
+
+            # A run from the compiled file does not import SymPy and writes
+            # the same output as a run from the input file
+            outputs = []
+            for file_name in [input_file_name, compiled_file_name]:
+                completed_process = run(
+                    [ executable,
+                      "-c",
+                      "import sys\n"
+                      "from sig.cli import main\n"
+                      "try:\n"
+                      "    main(sys.argv)\n"
+                      "finally:\n"
+                      "    assert ( sys.argv[1] != {!r} or\n"
+                      "             'sympy' not in sys.modules )\n"
+                      .format(compiled_file_name),
+                      file_name, "-s", str(steps), "-b", "7", "--no-cache" ],
+                    cwd = dirname(dirname(abspath(__file__))),
+                    capture_output = True,
+                    text = True
+                )
+                assert completed_process.returncode == 0
+                outputs.append(completed_process.stdout)
+            assert outputs[0]
+            assert outputs[1] == outputs[0]
 
     t = run_and_time(_basic_tests)
     print("The module passed basic tests in {:.3g}s.".format(t))
@@ -0,0 +1,235 @@
+# XXX:  In spite of Style Guide for Python Code (PEP 8), not all imports in
+#   this file are at the beginning: SymPy is only imported by the functions
+#   that need it, so that compiled matrices can be used without importing
+#   it, and so is mpmath.
+import numpy as nmp
+
+# NOTE:  A "compiled matrix" is a JSON-serializable representation of the
+#   input matrix that is enough for sampling it without SymPy: a dictionary
+#   with the names of the indeterminates, the size and the bandwidth of the
+#   matrix (or `None` if it has not been computed), and the list of the
+#   nonzero entries, every one of which is a dictionary with the row and
+#   column numbers, the Python source code of the entry evaluated with NumPy
+#   and with mpmath, and optionally the coefficients of the entry as a
+#   Laurent polynomial.
+
+# The version of the format of compiled matrices
+COMPILED_MATRIX_VERSION = 1
+
+
+def laurent_coefficients(e, indeterminates):
+    """
+    Expand the expression `e` as a Laurent polynomial in `indeterminates`
+    with complex coefficients.  Return the pair of an integer array of shape
+    (m, n) whose rows are the exponents of the monomials and a complex array
+    of shape (m,) of the corresponding coefficients, or `None` if `e` is not
+    a Laurent polynomial in `indeterminates`.
+    """
+    from sympy import Add, Mul, expand
+
+    positions = {x: j for j, x in enumerate(indeterminates)}
+    coefficients = {}
+
+    for term in Add.make_args(expand(e)):
+        c = 1
+        exponents = [0]*len(indeterminates)
+
+        for factor in Mul.make_args(term):
+            if factor.is_number:
+                c *= complex(factor)
+                continue
+
+            base, exponent = factor.as_base_exp()
+            if base not in positions or not exponent.is_Integer:
+                return None
+            exponents[positions[base]] += int(exponent)
+
+        exponents = tuple(exponents)
+        coefficients[exponents] = coefficients.get(exponents, 0) + c
+
+    return ( nmp.array( list(coefficients.keys()),
+                        dtype = int ).reshape(-1, len(indeterminates)),
+             nmp.array(list(coefficients.values()), dtype=complex) )
+
+
+def matrix_bandwidth(e_mat):
+    """
+    Return the bandwidth of the square matrix of SymPy expressions `e_mat`:
+    the maximal |j - l| such that the (j, l) entry is not proved by SymPy to
+    be zero.
+    """
+    from sympy import expand
+
+    return max( ( abs(j - l)
+                  for j, row in enumerate(e_mat)
+                  for l, e in enumerate(row)
+                  if not (e.is_zero or expand(e).is_zero) ),
+                default = 0 )
+
+
+def compile_matrix( e_mat, indeterminates,
+                    with_laurent_coefficients = True,
+                    with_bandwidth = True ):
+    """
+    Compile the square matrix of SymPy expressions `e_mat` in
+    `indeterminates`.  If `with_laurent_coefficients` is true, also compute
+    the Laurent polynomial coefficients of the entries (see
+    `laurent_coefficients`), which are needed for the FFT sampling, as the
+    pairs of the lists of exponents and of the pairs of the real and the
+    imaginary parts of the coefficients (or `None`).  If `with_bandwidth`
+    is false, the bandwidth (see `matrix_bandwidth`), which is only needed
+    for the band storage, is not computed and is `None`.
+    """
+    from sympy.printing.numpy import NumPyPrinter
+    from sympy.printing.pycode import MpmathPrinter
+
+    numpy_printer = NumPyPrinter()
+    mpmath_printer = MpmathPrinter()
+
+    entries = []
+    for j, row in enumerate(e_mat):
+        for l, e in enumerate(row):
+            # Zero entries are skipped altogether
+            if not e:
+                continue
+
+            entry = { "row": j,
+                      "column": l,
+                      "numpy": numpy_printer.doprint(e),
+                      "mpmath": mpmath_printer.doprint(e) }
+
+            if with_laurent_coefficients:
+                coeffs = laurent_coefficients(e, indeterminates)
+                if coeffs is not None:
+                    exponents, coefficients = coeffs
+                    coeffs = ( exponents.tolist(),
+                               nmp.stack( (coefficients.real,
+                                           coefficients.imag),
+                                          axis = 1 ).tolist() )
+                entry["laurent"] = coeffs
+
+            entries.append(entry)
+
+    return { "version": COMPILED_MATRIX_VERSION,
+             "indeterminates": [str(x) for x in indeterminates],
+             "size": len(e_mat),
+             "bandwidth": ( matrix_bandwidth(e_mat) if with_bandwidth
+                            else None ),
+             "entries": entries }
+
+
+def entry_functions(compiled_matrix, modules="numpy"):
+    """
+    Return the list of the triples `(j, l, f)` for the nonzero (j, l)
+    entries of the compiled matrix, where `f` is the function of the values
+    of the indeterminates that evaluates the entry with `modules`, either
+    "numpy" or "mpmath".
+    """
+    if modules == "numpy":
+        namespace = {"numpy": nmp}
+    else:
+        import mpmath
+        namespace = {"mpmath": mpmath}
+
+    arguments = ", ".join(compiled_matrix["indeterminates"])
+
+    return [ ( entry["row"],
+               entry["column"],
+               eval( "lambda {}: ({})".format(arguments, entry[modules]),
+                     dict(namespace) ) )
+             for entry in compiled_matrix["entries"] ]
+
+
+def entry_laurent_coefficients(compiled_matrix):
+    """
+    Return the list of the triples `(j, l, coeffs)` for the nonzero (j, l)
+    entries of the compiled matrix, where `coeffs` is as returned by
+    `laurent_coefficients`.  The matrix must have been compiled with the
+    Laurent polynomial coefficients.
+    """
+    n = len(compiled_matrix["indeterminates"])
+    result = []
+
+    for entry in compiled_matrix["entries"]:
+        if "laurent" not in entry:
+            raise ValueError( "the matrix has been compiled without the "
+                              "Laurent polynomial coefficients" )
+
+        coeffs = entry["laurent"]
+        if coeffs is not None:
+            exponents, coefficients = coeffs
+            coefficients = nmp.array(coefficients, dtype=float).reshape(-1, 2)
+            coeffs = ( nmp.array(exponents, dtype=int).reshape(-1, n),
+                       coefficients[:, 0] + 1j*coefficients[:, 1] )
+
+        result.append((entry["row"], entry["column"], coeffs))
+
+    return result
+
+
+# *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
+# --------------------------------------------------------------------------
+# ## Basic testing
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    from ._basic_testing_tools import run_and_time
+
+    def _basic_tests():
+        from json import dumps as dumps_json, loads as loads_json
+        from sympy import symbols, sympify
+        indeterminates = symbols("s t")
+        e_mat = [ [sympify(e) for e in row]
+                  for row in [ ["-1 - s - t - s*t/3", "s + s*t", "0"],
+                               ["1 + t", "2", "s + sqrt(t)"],
+                               ["0", "1 + t", "-1 - s - t - s*t"] ] ]
+        assert matrix_bandwidth(e_mat) == 1
+        exponents, coefficients = laurent_coefficients(
+            sympify("2*s/t - I*t**2 + 3*s/t"),
+            indeterminates
+        )
+        assert ( sorted(zip(map(tuple, exponents.tolist()), coefficients)) ==
+                 [((0, 2), -1j), ((1, -1), 5)] )
+        assert laurent_coefficients(e_mat[1][2], indeterminates) is None
+        compiled_matrix = loads_json(dumps_json(
+            compile_matrix(e_mat, indeterminates)
+        ))
+        assert compiled_matrix["size"] == 3
+        assert compiled_matrix["bandwidth"] == 1
+        vals = (0.5 + 0.25j, 2.0 - 1j)
+        for j, l, f in entry_functions(compiled_matrix):
+            assert nmp.isclose( f(*vals),
+                                complex(e_mat[j][l].subs(
+                                    dict(zip(indeterminates, vals))
+                                )) )
+        for (j, l, f), (_, _, g) in zip(
+            entry_functions(compiled_matrix),
+            entry_functions(compiled_matrix, "mpmath")
+        ):
+            assert nmp.isclose(f(*vals), complex(g(*vals)))
+        laurent_entries = entry_laurent_coefficients(compiled_matrix)
+        assert len(laurent_entries) == 7
+        for j, l, coeffs in laurent_entries:
+            if (j, l) == (1, 2):
+                assert coeffs is None
+                continue
+            exponents, coefficients = coeffs
+            assert nmp.isclose(
+                sum( c*vals[0]**m*vals[1]**n
+                     for (m, n), c in zip(exponents, coefficients) ),
+                complex(e_mat[j][l].subs(dict(zip(indeterminates, vals))))
+            )
+        try:
+            entry_laurent_coefficients(
+                compile_matrix( e_mat,
+                                indeterminates,
+                                with_laurent_coefficients = False )
+            )
+        except ValueError:
+            pass
+        else:
+            assert False
+
+    t = run_and_time(_basic_tests)
+    print("The module passed basic tests in {:.3g}s.".format(t))
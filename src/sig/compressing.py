@@ -0,0 +1,338 @@
+from ast import literal_eval
+from math import sqrt
+from sys import stdout
+
+
+def _is_suspicious(min_nonzero_val, eigenvalue_zero_suspicion_threshold):
+    """
+    Tell if the minimal by absolute value non-zero eigenvalue is suspicious
+    (see `make_eigenvalues_analyser`).  It is `None` or NaN if unknown or if
+    there are no non-zero eigenvalues.
+    """
+    return ( min_nonzero_val is not None and
+             abs(min_nonzero_val) <= eigenvalue_zero_suspicion_threshold )
+
+
+def _print_result(inds, signature, verified, output_dest):
+    if verified:
+        print(inds, ":", signature, "verified", file=output_dest)
+    else:
+        print(inds, ":", signature, file=output_dest)
+
+
+def _print_run(run, output_dest):
+    prefix, start, end, signature = run
+    if start == end:
+        print(prefix + (start,), ":", signature, file=output_dest)
+    else:
+        print( prefix + (start,), "-", prefix + (end,), ":", signature,
+               file = output_dest )
+
+
+def _find_regions(runs, steps):
+    """
+    Group the runs (see `make_run_length_result_writer`) of a 2-dimensional
+    grid with `steps` steps into the connected regions of points with the
+    same signature.  Two points are neighbours if their first indices are
+    consecutive and their second indices are the same, or if their first
+    indices are the same and their second indices are consecutive in the
+    sequence 1, ..., steps, -steps + 1, ..., -1.  Return the list of the
+    lists of the runs of the regions, in the order of their first runs.
+    """
+    parents = list(range(len(runs)))
+
+    def find(j):
+        while parents[j] != j:
+            parents[j] = parents[parents[j]]
+            j = parents[j]
+        return j
+
+    def join(j, l):
+        j, l = find(j), find(l)
+        if j != l:
+            parents[max(j, l)] = min(j, l)
+
+    def position(i):
+        return i if i > 0 else i + 2*steps
+
+    # The lists of the positions of the runs in `runs` by the first index
+    rows = {}
+    for j, ((i1,), _, _, _) in enumerate(runs):
+        rows.setdefault(i1, []).append(j)
+
+    for i1, row in rows.items():
+        # NOTE:  The runs of a row are in the order of the positions of the
+        #   second index, and only the runs ending at `steps` can be
+        #   followed by a neighbouring run with the same signature.
+        for j, l in zip(row, row[1:]):
+            _, _, end, signature = runs[j]
+            _, start, _, other_signature = runs[l]
+            if ( signature == other_signature and
+                 position(start) == position(end) + 1 ):
+                join(j, l)
+
+        next_row = rows.get(i1 + 1)
+        if next_row is None:
+            continue
+        # Find the overlapping runs of the two rows by merging them
+        j = l = 0
+        while j < len(row) and l < len(next_row):
+            _, start, end, signature = runs[row[j]]
+            _, other_start, other_end, other_signature = runs[next_row[l]]
+            if ( signature == other_signature and
+                 max(position(start), position(other_start)) <=
+                 min(position(end), position(other_end)) ):
+                join(row[j], next_row[l])
+            if position(end) < position(other_end):
+                j += 1
+            else:
+                l += 1
+
+    regions = {}
+    for j, run in enumerate(runs):
+        regions.setdefault(find(j), []).append(run)
+
+    return list(regions.values())
+
+
+def make_run_length_result_writer( signature_is_interesting,
+                                   eigenvalue_zero_threshold,
+                                   output_dest = stdout,
+                                   index_expander = None,
+                                   region_steps = None ):
+    """
+    Make a result writer (see `make_result_writer`) that writes the
+    interesting results to `output_dest` as text lines, compressing the
+    runs of points with the same first n-1 indices, consecutive last
+    indices and the same signature into lines like
+
+        (1, 2) - (1, 7) : (3, 0, 0)
+
+    A run does not go over from the last index `steps` to `-steps + 1`.
+    The points with suspicious eigenvalues (see `make_eigenvalues_analyser`,
+    this requires the minimal by absolute value non-zero eigenvalues in the
+    results) and the verified points are written on separate lines as by
+    `make_result_writer`, and so are the runs of one point.  Return the
+    pair of the result writer and of a function that writes out the last
+    run, to be called after all the results have been written.
+    If `region_steps` is given (the number of steps of a 2-dimensional
+    grid), the runs are grouped into connected regions of points with the
+    same signature instead (see `_find_regions`), and everything is written
+    out only by the second function: every region as a comment line
+
+        # region (3, 0, 0) : 15 points
+
+    followed by the lines of its runs, and then the separate points.  The
+    per-point listing can be recovered with `decode_run_length_output`.
+    """
+    eigenvalue_zero_suspicion_threshold = sqrt(eigenvalue_zero_threshold)
+
+    # The run being extended, as the quadruple of the first n-1 indices,
+    # the first and the last values of the last index, and the signature
+    run = None
+    runs = []
+    separate_results = []
+
+    def end_run():
+        nonlocal run
+        if run is not None:
+            if region_steps is None:
+                _print_run(run, output_dest)
+            else:
+                runs.append(run)
+            run = None
+
+    def write_result(inds, signature, min_nonzero_val, verified):
+        nonlocal run
+        if verified or _is_suspicious( min_nonzero_val,
+                                       eigenvalue_zero_suspicion_threshold ):
+            end_run()
+            if region_steps is None:
+                _print_result(inds, signature, verified, output_dest)
+            else:
+                separate_results.append((inds, signature, verified))
+            return
+
+        prefix = inds[:-1]
+        if ( run is not None and
+             run[0] == prefix and
+             run[2] + 1 == inds[-1] and
+             run[3] == signature ):
+            run = (prefix, run[1], inds[-1], signature)
+        else:
+            end_run()
+            run = (prefix, inds[-1], inds[-1], signature)
+
+    def write_results(results):
+        for inds, signature, min_nonzero_val, verified in results:
+            signature = tuple(signature)
+            if signature_is_interesting(signature):
+                inds = tuple(inds)
+                write_result(inds, signature, min_nonzero_val, verified)
+                if index_expander is not None:
+                    for other_inds in index_expander(inds):
+                        write_result( other_inds,
+                                      signature,
+                                      min_nonzero_val,
+                                      verified )
+
+    def flush_results():
+        end_run()
+        if region_steps is not None:
+            for region in _find_regions(runs, region_steps):
+                point_count = sum( end - start + 1
+                                   for _, start, end, _ in region )
+                print( "# region", region[0][3], ":", point_count,
+                       "point" if point_count == 1 else "points",
+                       file = output_dest )
+                for region_run in region:
+                    _print_run(region_run, output_dest)
+            for inds, signature, verified in separate_results:
+                _print_result(inds, signature, verified, output_dest)
+            runs.clear()
+            separate_results.clear()
+
+    return (write_results, flush_results)
+
+
+def _parse_inds(s):
+    inds = literal_eval(s)
+    if ( not isinstance(inds, tuple) or not inds or
+         not all(isinstance(i, int) for i in inds) ):
+        raise ValueError("invalid n-uple of indices: {!r}".format(s))
+    return inds
+
+
+def _index_order_key(inds):
+    """
+    Return the key of the n-uple of indices for sorting the n-uples in the
+    order in which they are sampled (see `make_sample_index_iterator_maker`).
+    """
+    return tuple((i < 0, i) for i in inds)
+
+
+def decode_run_length_output(lines):
+    """
+    Iterate over the text lines (with the line breaks) of the per-point
+    listing of the results (see `make_result_writer`) encoded in the lines
+    `lines` written by a writer made by `make_run_length_result_writer`.
+    If the lines start with a region, the per-point lines are sorted in the
+    order of the sample points, which requires keeping all of them in
+    memory; otherwise they are produced in the order of the input lines.
+    Raise `ValueError` if a line is malformed.
+    """
+    def decode():
+        for line in lines:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            if line.startswith("#"):
+                yield (None, None)
+                continue
+
+            inds_part, separator, result_part = line.partition(" : ")
+            if not separator:
+                raise ValueError("invalid line: {!r}".format(line))
+
+            first_inds_part, separator, last_inds_part = (
+                inds_part.partition(" - ")
+            )
+            if not separator:
+                yield (_parse_inds(inds_part), line + "\n")
+                continue
+
+            first_inds = _parse_inds(first_inds_part)
+            last_inds = _parse_inds(last_inds_part)
+            if ( len(first_inds) != len(last_inds) or
+                 first_inds[:-1] != last_inds[:-1] or
+                 first_inds[-1] >= last_inds[-1] ):
+                raise ValueError("invalid run: {!r}".format(line))
+
+            prefix = first_inds[:-1]
+            for i in range(first_inds[-1], last_inds[-1] + 1):
+                yield ( prefix + (i,),
+                        "{} : {}\n".format(prefix + (i,), result_part) )
+
+    decoded_lines = decode()
+    for inds, line in decoded_lines:
+        if inds is not None:
+            yield line
+            yield from ( line for inds, line in decoded_lines
+                         if inds is not None )
+            return
+
+        # NOTE:  The regions are not in the order of the sample points.
+        sorted_lines = sorted( ( (inds, line) for inds, line in decoded_lines
+                                 if inds is not None ),
+                               key = lambda item: _index_order_key(item[0]) )
+        yield from (line for _, line in sorted_lines)
+        return
+
+
+# *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
+# --------------------------------------------------------------------------
+# ## Basic testing
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    from ._basic_testing_tools import run_and_time
+
+    def _basic_tests():
+        from io import StringIO
+        from .analysing import ( make_interesting_signature_detector,
+                                 make_result_writer )
+
+        signature_is_interesting = make_interesting_signature_detector(None)
+        steps = 4
+        results = []
+        for i1 in range(1, steps + 1):
+            for i2 in [*range(1, steps + 1), *range(-steps + 1, 0)]:
+                signature = (2, 1, 0) if i2 < 3 and i1 != 2 else (1, 2, 0)
+                if (i1, i2) in [(1, 3), (2, -2)]:
+                    min_nonzero_val = 1e-8
+                else:
+                    min_nonzero_val = 0.5
+                verified = (i1, i2) == (4, 1)
+                results.append( ((i1, i2), signature, min_nonzero_val,
+                                 verified) )
+
+        dest = StringIO()
+        make_result_writer(signature_is_interesting, dest)(results)
+        expected_text = dest.getvalue()
+
+        for region_steps in [None, steps]:
+            dest = StringIO()
+            write_results, flush_results = make_run_length_result_writer(
+                signature_is_interesting,
+                1e-12,
+                dest,
+                region_steps = region_steps
+            )
+            write_results(results[:5])
+            write_results(results[5:])
+            flush_results()
+            text = dest.getvalue()
+            assert ( "".join(decode_run_length_output(StringIO(text))) ==
+                     expected_text )
+            if region_steps is None:
+                assert len(text) < len(expected_text)
+                assert "(3, 1) - (3, 2) : (2, 1, 0)\n" in text
+                assert "(1, 3) : (1, 2, 0)\n" in text
+                assert "(4, 1) : (2, 1, 0) verified\n" in text
+
+        region_lines = [ line for line in text.splitlines()
+                         if line.startswith("# region") ]
+        assert "# region (1, 2, 0) : 10 points" in region_lines
+        assert "# region (1, 2, 0) : 1 point" in region_lines
+        assert len(region_lines) == 6
+
+        try:
+            list(decode_run_length_output(["(1, 5) - (1, 2) : (1, 0, 0)"]))
+        except ValueError:
+            pass
+        else:
+            assert False
+
+    t = run_and_time(_basic_tests)
+    print("The module passed basic tests in {:.3g}s.".format(t))
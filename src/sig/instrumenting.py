@@ -0,0 +1,200 @@
+import logging
+from json import dumps as dumps_json
+from sys import stderr
+from time import perf_counter, process_time
+
+# The logger of the progress records
+progress_logger = logging.getLogger("sig.progress")
+
+
+class _JSONLinesFormatter(logging.Formatter):
+    """
+    Format the progress records (see `make_progress_reporter`) as lines of
+    JSON.
+    """
+    def format(self, record):
+        return dumps_json(getattr(record, "progress", record.getMessage()))
+
+
+def add_progress_handler(file_name=None):
+    """
+    Make the progress records (see `make_progress_reporter`) be logged as
+    text lines to `stderr`, or as lines of JSON to the file `file_name` if
+    it is given.  Return the handler, which is to be removed with
+    `remove_progress_handler`.
+    """
+    if file_name is None:
+        handler = logging.StreamHandler(stderr)
+    else:
+        handler = logging.FileHandler(file_name, mode="a")
+        handler.setFormatter(_JSONLinesFormatter())
+
+    progress_logger.addHandler(handler)
+    progress_logger.setLevel(logging.INFO)
+    progress_logger.propagate = False
+
+    return handler
+
+
+def remove_progress_handler(handler):
+    progress_logger.removeHandler(handler)
+    handler.close()
+
+
+def make_stage_instrumenter(profiler=None):
+    """
+    Make a function `instrument(stage, f)` that returns a function doing the
+    same as `f` and adding up the wall clock and the processor times spent
+    in it and the number of calls by the name of the stage, and the function
+    returning the dictionary of these totals (as dictionaries with the keys
+    "wall_seconds", "cpu_seconds" and "calls") by the stage names.
+    If `profiler` is given (a `cProfile.Profile`, or anything with `enable`
+    and `disable` methods, like a sampling profiler), it is enabled only
+    during the calls of the instrumented functions.
+    """
+    stage_totals = {}
+
+    def instrument(stage, f):
+        totals = stage_totals.setdefault(stage, [0.0, 0.0, 0])
+
+        def instrumented_f(*args, **kwargs):
+            wall_start_time = perf_counter()
+            cpu_start_time = process_time()
+            if profiler is not None:
+                profiler.enable()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                totals[0] += perf_counter() - wall_start_time
+                totals[1] += process_time() - cpu_start_time
+                totals[2] += 1
+
+        return instrumented_f
+
+    def get_stage_totals():
+        return { stage: dict( wall_seconds = wall_time,
+                              cpu_seconds = cpu_time,
+                              calls = calls )
+                 for stage, (wall_time, cpu_time, calls)
+                 in stage_totals.items() }
+
+    return (instrument, get_stage_totals)
+
+
+def make_progress_reporter( total_count = None,
+                            interval = 10,
+                            get_stage_totals = None,
+                            logger = progress_logger ):
+    """
+    Make a function `progress_reporter(point_count, suspicious_count,
+    timing, final=False)` to be called by the processing functions (see
+    `process_data`) with the numbers of the sample points processed so far
+    and of those with suspicious eigenvalues (or `None` if unknown), and the
+    timing counters so far.  It logs a progress record with `logger` at most
+    every `interval` seconds (of wall clock time), and when `final` is true.
+
+    The record is a dictionary with the numbers of points processed, of all
+    the points (`total_count`, if known) and of the suspicious points, the
+    elapsed wall clock time, the number of points per second, the estimated
+    remaining time (if the total is known), the processor times of the
+    stages (the timing counters), and the totals by the stages of the
+    instrumented functions (see `make_stage_instrumenter`) if
+    `get_stage_totals` is given.  It is passed to the logger as the
+    attribute `progress` of the log record.
+    """
+    start_time = perf_counter()
+    next_report_time = start_time + interval
+
+    def progress_reporter( point_count,
+                           suspicious_count,
+                           timing,
+                           final = False ):
+        nonlocal next_report_time
+
+        now = perf_counter()
+        if now < next_report_time and not final:
+            return
+        next_report_time = now + interval
+
+        elapsed_time = now - start_time
+        if elapsed_time > 0:
+            rate = point_count/elapsed_time
+        else:
+            rate = None
+
+        if total_count is None or not rate:
+            remaining_time = None
+        else:
+            remaining_time = (total_count - point_count)/rate
+
+        record = dict(
+            points = point_count,
+            total_points = total_count,
+            suspicious_points = suspicious_count,
+            elapsed_seconds = elapsed_time,
+            points_per_second = rate,
+            remaining_seconds = remaining_time,
+            cpu_seconds = dict(zip( [ "main_loop",
+                                      "computing_matrices",
+                                      "computing_eigenvalues",
+                                      "analysing_eigenvalues" ],
+                                    timing )),
+            final = final
+        )
+        if get_stage_totals is not None:
+            record["stages"] = get_stage_totals()
+
+        logger.info( "%s of %s points done in %.3gs (%.3g points/s), "
+                     "%s suspicious, %s remaining",
+                     point_count,
+                     "?" if total_count is None else total_count,
+                     elapsed_time,
+                     rate or 0,
+                     "?" if suspicious_count is None else suspicious_count,
+                     ( "?" if remaining_time is None
+                       else "{:.3g}s".format(remaining_time) ),
+                     extra = dict(progress=record) )
+
+    return progress_reporter
+
+
+# *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
+# --------------------------------------------------------------------------
+# ## Basic testing
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    from ._basic_testing_tools import run_and_time
+
+    def _basic_tests():
+        from json import loads as loads_json
+        from os import remove
+        from tempfile import mkstemp
+        _, file_name = mkstemp()
+        handler = add_progress_handler(file_name)
+        instrument, get_stage_totals = make_stage_instrumenter()
+        square = instrument("squaring", lambda x: x*x)
+        report_progress = make_progress_reporter(
+            10,
+            interval = 3600,
+            get_stage_totals = get_stage_totals
+        )
+        for j in range(1, 6):
+            assert square(j) == j*j
+            report_progress(j, 0, (0, 0, 0, 0))
+        report_progress(5, 1, (1, 0.5, 0.25, 0.125), final=True)
+        remove_progress_handler(handler)
+        with open(file_name) as f:
+            records = [loads_json(line) for line in f]
+        remove(file_name)
+        assert len(records) == 1
+        assert records[0]["points"] == 5
+        assert records[0]["suspicious_points"] == 1
+        assert records[0]["cpu_seconds"]["computing_eigenvalues"] == 0.25
+        assert records[0]["stages"]["squaring"]["calls"] == 5
+
+    t = run_and_time(_basic_tests)
+    print("The module passed basic tests in {:.3g}s.".format(t))
@@ -0,0 +1,139 @@
+import numpy as nmp
+from shutil import copyfileobj
+
+from .storing import ( close_result_file,
+                       load_metadata,
+                       load_results,
+                       open_result_file,
+                       write_metadata )
+
+
+def _common_parameters(metadata):
+    """
+    Return the parameters of a shard run (see `go`) that must be the same
+    for all the shards.
+    """
+    return { name: value for name, value in metadata.items()
+             if name not in ("shard", "complete", "dtype") }
+
+
+def merge_shard_outputs(file_names, output_file_name):
+    """
+    Merge the output files of all the N shards of a run (see `go`) into one
+    output file with the results in the usual order, as if the run was not
+    sharded.  The files can be given in any order.
+
+    Raise `ValueError` if a file is not the output of a shard, if the
+    shards have been run with different parameters or input, or if some
+    shards are missing, repeated, or have not been completed.
+    """
+    shard_file_names = {}
+    common_parameters = None
+
+    for file_name in file_names:
+        metadata = load_metadata(file_name)
+        if "shard" not in metadata:
+            raise ValueError( "'{}' is not the output of a shard"
+                              .format(file_name) )
+        shard_index, shard_count = metadata["shard"]
+
+        if common_parameters is None:
+            common_parameters = _common_parameters(metadata)
+            first_file_name = file_name
+            first_shard_count = shard_count
+        elif ( _common_parameters(metadata) != common_parameters or
+               shard_count != first_shard_count ):
+            raise ValueError( "'{}' has been produced with different "
+                              "parameters or input than '{}'"
+                              .format(file_name, first_file_name) )
+
+        if shard_index in shard_file_names:
+            raise ValueError( "'{}' and '{}' are outputs of the same shard"
+                              .format( shard_file_names[shard_index],
+                                       file_name ) )
+        if not metadata.get("complete"):
+            raise ValueError( "the shard {} of {} in '{}' has not been "
+                              "completed"
+                              .format(shard_index, shard_count, file_name) )
+        shard_file_names[shard_index] = file_name
+
+    if common_parameters is None:
+        raise ValueError("no shard output files are given")
+
+    missing_shard_indices = [ j for j in range(1, first_shard_count + 1)
+                              if j not in shard_file_names ]
+    if missing_shard_indices:
+        raise ValueError(
+            "missing shards (of {}): {}"
+            .format( first_shard_count,
+                     ", ".join(map(str, missing_shard_indices)) )
+        )
+
+    ordered_file_names = [ shard_file_names[j]
+                           for j in range(1, first_shard_count + 1) ]
+
+    if common_parameters["output_format"] == "npy":
+        dtype = None
+        f = None
+        try:
+            for file_name in ordered_file_names:
+                records, _ = load_results(file_name)
+                if f is None:
+                    dtype = records.dtype
+                    f = open_result_file( output_file_name,
+                                          dtype,
+                                          common_parameters )
+                elif records.dtype != dtype:
+                    raise ValueError( "the records in '{}' are of a "
+                                      "different type".format(file_name) )
+                f.write(nmp.ascontiguousarray(records).tobytes())
+        finally:
+            if f is not None:
+                close_result_file(f, dtype)
+    else:
+        with open(output_file_name, "w") as output_dest:
+            for file_name in ordered_file_names:
+                with open(file_name) as f:
+                    copyfileobj(f, output_dest)
+        write_metadata(output_file_name, common_parameters)
+
+
+# *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
+# --------------------------------------------------------------------------
+# ## Basic testing
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    from ._basic_testing_tools import run_and_time
+
+    def _basic_tests():
+        from os.path import join
+        from shutil import rmtree
+        from tempfile import mkdtemp
+        dir_name = mkdtemp()
+        parameters = dict(input_sha256="0", output_format="text")
+        file_names = []
+        for j, text in [(2, "c\n"), (1, "a\nb\n")]:
+            file_name = join(dir_name, "out{}.txt".format(j))
+            with open(file_name, "w") as f:
+                f.write(text)
+            write_metadata( file_name,
+                            dict(parameters, shard=[j, 2], complete=True) )
+            file_names.append(file_name)
+        output_file_name = join(dir_name, "out.txt")
+        merge_shard_outputs(file_names, output_file_name)
+        with open(output_file_name) as f:
+            assert f.read() == "a\nb\nc\n"
+        assert load_metadata(output_file_name) == parameters
+        for bad_file_names in [file_names[:1], file_names*2]:
+            try:
+                merge_shard_outputs(bad_file_names, output_file_name)
+            except ValueError:
+                pass
+            else:
+                assert False
+        rmtree(dir_name)
+
+    t = run_and_time(_basic_tests)
+    print("The module passed basic tests in {:.3g}s.".format(t))
@@ -0,0 +1,281 @@
+# XXX:  In spite of Style Guide for Python Code (PEP 8), not all imports in
+#   this file are necessarily at the beginning.
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO, StringIO
+from itertools import islice
+from sys import stderr, stdout
+
+# The maximal number of slabs submitted to the worker processes and not yet
+# written out, per worker process (see `process_slabs_in_pool`)
+MAX_PENDING_SLABS_PER_JOB = 2
+
+
+# The state of a worker process, set up by `_initialize_worker`
+_worker_state = {}
+
+
+def _initialize_worker( compiled_matrix,
+                        sampling_number,
+                        periodicity_selection_parameter,
+                        block_size,
+                        canonical,
+                        processing_options,
+                        hermiticity_check_options ):
+    """
+    Store everything that is needed to process slabs of the index space in
+    the current (worker) process.
+    """
+    # NOTE: importing `runner` here avoids a circular import
+    from .runner import make_data_processor, selection_criteria
+
+    criteria = selection_criteria(
+        processing_options.get("eigenvalue_zero_threshold"),
+        processing_options.get("interesting_signature_parameter"),
+        processing_options.get("eigenvalue_zero_thresholds"),
+        processing_options.get("interesting_signature_parameters")
+    )
+
+    if len(criteria) > 1:
+        output_keys = criteria
+    else:
+        output_keys = processing_options.get("sampling_numbers")
+
+    _worker_state.update(
+        process = make_data_processor( compiled_matrix,
+                                       sampling_number,
+                                       periodicity_selection_parameter,
+                                       block_size = block_size,
+                                       **processing_options ),
+        n = len(compiled_matrix["indeterminates"]),
+        sampling_number = sampling_number,
+        periodicity_selection_parameter = periodicity_selection_parameter,
+        block_size = block_size,
+        canonical = canonical,
+        sampling_numbers = processing_options.get("sampling_numbers"),
+        output_keys = output_keys,
+        binary_output = processing_options.get("record_dtype") is not None,
+        hermiticity_check_options = hermiticity_check_options
+    )
+
+
+def _process_slab(first_indices):
+    """
+    Process the sample points whose first index is in `first_indices`.
+    Return the printed output (by the sampling numbers or the selection
+    criteria in a run with several of them), the printed messages, the
+    timing counters and the summary of the checks of the matrices for being
+    Hermitian (see `make_hermiticity_checker`) or `None`.
+    """
+    # NOTE: importing `runner` here avoids a circular import
+    from .checking_matrices import make_hermiticity_checker
+    from .runner import make_index_iterator_maker
+
+    ws = _worker_state
+
+    sample_index_iterator_maker = make_index_iterator_maker(
+        ws["n"],
+        ws["sampling_number"],
+        ws["periodicity_selection_parameter"],
+        ws["block_size"],
+        first_indices,
+        ws["canonical"],
+        ws["sampling_numbers"]
+    )
+
+    def make_output_dest():
+        if ws["binary_output"]:
+            return BytesIO()
+        else:
+            return StringIO()
+
+    if ws["output_keys"] is None:
+        output_dest = make_output_dest()
+    else:
+        output_dest = {key: make_output_dest() for key in ws["output_keys"]}
+    message_output_dest = StringIO()
+
+    if ws["hermiticity_check_options"] is None:
+        hermiticity_checker = None
+        process_options = {}
+    else:
+        hermiticity_checker = make_hermiticity_checker(
+            **ws["hermiticity_check_options"]
+        )
+        process_options = dict(hermiticity_checker=hermiticity_checker)
+
+    timing = ws["process"]( sample_index_iterator_maker,
+                            output_dest = output_dest,
+                            message_output_dest = message_output_dest,
+                            with_timing_report = False,
+                            **process_options )
+
+    if ws["output_keys"] is None:
+        output = output_dest.getvalue()
+    else:
+        output = {key: dest.getvalue() for key, dest in output_dest.items()}
+
+    if hermiticity_checker is None:
+        hermiticity_check_summary = None
+    else:
+        _, get_hermiticity_check_summary, _ = hermiticity_checker
+        hermiticity_check_summary = get_hermiticity_check_summary()
+
+    return ( output,
+             message_output_dest.getvalue(),
+             timing,
+             hermiticity_check_summary )
+
+
+def process_slabs_in_pool( jobs,
+                           compiled_matrix,
+                           sampling_number,
+                           periodicity_selection_parameter,
+                           block_size,
+                           canonical,
+                           processing_options,
+                           slabs,
+                           output_dest = stdout,
+                           message_output_dest = stderr,
+                           hermiticity_check_options = None,
+                           hermiticity_checker = None ):
+    """
+    Process the data as the function made by `make_data_processor` does,
+    but process the slabs of the index space (ranges of the first index, see
+    `split_first_index_range`) in `jobs` worker processes.  Every worker
+    process makes its own data processor of the compiled matrix (see
+    `compile_matrix`) with the keyword arguments `processing_options`.  The
+    results are printed out in the order of the slabs, as by a serial run,
+    to `output_dest`, which is a dictionary of output destinations by the
+    sampling numbers or the selection criteria in a run with several of them
+    (see `make_data_processor`).  Yield the pair of every
+    slab and its timing counters after its results are printed out.
+    Since the output of a slab is kept in memory until it is printed out,
+    at most `MAX_PENDING_SLABS_PER_JOB` slabs per worker process are
+    submitted ahead, and the slabs should be small (like single values of
+    the first index).
+    If `hermiticity_check_options` are given, the matrices are checked for
+    being Hermitian by a checker made with them (see
+    `make_hermiticity_checker`, which selects the same matrices in every
+    slab as in a serial run) in every slab, and the summaries of the checks
+    are added up to the `hermiticity_checker`.
+    """
+    with ProcessPoolExecutor(
+        jobs,
+        initializer = _initialize_worker,
+        initargs = ( compiled_matrix,
+                     sampling_number,
+                     periodicity_selection_parameter,
+                     block_size,
+                     canonical,
+                     processing_options,
+                     hermiticity_check_options )
+    ) as executor:
+        slab_iterator = iter(slabs)
+        pending = deque(
+            (slab, executor.submit(_process_slab, slab))
+            for slab in islice(slab_iterator, MAX_PENDING_SLABS_PER_JOB*jobs)
+        )
+
+        while pending:
+            slab, future = pending.popleft()
+            output, messages, timing, check_summary = future.result()
+            for next_slab in islice(slab_iterator, 1):
+                pending.append(
+                    (next_slab, executor.submit(_process_slab, next_slab))
+                )
+
+            if isinstance(output, dict):
+                for key, output_part in output.items():
+                    output_dest[key].write(output_part)
+            else:
+                output_dest.write(output)
+            message_output_dest.write(messages)
+            if check_summary is not None:
+                _, _, add_hermiticity_check_summary = hermiticity_checker
+                add_hermiticity_check_summary(check_summary)
+            yield (slab, timing)
+
+
+# *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
+# --------------------------------------------------------------------------
+# ## Basic testing
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    from ._basic_testing_tools import run_and_time
+
+    def _basic_tests():
+        from sympy import symbols, sympify
+        from .compiling import compile_matrix
+        from .runner import make_data_processor, make_index_iterator_maker
+
+        indeterminates = symbols("s t")
+        e_mat = [ [sympify(e) for e in row]
+                  for row in [ ["-1 - s - t - s*t", "s + s*t", "0"],
+                               ["1 + t", "-1 - s - t - s*t", "s + s*t"],
+                               ["0", "1 + t", "-1 - s - t - s*t"] ] ]
+        compiled_matrix = compile_matrix(e_mat, indeterminates)
+        steps = 6
+
+        for block_size, canonical, sampling_numbers in [
+            (None, False, None), (7, True, None), (5, False, [2, 6])
+        ]:
+            processing_options = dict(
+                eigenvalue_zero_threshold = 1e-12,
+                interesting_signature_parameter = None,
+                sampling_numbers = sampling_numbers
+            )
+            if sampling_numbers is None:
+                serial_output_dest = StringIO()
+                pool_output_dest = StringIO()
+            else:
+                serial_output_dest = {q: StringIO() for q in sampling_numbers}
+                pool_output_dest = {q: StringIO() for q in sampling_numbers}
+
+            process = make_data_processor( compiled_matrix,
+                                           steps,
+                                           None,
+                                           block_size = block_size,
+                                           **processing_options )
+            process( make_index_iterator_maker( 2,
+                                                steps,
+                                                None,
+                                                block_size,
+                                                canonical = canonical,
+                                                sampling_numbers =
+                                                    sampling_numbers ),
+                     output_dest = serial_output_dest,
+                     message_output_dest = StringIO(),
+                     with_timing_report = False )
+
+            slabs = [range(i1, i1 + 1) for i1 in range(1, steps + 1)]
+            processed_slabs = [
+                slab for slab, _ in process_slabs_in_pool(
+                    2,
+                    compiled_matrix,
+                    steps,
+                    None,
+                    block_size,
+                    canonical,
+                    processing_options,
+                    slabs,
+                    output_dest = pool_output_dest,
+                    message_output_dest = StringIO()
+                )
+            ]
+            assert processed_slabs == slabs
+
+            if sampling_numbers is None:
+                assert serial_output_dest.getvalue()
+                assert ( pool_output_dest.getvalue() ==
+                         serial_output_dest.getvalue() )
+            else:
+                for q in sampling_numbers:
+                    assert serial_output_dest[q].getvalue()
+                    assert ( pool_output_dest[q].getvalue() ==
+                             serial_output_dest[q].getvalue() )
+
+    t = run_and_time(_basic_tests)
+    print("The module passed basic tests in {:.3g}s.".format(t))
@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, Queue
+from threading import Event, Thread
+
+# The default maximal number of items prepared ahead of `finish` (see
+# `run_pipeline`)
+DEFAULT_QUEUE_DEPTH = 4
+
+# The marker of the end of the items in the queue of `run_pipeline`
+_END = object()
+
+
+def run_pipeline( items,
+                  prepare,
+                  process,
+                  finish,
+                  threads = 2,
+                  queue_depth = DEFAULT_QUEUE_DEPTH ):
+    """
+    Call `finish(item, process(prepare(item)))` for every item of the
+    iterable `items`, overlapping the calls for different items.  A producer
+    thread iterates over the items, calls `prepare`, and submits the calls
+    of `process` to a pool of `threads` threads.  The calling thread is the
+    only one to call `finish`, in the order of the items.  At most
+    `queue_depth` items are waiting for `finish` at a time, which bounds
+    the memory taken by the prepared items.
+
+    This is useful if `process` spends most of its time in code releasing
+    the GIL, like the LAPACK routines.  An exception raised by any of the
+    functions or by the iteration stops the pipeline and is raised again in
+    the calling thread.
+    """
+    pending = Queue(maxsize=queue_depth)
+    stopped = Event()
+
+    with ThreadPoolExecutor(threads) as executor:
+
+        def produce():
+            try:
+                for item in items:
+                    if stopped.is_set():
+                        return
+                    prepared = prepare(item)
+                    pending.put((item, executor.submit(process, prepared)))
+            except BaseException as e:
+                pending.put((_END, e))
+            else:
+                pending.put((_END, None))
+
+        producer = Thread(target=produce, name="pipeline-producer")
+        producer.start()
+
+        try:
+            while True:
+                item, result = pending.get()
+                if item is _END:
+                    if result is not None:
+                        raise result
+                    break
+                finish(item, result.result())
+
+        finally:
+            # Let the producer stop if it is waiting for a place in the queue
+            stopped.set()
+            while producer.is_alive():
+                try:
+                    pending.get(timeout=0.1)
+                except Empty:
+                    pass
+            producer.join()
+
+
+# *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
+# --------------------------------------------------------------------------
+# ## Basic testing
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    from ._basic_testing_tools import run_and_time
+
+    def _basic_tests():
+        from time import sleep
+        results = []
+        run_pipeline( range(20),
+                      lambda j: j*j,
+                      lambda v: (sleep(0.001*(v % 3)), v + 1)[1],
+                      lambda j, v: results.append((j, v)),
+                      threads = 3,
+                      queue_depth = 2 )
+        assert results == [(j, j*j + 1) for j in range(20)]
+
+        def failing_finish(j, _):
+            if j == 5:
+                raise ZeroDivisionError
+        for prepare, finish in [ (lambda j: 1//(j - 7), lambda j, v: None),
+                                 (lambda j: j, failing_finish) ]:
+            try:
+                run_pipeline( range(100),
+                              prepare,
+                              lambda v: v,
+                              finish,
+                              queue_depth = 1 )
+            except ZeroDivisionError:
+                pass
+            else:
+                assert False
+
+    t = run_and_time(_basic_tests)
+    print("The module passed basic tests in {:.3g}s.".format(t))
@@ -0,0 +1,373 @@
+import numpy as nmp
+from itertools import product as iter_product
+from sys import stderr, stdout
+from time import process_time
+
+from .analysing import ( make_batch_eigenvalues_analyser,
+                         make_interesting_signature_detector,
+                         make_result_writer,
+                         report_suspicious_eigenvalues,
+                         report_timing )
+from .sampling import hermitize_bands
+from .solving import solve_eigenvalues
+
+
+# NOTE:  In this module, a sampling index `i` is represented by its
+#   "position" on the path `1, ..., 2*steps - 1` around the circle, that
+#   avoids the excluded point 1 (the index 0).  The position of the index
+#   `i` is `i` if `i > 0`, and `i + 2*steps` otherwise.  Thus the usual
+#   order of the sample points (see `make_sample_index_iterator_maker`) is
+#   the lexicographic order of the positions.
+
+def _positions_to_indices(positions, steps):
+    return nmp.where(positions <= steps, positions, positions - 2*steps)
+
+
+def _coarse_positions(steps, coarse_steps, last_position):
+    """
+    Return the sorted array of the positions of the coarse sample points
+    (the roots of unity of order `2*coarse_steps`) up to `last_position`,
+    together with the first and the last positions of the fine grid.
+    """
+    spacing = steps//coarse_steps
+    return nmp.unique(nmp.concatenate((
+        [1],
+        nmp.arange(spacing, last_position + 1, spacing),
+        [last_position]
+    )))
+
+
+def _cell_corners(lower_corners, upper_corners):
+    """
+    Return the array of shape (2**n, m, n) of the corners of the m cells of
+    dimension n with the given lower and upper corners.
+    """
+    n = lower_corners.shape[1]
+    return nmp.stack([ nmp.where(upper, upper_corners, lower_corners)
+                       for upper in iter_product((False, True), repeat=n) ])
+
+
+def _split_cells(lower_corners, upper_corners):
+    """
+    Split every cell in halves along every side longer than 1.  Return the
+    lower and the upper corners of the new cells.
+    """
+    n = lower_corners.shape[1]
+    splittable = upper_corners - lower_corners > 1
+    middles = nmp.where( splittable,
+                         (lower_corners + upper_corners)//2,
+                         upper_corners )
+
+    new_lower_corners = []
+    new_upper_corners = []
+    for upper in iter_product((False, True), repeat=n):
+        upper = nmp.array(upper)
+        selected = ~(upper & ~splittable).any(axis=1)
+        new_lower_corners.append(
+            nmp.where(upper, middles, lower_corners)[selected]
+        )
+        new_upper_corners.append(
+            nmp.where(upper, upper_corners, middles)[selected]
+        )
+
+    return ( nmp.concatenate(new_lower_corners),
+             nmp.concatenate(new_upper_corners) )
+
+
+def process_data_adaptively( batch_matrix_sampler,
+                             n,
+                             sampling_number,
+                             coarse_sampling_number,
+                             eigenvalue_zero_threshold,
+                             interesting_signature_parameter,
+                             block_size,
+                             output_dest = stdout,
+                             message_output_dest = stderr,
+                             with_timing_report = True,
+                             eigenvalue_solver = solve_eigenvalues,
+                             bandwidth = None,
+                             record_dtype = None ):
+    """
+    Do the same as `process_data_in_blocks` with the full sweep of the
+    sample points, but compute the eigenvalues only where needed.
+
+    The sample points of the grid with `coarse_sampling_number` steps on a
+    semicircle (which must divide `sampling_number`) divide the torus into
+    cells.  The cells whose corners have different signatures or
+    "suspicious" eigenvalues are recursively divided in halves along every
+    side until they become the cells of the grid with `sampling_number`
+    steps.  The signatures at the points inside the other cells are taken
+    equal to the signature at their corners.  All the sample points are
+    roots of unity of order `2*sampling_number`, indexed as usual.
+    NOTE:  This relies on the signature being locally constant outside of
+      the zero set of the determinant: a component of this set that lies
+      inside a coarse cell without separating its corners is missed.
+
+    The results are printed out for all the sample points in the usual
+    order.  The minimal by absolute value non-zero eigenvalues of the
+    points where the signatures have not been computed are NaN.
+    Return the same timing counters as `process_data`.
+    """
+    steps = sampling_number
+
+    analyse_eigenvalues = make_batch_eigenvalues_analyser(
+        eigenvalue_zero_threshold
+    )
+
+    signature_is_interesting = make_interesting_signature_detector(
+        interesting_signature_parameter
+    )
+
+    write_results = make_result_writer( signature_is_interesting,
+                                        output_dest,
+                                        record_dtype = record_dtype )
+
+    get_sample_matrices = batch_matrix_sampler
+
+    # NOTE:  The results are only kept for the computed points, sorted by
+    #   their keys (the flat indices of their positions minus 1 in the
+    #   grid), and for the uniform cells, and are expanded to the whole grid
+    #   one first index at a time when printed out, since the whole grid
+    #   would take several times more memory than the output itself.
+    grid_shape = (steps,) + (2*steps - 1,)*(n - 1)
+    computed_keys = nmp.zeros(0, dtype=nmp.int64)
+    computed_signatures = nmp.zeros((0, 3), dtype=int)
+    computed_min_nonzero_vals = nmp.zeros(0)
+    computed_suspicious = nmp.zeros(0, dtype=bool)
+    uniform_cells = []
+
+    def grid_keys(positions):
+        return nmp.ravel_multi_index(tuple((positions - 1).T), grid_shape)
+
+    def find_computed(keys):
+        """
+        Return the indices of the keys among the keys of the computed
+        points, and the boolean array telling which keys are among them.
+        """
+        found_inds = nmp.searchsorted(computed_keys, keys)
+        found = found_inds < len(computed_keys)
+        found[found] = computed_keys[found_inds[found]] == keys[found]
+        return (found_inds, found)
+
+    matrix_comput_time = 0
+    eigval_comput_time = 0
+    eigval_analys_time = 0
+
+    def compute_signatures(positions):
+        nonlocal matrix_comput_time, eigval_comput_time, eigval_analys_time
+        nonlocal computed_keys, computed_signatures
+        nonlocal computed_min_nonzero_vals, computed_suspicious
+
+        signatures_blocks = [computed_signatures]
+        min_nonzero_vals_blocks = [computed_min_nonzero_vals]
+        suspicious_blocks = [computed_suspicious]
+
+        for start in range(0, len(positions), block_size):
+            positions_block = positions[start:(start + block_size)]
+            inds_block = _positions_to_indices(positions_block, steps)
+
+            time0 = process_time()
+            mats = get_sample_matrices(inds_block)
+
+            # Transform the matrices to truly Hermitian ones:
+            if bandwidth is None:
+                mats += mats.conj().swapaxes(-1, -2)
+            else:
+                mats = hermitize_bands(mats)
+            time1 = process_time()
+            eigenvalues_block = eigenvalue_solver(mats)
+            time2 = process_time()
+            ( signatures,
+              (neg_suspicious, pos_suspicious),
+              min_nonzero_vals ) = analyse_eigenvalues(eigenvalues_block)
+            suspicious = (neg_suspicious | pos_suspicious).any(axis=1)
+            time3 = process_time()
+            time3 -= time2
+            time2 -= time1
+            time1 -= time0
+            matrix_comput_time += time1
+            eigval_comput_time += time2
+            eigval_analys_time += time3
+
+            for j in nmp.flatnonzero(suspicious):
+                eigenvalues = eigenvalues_block[j]
+                report_suspicious_eigenvalues(
+                    tuple(inds_block[j].tolist()),
+                    list(eigenvalues[neg_suspicious[j]]),
+                    list(eigenvalues[pos_suspicious[j]]),
+                    message_output_dest
+                )
+
+            signatures_blocks.append(signatures)
+            min_nonzero_vals_blocks.append(min_nonzero_vals)
+            suspicious_blocks.append(suspicious)
+
+        keys = nmp.concatenate((computed_keys, grid_keys(positions)))
+        order = nmp.argsort(keys, kind="stable")
+        computed_keys = keys[order]
+        computed_signatures = nmp.concatenate(signatures_blocks)[order]
+        computed_min_nonzero_vals = (
+            nmp.concatenate(min_nonzero_vals_blocks)[order]
+        )
+        computed_suspicious = nmp.concatenate(suspicious_blocks)[order]
+
+    main_loop_start_time = process_time()
+
+    coarse_positions = [
+        _coarse_positions(steps, coarse_sampling_number, steps)
+    ] + [
+        _coarse_positions(steps, coarse_sampling_number, 2*steps - 1)
+    ]*(n - 1)
+
+    lower_corners = nmp.array(
+        list(iter_product(*(ps[:-1] for ps in coarse_positions)))
+    ).reshape(-1, n)
+    upper_corners = nmp.array(
+        list(iter_product(*(ps[1:] for ps in coarse_positions)))
+    ).reshape(-1, n)
+
+    while lower_corners.size:
+        corners = _cell_corners(lower_corners, upper_corners)
+
+        corner_keys = nmp.unique(grid_keys(corners.reshape(-1, n)))
+        _, found = find_computed(corner_keys)
+        compute_signatures(nmp.stack(
+            nmp.unravel_index(corner_keys[~found], grid_shape),
+            axis = 1
+        ) + 1)
+
+        corner_inds, _ = find_computed(grid_keys(corners.reshape(-1, n)))
+        corner_inds = corner_inds.reshape(corners.shape[:2])
+        corner_signatures = computed_signatures[corner_inds]
+        uniform = (
+            (corner_signatures == corner_signatures[0]).all(axis=(0, 2)) &
+            ~computed_suspicious[corner_inds].any(axis=0)
+        )
+
+        uniform_cells.append(( lower_corners[uniform],
+                               upper_corners[uniform],
+                               corner_signatures[0][uniform] ))
+
+        # The cells of the fine grid have all their points computed
+        refined = ~uniform & (upper_corners - lower_corners > 1).any(axis=1)
+        lower_corners, upper_corners = _split_cells(
+            lower_corners[refined],
+            upper_corners[refined]
+        )
+
+    cell_lower_corners, cell_upper_corners, cell_signatures = (
+        nmp.concatenate(arrays) for arrays in zip(*uniform_cells)
+    )
+
+    slab_shape = grid_shape[1:]
+    slab_size = (2*steps - 1)**(n - 1)
+    for first_position in range(1, steps + 1):
+        signature_slab = nmp.zeros(slab_shape + (3,), dtype=int)
+        min_nonzero_val_slab = nmp.full(slab_shape, nmp.nan)
+
+        in_slab = ( (cell_lower_corners[:, 0] <= first_position) &
+                    (first_position <= cell_upper_corners[:, 0]) )
+        for lower_corner, upper_corner, signature in zip(
+            cell_lower_corners[in_slab],
+            cell_upper_corners[in_slab],
+            cell_signatures[in_slab]
+        ):
+            cell = tuple( slice(l - 1, u)
+                          for l, u in zip(lower_corner[1:], upper_corner[1:]) )
+            signature_slab[cell] = signature
+
+        slab_start = (first_position - 1)*slab_size
+        start, stop = nmp.searchsorted( computed_keys,
+                                        [slab_start, slab_start + slab_size] )
+        slab_keys = computed_keys[start:stop] - slab_start
+        signature_slab.reshape(-1, 3)[slab_keys] = (
+            computed_signatures[start:stop]
+        )
+        min_nonzero_val_slab.reshape(-1)[slab_keys] = (
+            computed_min_nonzero_vals[start:stop]
+        )
+
+        positions = nmp.array(list(iter_product(
+            [first_position],
+            *(range(1, 2*steps),)*(n - 1)
+        ))).reshape(-1, n)
+        write_results(zip( _positions_to_indices(positions, steps).tolist(),
+                           signature_slab.reshape(-1, 3).tolist(),
+                           min_nonzero_val_slab.reshape(-1).tolist(),
+                           [False]*len(positions) ))
+
+    timing = ( process_time() - main_loop_start_time,
+               matrix_comput_time,
+               eigval_comput_time,
+               eigval_analys_time )
+
+    print( "Computed the signatures at {} of {} sample points."
+           .format(len(computed_keys), steps*slab_size),
+           file = message_output_dest )
+
+    if with_timing_report:
+        report_timing(*timing, message_output_dest=message_output_dest)
+
+    return timing
+
+
+# *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
+# --------------------------------------------------------------------------
+# ## Basic testing
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    from ._basic_testing_tools import run_and_time
+
+    def _basic_tests():
+        from io import StringIO
+        from sympy import symbols, sympify
+        from .analysing import process_data_in_blocks
+        from .sampling import make_batch_matrix_sampler
+        from .sweeping import make_sample_index_block_iterator_maker
+
+        assert list(_coarse_positions(12, 3, 12)) == [1, 4, 8, 12]
+        assert ( list(_coarse_positions(12, 3, 23)) ==
+                 [1, 4, 8, 12, 16, 20, 23] )
+        lower_corners, upper_corners = _split_cells(
+            nmp.array([[1, 4]]),
+            nmp.array([[2, 8]])
+        )
+        assert lower_corners.tolist() == [[1, 4], [1, 6]]
+        assert upper_corners.tolist() == [[2, 6], [2, 8]]
+
+        indeterminates = symbols("s t")
+        e_mat = [ [sympify(e) for e in row]
+                  for row in [ ["-1 - s - t - s*t", "s + s*t", "0"],
+                               ["1 + t", "-1 - s - t - s*t", "s + s*t"],
+                               ["0", "1 + t", "-1 - s - t - s*t"] ] ]
+        steps = 16
+        sampler = make_batch_matrix_sampler(e_mat, indeterminates, steps)
+        output_dest = StringIO()
+        process_data_in_blocks( sampler,
+                                make_sample_index_block_iterator_maker(
+                                    2, steps, None, 100
+                                ),
+                                1e-12,
+                                None,
+                                output_dest = output_dest,
+                                message_output_dest = StringIO(),
+                                with_timing_report = False )
+        adaptive_output_dest = StringIO()
+        message_output_dest = StringIO()
+        process_data_adaptively( sampler,
+                                 2,
+                                 steps,
+                                 4,
+                                 1e-12,
+                                 None,
+                                 100,
+                                 output_dest = adaptive_output_dest,
+                                 message_output_dest = message_output_dest,
+                                 with_timing_report = False )
+        assert adaptive_output_dest.getvalue() == output_dest.getvalue()
+        assert message_output_dest.getvalue().startswith("Computed")
+
+    t = run_and_time(_basic_tests)
+    print("The module passed basic tests in {:.3g}s.".format(t))
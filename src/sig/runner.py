@@ -1,12 +1,619 @@
-from json import load as load_json
-from sympy import symbols
-from sympy.parsing.sympy_parser import parse_expr
-from sys import stderr
+from hashlib import sha256
+from io import SEEK_END
+from json import dump as dump_json
+from json import loads as loads_json
+from os.path import splitext
+from random import getrandbits
+from sys import stderr, stdout
 from time import process_time
 
-from .analysing import process_data
-from .sampling import make_matrix_sampler
-from .sweeping import make_sample_index_iterator_maker
+from .analysing import ( make_eigenvalue_classifier,
+                         make_interesting_signature_detector,
+                         make_multiresolution_result_writer,
+                         make_result_writer,
+                         process_data,
+                         process_data_in_blocks,
+                         process_stored_eigenvalues,
+                         report_timing )
+from .caching import cache_key, load_cached_matrix, store_cached_matrix
+from .checking_matrices import ( make_hermiticity_checker,
+                                 report_hermiticity_check )
+from .checkpointing import load_checkpoint, make_checkpointer
+from .compiling import COMPILED_MATRIX_VERSION, compile_matrix
+from .compressing import make_run_length_result_writer
+from .instrumenting import ( add_progress_handler,
+                             make_progress_reporter,
+                             make_stage_instrumenter,
+                             remove_progress_handler )
+from .pipelining import DEFAULT_QUEUE_DEPTH
+from .refining import process_data_adaptively
+from .sampling import ( make_compiled_batch_matrix_sampler,
+                        make_compiled_fft_batch_matrix_sampler,
+                        make_compiled_matrix_sampler,
+                        make_compiled_tensor_batch_matrix_sampler )
+from .solving import make_eigenvalue_solver
+from .storing import ( close_result_file,
+                       eigenvalue_record_dtype,
+                       load_results,
+                       make_eigenvalue_recorder,
+                       open_result_file,
+                       result_dtype,
+                       write_metadata )
+from .sweeping import ( count_sample_indices,
+                        make_conjugate_index_expander,
+                        make_sample_index_block_iterator_maker,
+                        make_sample_index_iterator_maker,
+                        split_first_index_range )
+from .verifying import ( make_high_precision_signature_computer,
+                         make_inline_verifier,
+                         make_pool_verifier,
+                         make_verification_pool )
+
+
+def parse_input_data(data):
+    """
+    Parse the input data loaded from a JSON input file.  Return the pair of
+    the tuple of indeterminates and the matrix of SymPy expressions.
+    """
+    # NOTE:  SymPy is imported only when needed, since importing it takes
+    #   much of the startup time.
+    from sympy import symbols
+    from sympy.parsing.sympy_parser import parse_expr
+
+    indeterminates = symbols(data["indeterminates"])
+
+    e_mat = [[parse_expr(s) for s in row] for row in data["matrix"]]
+
+    return (indeterminates, e_mat)
+
+
+def is_compiled_input(data):
+    """
+    Tell if the data loaded from a JSON input file is a compiled matrix
+    (see `compile_matrix`) saved by `go_compile`, rather than a matrix of
+    expressions.
+    """
+    return "entries" in data
+
+
+def input_indeterminate_count(input_file_name):
+    """
+    Return the number of the indeterminates of the matrix in the JSON input
+    file, which can be a compiled matrix (see `is_compiled_input`), without
+    parsing the matrix.
+    """
+    with open(input_file_name, "rb") as f:
+        data = loads_json(f.read().decode())
+
+    if is_compiled_input(data):
+        return len(data["indeterminates"])
+
+    from sympy import symbols
+
+    return len(symbols(data["indeterminates"], seq=True))
+
+
+def go_compile(input_file_name, output_file_name=None):
+    """
+    Compile the matrix of the JSON input file (see `compile_matrix`) with
+    the Laurent polynomial coefficients of the entries (the exponents of the
+    monomials and the complex coefficients), and save it as JSON to
+    `output_file_name` (or print it out).  The file saved can be given to
+    `go` instead of the input file, in which case SymPy is not imported.
+    """
+    with open(input_file_name) as f:
+        data = loads_json(f.read())
+
+    if is_compiled_input(data):
+        raise ValueError( "the input in '{}' is already compiled"
+                          .format(input_file_name) )
+
+    indeterminates, e_mat = parse_input_data(data)
+    compiled_matrix = compile_matrix(e_mat, indeterminates)
+
+    if output_file_name is None:
+        dump_json(compiled_matrix, stdout)
+        print()
+    else:
+        with open(output_file_name, "w") as f:
+            dump_json(compiled_matrix, f)
+
+
+# The batch matrix sampler makers by the names of the sampling methods
+batch_matrix_sampler_makers = {
+    "lambdify": make_compiled_batch_matrix_sampler,
+    "fft":      make_compiled_fft_batch_matrix_sampler,
+    "tensor":   make_compiled_tensor_batch_matrix_sampler
+}
+
+
+# The minimal size of the matrices, and the minimal ratio of it to the
+# bandwidth, for which the band storage is used with "auto" (see
+# `choose_bandwidth`).  The band eigenvalue solvers are called for every
+# matrix separately (see `solve_banded_eigenvalues`), so for smaller
+# matrices they are slower than one call of `solve_eigenvalues` for the
+# whole stack: for 1024 matrices, about 3.5 times for a tridiagonal 8 by 8
+# matrix, and about as fast for a 32 by 32 one with the bandwidth 4.
+BAND_STORAGE_MIN_SIZE = 32
+BAND_STORAGE_MIN_SIZE_TO_BANDWIDTH = 8
+
+
+def choose_bandwidth(compiled_matrix, band_storage="auto"):
+    """
+    Return the bandwidth of the band storage to use for the matrices of the
+    compiled matrix (see `compile_matrix`), or `None` if they are to be
+    stored as dense matrices.  With `band_storage` equal to "auto", the band
+    storage is used only if the band eigenvalue solvers are expected to be
+    faster (see `BAND_STORAGE_MIN_SIZE`), which also makes the band storage
+    take at most about a quarter of the space of the dense storage.
+    """
+    size = compiled_matrix["size"]
+
+    if not may_use_band_storage(size, band_storage):
+        return None
+
+    bandwidth = compiled_matrix["bandwidth"]
+
+    if band_storage == "always" or (
+        size >= BAND_STORAGE_MIN_SIZE_TO_BANDWIDTH*bandwidth
+    ):
+        return bandwidth
+    else:
+        return None
+
+
+def may_use_band_storage(size, band_storage="auto"):
+    """
+    Return whether `choose_bandwidth` may choose the band storage for the
+    matrices of `size`, that is, whether it needs the bandwidth of the
+    compiled matrix (which is not always computed, see `compile_matrix`).
+    """
+    return band_storage == "always" or (
+        band_storage == "auto" and size >= BAND_STORAGE_MIN_SIZE
+    )
+
+
+def make_batch_processing_tools( compiled_matrix,
+                                 sampling_number,
+                                 eigenvalue_zero_threshold,
+                                 sampling_method = "lambdify",
+                                 solving_method = "eigvalsh",
+                                 band_storage = "auto" ):
+    """
+    Make the batch matrix sampler of the compiled matrix (see
+    `compile_matrix`) and the eigenvalue solver for processing the data in
+    blocks.  Return the triple of them and the bandwidth of the
+    band storage used for the matrices (or `None`).
+    """
+    if solving_method != "ldl":
+        bandwidth = choose_bandwidth(compiled_matrix, band_storage)
+    else:
+        bandwidth = None
+
+    matrix_sampler = batch_matrix_sampler_makers[sampling_method](
+        compiled_matrix,
+        sampling_number,
+        bandwidth = bandwidth
+    )
+
+    eigenvalue_solver = make_eigenvalue_solver(
+        eigenvalue_zero_threshold,
+        solving_method,
+        banded = bandwidth is not None
+    )
+
+    return (matrix_sampler, eigenvalue_solver, bandwidth)
+
+
+def selection_criteria( eigenvalue_zero_threshold,
+                        interesting_signature_parameter,
+                        eigenvalue_zero_thresholds = None,
+                        interesting_signature_parameters = None ):
+    """
+    Return the list of the pairs of a zero threshold and a signature
+    parameter for all the combinations of the `eigenvalue_zero_thresholds`
+    (or of only `eigenvalue_zero_threshold` if they are not given) and of
+    the `interesting_signature_parameters` (or of only
+    `interesting_signature_parameter`).
+    """
+    if eigenvalue_zero_thresholds is None:
+        eigenvalue_zero_thresholds = [eigenvalue_zero_threshold]
+    if interesting_signature_parameters is None:
+        interesting_signature_parameters = [interesting_signature_parameter]
+
+    return [ (z, g)
+             for z in eigenvalue_zero_thresholds
+             for g in interesting_signature_parameters ]
+
+
+def make_criteria_classifier( criteria,
+                              output_dests,
+                              index_expander = None,
+                              record_dtype = None ):
+    """
+    Make the eigenvalue classifier (see `make_eigenvalue_classifier`) that
+    writes the results selected by every pair of a zero threshold and a
+    signature parameter in `criteria` (see `selection_criteria`) to
+    `output_dests[(z, g)]`.
+    """
+    always_interesting = make_interesting_signature_detector(None)
+
+    return make_eigenvalue_classifier(
+        list(dict.fromkeys(z for z, _ in criteria)),
+        list(dict.fromkeys(g for _, g in criteria)),
+        { (z, g): make_result_writer( always_interesting,
+                                      output_dests[(z, g)],
+                                      index_expander,
+                                      record_dtype )
+          for z, g in criteria }
+    )
+
+
+def make_data_processor( compiled_matrix,
+                         sampling_number,
+                         periodicity_selection_parameter,
+                         eigenvalue_zero_threshold,
+                         interesting_signature_parameter,
+                         caution = False,
+                         block_size = None,
+                         sampling_method = "lambdify",
+                         solving_method = "eigvalsh",
+                         band_storage = "auto",
+                         expand_conjugates = False,
+                         record_dtype = None,
+                         run_length_format = None,
+                         verification_precision = None,
+                         verification_pool = None,
+                         sampling_numbers = None,
+                         eigenvalue_zero_thresholds = None,
+                         interesting_signature_parameters = None,
+                         instrument = None,
+                         pipeline_threads = None,
+                         pipeline_queue_depth = DEFAULT_QUEUE_DEPTH ):
+    """
+    Make the matrix sampler of the compiled matrix (see `compile_matrix`)
+    and everything else needed for processing the data, either with
+    `process_data`, or, if `block_size` is given, with
+    `process_data_in_blocks`.  Return a function that takes a sample index
+    iterator maker (see `make_index_iterator_maker`) and keyword arguments
+    to pass to the processing function, processes the data, and returns
+    the timing counters.
+    If `expand_conjugates` is true, the results are also printed out for the
+    conjugates of the canonical n-uples of indices (see
+    `make_sample_index_iterator_maker`).
+    If `record_dtype` is given, the results are written as binary records
+    (see `process_data_in_blocks`).  If `run_length_format` is "runs", they
+    are written as runs of points (see `make_run_length_result_writer`), or,
+    if it is "regions", as connected regions of points, which requires a
+    2-dimensional grid; this requires `block_size` and is not supported
+    with `sampling_numbers` or with several selection criteria.
+    If `verification_precision` is given, the signatures at the points with
+    suspicious eigenvalues are recomputed with this number of significant
+    decimal digits, in the `verification_pool` (see
+    `make_verification_pool`) if it is given, or else right away.
+    If `sampling_numbers` is given, it must be a list of divisors of
+    `sampling_number`, and the results are written separately for the grids
+    with these numbers of steps (see `make_multiresolution_result_writer`):
+    the function made then takes the dictionary of the output destinations
+    by these numbers as `output_dest`.
+    If `eigenvalue_zero_thresholds` or `interesting_signature_parameters`
+    are given, the results are selected by all the combinations of them
+    (see `selection_criteria`) at once, and the function made takes the
+    dictionary of the output destinations by these combinations as
+    `output_dest` (see `make_eigenvalue_classifier`).  This requires
+    `block_size`.
+    If `instrument` is given (see `make_stage_instrumenter`), the matrix
+    sampler and the eigenvalue solver are instrumented with it as the
+    stages "computing_matrices" and "computing_eigenvalues".
+    If `pipeline_threads` is given, the blocks are processed in a pipeline
+    with this number of solver threads and the queue depth
+    `pipeline_queue_depth` (see `process_data_in_blocks`).  This requires
+    `block_size`.
+    """
+    n = len(compiled_matrix["indeterminates"])
+
+    if expand_conjugates and sampling_numbers is None:
+        index_expander = make_conjugate_index_expander(
+            n,
+            sampling_number,
+            periodicity_selection_parameter
+        )
+    else:
+        index_expander = None
+
+    criteria = selection_criteria( eigenvalue_zero_threshold,
+                                   interesting_signature_parameter,
+                                   eigenvalue_zero_thresholds,
+                                   interesting_signature_parameters )
+
+    if len(criteria) > 1:
+        def make_output_kwargs(output_dest):
+            return dict(eigenvalue_classifier=make_criteria_classifier(
+                criteria,
+                output_dest,
+                index_expander,
+                record_dtype
+            ))
+
+    elif sampling_numbers is None and run_length_format is not None:
+        signature_is_interesting = make_interesting_signature_detector(
+            interesting_signature_parameter
+        )
+
+        if run_length_format == "regions":
+            region_steps = sampling_number
+        else:
+            region_steps = None
+
+        def make_output_kwargs(output_dest):
+            write_results, flush_results = make_run_length_result_writer(
+                signature_is_interesting,
+                eigenvalue_zero_threshold,
+                output_dest,
+                index_expander,
+                region_steps
+            )
+            return dict( result_writer = write_results,
+                         result_finisher = flush_results )
+
+    elif sampling_numbers is None:
+        def make_output_kwargs(output_dest):
+            return dict(output_dest=output_dest)
+
+    else:
+        signature_is_interesting = make_interesting_signature_detector(
+            interesting_signature_parameter
+        )
+
+        index_expanders = {
+            q: ( make_conjugate_index_expander( n,
+                                                q,
+                                                periodicity_selection_parameter )
+                 if expand_conjugates else None )
+            for q in sampling_numbers
+        }
+
+        def make_output_kwargs(output_dest):
+            return dict(result_writer=make_multiresolution_result_writer(
+                sampling_number,
+                { q: make_result_writer( signature_is_interesting,
+                                         output_dest[q],
+                                         index_expanders[q],
+                                         record_dtype )
+                  for q in sampling_numbers }
+            ))
+
+    if verification_precision is None:
+        verifier = None
+    elif verification_pool is None:
+        verifier = make_inline_verifier(
+            make_high_precision_signature_computer(
+                compiled_matrix,
+                sampling_number,
+                eigenvalue_zero_threshold,
+                verification_precision
+            )
+        )
+    else:
+        verifier = make_pool_verifier(verification_pool)
+
+    if block_size is None:
+        matrix_sampler = make_compiled_matrix_sampler( compiled_matrix,
+                                                       sampling_number )
+
+        if instrument is None:
+            solver_options = {}
+        else:
+            # NOTE: putting imports here seems to be against Style Guide for
+            #   Python Code (PEP 8)
+            from scipy.linalg import eigvalsh
+
+            matrix_sampler = instrument("computing_matrices", matrix_sampler)
+            solver_options = dict(eigenvalue_solver=instrument(
+                "computing_eigenvalues",
+                eigvalsh
+            ))
+
+        def data_processor( sample_index_iterator_maker,
+                            output_dest = stdout,
+                            **kwargs ):
+            return process_data( matrix_sampler,
+                                 sample_index_iterator_maker,
+                                 eigenvalue_zero_threshold,
+                                 interesting_signature_parameter,
+                                 caution = caution,
+                                 index_expander = index_expander,
+                                 verifier = verifier,
+                                 **solver_options,
+                                 **make_output_kwargs(output_dest),
+                                 **kwargs )
+
+    else:
+        matrix_sampler, eigenvalue_solver, bandwidth = (
+            make_batch_processing_tools( compiled_matrix,
+                                         sampling_number,
+                                         eigenvalue_zero_threshold,
+                                         sampling_method,
+                                         solving_method,
+                                         band_storage )
+        )
+
+        if instrument is not None:
+            matrix_sampler = instrument("computing_matrices", matrix_sampler)
+            eigenvalue_solver = instrument( "computing_eigenvalues",
+                                            eigenvalue_solver )
+
+        def data_processor( sample_index_iterator_maker,
+                            output_dest = stdout,
+                            **kwargs ):
+            return process_data_in_blocks(
+                matrix_sampler,
+                sample_index_iterator_maker,
+                eigenvalue_zero_threshold,
+                interesting_signature_parameter,
+                caution = caution,
+                eigenvalue_solver = eigenvalue_solver,
+                bandwidth = bandwidth,
+                index_expander = index_expander,
+                record_dtype = record_dtype,
+                verifier = verifier,
+                pipeline_threads = pipeline_threads,
+                pipeline_queue_depth = pipeline_queue_depth,
+                **make_output_kwargs(output_dest),
+                **kwargs
+            )
+
+    return data_processor
+
+
+def make_index_iterator_maker( n,
+                               sampling_number,
+                               periodicity_selection_parameter,
+                               block_size = None,
+                               first_indices = None,
+                               canonical = False,
+                               sampling_numbers = None ):
+    """
+    Make the sample index iterator maker to be passed to `process_data`,
+    or, if `block_size` is given, the sample index block iterator maker to
+    be passed to `process_data_in_blocks`.
+    """
+    if block_size is None:
+        return make_sample_index_iterator_maker(
+            n,
+            sampling_number,
+            periodicity_selection_parameter,
+            first_indices,
+            canonical,
+            sampling_numbers
+        )
+    else:
+        return make_sample_index_block_iterator_maker(
+            n,
+            sampling_number,
+            periodicity_selection_parameter,
+            block_size,
+            first_indices,
+            canonical,
+            sampling_numbers
+        )
+
+
+def _process_slabs( process,
+                    n,
+                    sampling_number,
+                    periodicity_selection_parameter,
+                    block_size,
+                    canonical,
+                    slabs,
+                    output_dest = stdout,
+                    hermiticity_checker = None ):
+    """
+    Process the slabs of the index space (ranges of the first index) one
+    after another with a function made by `make_data_processor`.  Yield the
+    pair of every slab and its timing counters after it is processed.  The
+    `hermiticity_checker` is passed to `process_data_in_blocks` if given.
+    """
+    if hermiticity_checker is None:
+        process_options = {}
+    else:
+        process_options = dict(hermiticity_checker=hermiticity_checker)
+
+    for slab in slabs:
+        sample_index_iterator_maker = make_index_iterator_maker(
+            n,
+            sampling_number,
+            periodicity_selection_parameter,
+            block_size,
+            slab,
+            canonical
+        )
+        yield ( slab,
+                process( sample_index_iterator_maker,
+                         output_dest = output_dest,
+                         with_timing_report = False,
+                         **process_options ) )
+
+
+def multiresolution_output_file_name(output_file_name, sampling_number):
+    """
+    Return the name of the output file for the results with the given
+    sampling number in a run with several of them: the `output_file_name`
+    formatted with `q` equal to the sampling number if it contains "{q}",
+    or else with ".q<sampling number>" inserted before the extension.
+    """
+    if "{q}" in output_file_name:
+        return output_file_name.format(q=sampling_number)
+
+    root, extension = splitext(output_file_name)
+    return "{}.q{}{}".format(root, sampling_number, extension)
+
+
+def criteria_output_file_name( output_file_name,
+                               eigenvalue_zero_threshold,
+                               interesting_signature_parameter ):
+    """
+    Return the name of the output file for the results selected by the
+    given zero threshold and signature parameter in a run with several of
+    them: the `output_file_name` formatted with `z` and `g` equal to them if
+    it contains "{z}" or "{g}", or else with ".z<threshold>.g<parameter>"
+    inserted before the extension.
+    """
+    if "{z}" in output_file_name or "{g}" in output_file_name:
+        return output_file_name.format( z = eigenvalue_zero_threshold,
+                                        g = interesting_signature_parameter )
+
+    root, extension = splitext(output_file_name)
+    return "{}.z{}.g{}{}".format( root,
+                                  eigenvalue_zero_threshold,
+                                  interesting_signature_parameter,
+                                  extension )
+
+
+def _open_output( output_file_name,
+                  record_dtype = None,
+                  parameters = None,
+                  output_size = None ):
+    """
+    Open the output file (or return `stdout` if `output_file_name` is
+    `None`): a .npy result file if `record_dtype` is given, or else a text
+    file.  If `output_size` is given, the existing file is truncated to this
+    size and appended to.
+    """
+    if record_dtype is not None:
+        return open_result_file( output_file_name,
+                                 record_dtype,
+                                 parameters,
+                                 output_size )
+
+    if output_size is not None:
+        output_dest = open(output_file_name, "r+")
+        output_dest.truncate(output_size)
+        output_dest.seek(0, SEEK_END)
+        return output_dest
+    elif output_file_name is not None:
+        return open(output_file_name, "w")
+    else:
+        return stdout
+
+
+def _close_output(output_dest, record_dtype=None):
+    if record_dtype is not None:
+        close_result_file(output_dest, record_dtype)
+    elif output_dest is not stdout:
+        output_dest.close()
+
+
+def _write_shard_metadata(output_specs, record_dtype, complete):
+    """
+    Write the metadata of the output files of a shard (see `go`), telling
+    whether the shard has been completed.
+    """
+    for output_file_name, parameters in output_specs.values():
+        metadata = dict(parameters, complete=complete)
+        if record_dtype is not None:
+            metadata["dtype"] = str(record_dtype)
+        write_metadata(output_file_name, metadata)
 
 
 def go( input_file_name,
@@ -14,16 +621,200 @@ def go( input_file_name,
         eigenvalue_zero_threshold,
         interesting_signature_parameter,
         periodicity_selection_parameter,
-        caution ):
+        caution,
+        block_size = None,
+        jobs = 1,
+        canonical = False,
+        coarse_sampling_number = None,
+        output_file_name = None,
+        output_format = "text",
+        checkpoint_file_name = None,
+        checkpoint_interval = 60,
+        resume = False,
+        cache_dir = None,
+        verification_jobs = 1,
+        eigenvalues_file_name = None,
+        progress_interval = None,
+        progress_file_name = None,
+        profile_file_name = None,
+        shard = None,
+        pipeline_threads = None,
+        pipeline_queue_depth = DEFAULT_QUEUE_DEPTH,
+        caution_interval = 1,
+        caution_random_fraction = 0.0,
+        **processing_options ):
+    """
+    Read the input, process the data and print out the results.  The
+    `processing_options` are passed to `make_data_processor`.
 
-    with open(input_file_name) as f:
-        data = load_json(f)
+    If `checkpoint_file_name` is given, the index space is processed in
+    slabs by the first index, and a checkpoint is saved after a slab at
+    most every `checkpoint_interval` seconds.  If `resume` is true, the
+    processing is resumed from the saved checkpoint, and the output written
+    after the checkpoint is discarded.  This requires `output_file_name`.
+
+    If `output_format` is "npy", the results are written as records to a
+    .npy file (see `storing`), which requires `output_file_name` and
+    `block_size`.  If it is "runs" or "regions", the results are written as
+    text lines of runs or regions of points with the same signature (see
+    `make_run_length_result_writer`), which requires `block_size`; the
+    regions also require a 2-dimensional grid without the periodicity
+    selection and a single slab of the first index (no `jobs`,
+    `checkpoint_file_name` or `shard`).
+
+    If `verification_precision` is among the `processing_options`, the
+    signatures at the points with suspicious eigenvalues are recomputed with
+    high precision.  In a serial run, this is done in `verification_jobs`
+    separate worker processes, so that the sampling does not wait for it;
+    with several `jobs`, every worker process does it for its own points.
+
+    If `coarse_sampling_number` is given, the data is processed with
+    `process_data_adaptively` starting from the grid with this number of
+    steps, which requires `block_size`.
+
+    If `sampling_numbers` is among the `processing_options`, the grid with
+    `sampling_number` steps, which must be the least common multiple of
+    them, is sampled once, and the results for every one of them are
+    written to a separate output file (see
+    `multiresolution_output_file_name`).
+
+    If `eigenvalue_zero_thresholds` or `interesting_signature_parameters`
+    are among the `processing_options`, the results for every combination
+    of them (see `selection_criteria`) are written to a separate output
+    file (see `criteria_output_file_name`).
+
+    If `eigenvalues_file_name` is given, the computed eigenvalues are saved
+    to this .npy file (see `make_eigenvalue_recorder`), so that they can be
+    analysed again with `go_from_eigenvalues`.  This requires `block_size`.
+
+    If `progress_interval` is given, progress records (see
+    `make_progress_reporter`) are logged at most every `progress_interval`
+    seconds to `stderr`, or as lines of JSON to the file
+    `progress_file_name` if it is given.  This is not done with
+    `coarse_sampling_number`.
+
+    If `profile_file_name` is given, the matrix sampler and the eigenvalue
+    solver are profiled with `cProfile` in a serial run, and the statistics
+    are saved to this file (see `pstats`).
+
+    If `cache_dir` is given, the input matrix compiled by `compile_matrix`
+    is looked up in and saved to the cache in this directory, so that later
+    runs with the same input do not need to parse it with SymPy.  The input
+    file can also be a compiled matrix saved by `go_compile`, in which case
+    it is used as is.
+
+    If `pipeline_threads` is given, the blocks of sample points are
+    sampled, solved in this number of threads and written out in a pipeline
+    (see `process_data_in_blocks`), in every worker process with several
+    `jobs`.  This requires `block_size`.  Like `jobs`, it does not change
+    the results, so it is not among the parameters of the run.
+
+    If `caution` is true and `block_size` is given, only every
+    `caution_interval`-th matrix of the sweep of the whole grid and a
+    random fraction `caution_random_fraction` of the others are checked
+    for being "almost" Hermitian (see `make_hermiticity_checker`), the same
+    ones with any number of `jobs`, and the worst discrepancy is reported
+    with the timing.
+
+    If `shard` is given as a pair (K, N), only the K-th of N slabs of the
+    first index (see `split_first_index_range`) is processed, so that the
+    N shards can be run separately (on different machines) and their
+    outputs merged with `merge_shard_outputs`.  This requires
+    `output_file_name`, whose metadata file (see `write_metadata`) records
+    the shard, the parameters and whether the shard has been completed.
+    """
+    with open(input_file_name, "rb") as f:
+        raw_data = f.read()
+
+    data = loads_json(raw_data.decode())
+
+    parameters = dict(
+        input_sha256 = sha256(raw_data).hexdigest(),
+        sampling_number = sampling_number,
+        eigenvalue_zero_threshold = eigenvalue_zero_threshold,
+        interesting_signature_parameter = interesting_signature_parameter,
+        periodicity_selection_parameter = periodicity_selection_parameter,
+        caution = caution,
+        canonical = canonical,
+        coarse_sampling_number = coarse_sampling_number,
+        output_format = output_format,
+        **processing_options
+    )
+
+    if shard is not None:
+        shard_index, shard_count = shard
+        if shard_count > sampling_number:
+            raise ValueError( "the number of shards must be at most the "
+                              "sampling number" )
+        parameters["shard"] = [shard_index, shard_count]
+        first_indices = split_first_index_range(
+            sampling_number,
+            shard_count
+        )[shard_index - 1]
+    else:
+        first_indices = range(1, sampling_number + 1)
 
     input_parsing_start_time = process_time()
 
-    indeterminates = symbols(data["indeterminates"])
+    if is_compiled_input(data):
+        if data.get("version") != COMPILED_MATRIX_VERSION:
+            raise ValueError( "the compiled input in '{}' has an unsupported "
+                              "format version".format(input_file_name) )
+        compiled_matrix = data
+    elif cache_dir is not None:
+        key = cache_key(data)
+        compiled_matrix = load_cached_matrix(cache_dir, key)
+    else:
+        compiled_matrix = None
 
-    e_mat = [[parse_expr(s) for s in row] for row in data["matrix"]]
+    # NOTE:  The Laurent polynomial coefficients are only needed for the FFT
+    #   and the tensor sampling, and the bandwidth only for the band storage
+    #   in blocks, and both expand every entry with SymPy, so they are
+    #   computed only when needed.  A cached matrix without them is compiled
+    #   again with them, keeping what it already has, and replaced in the
+    #   cache.
+    with_laurent_coefficients = (
+        processing_options.get("sampling_method") in ("fft", "tensor")
+    )
+
+    def needs_bandwidth(size):
+        return (
+            block_size is not None and
+            processing_options.get("solving_method") != "ldl" and
+            may_use_band_storage(
+                size,
+                processing_options.get("band_storage", "auto")
+            )
+        )
+
+    has_cached_laurent_coefficients = has_cached_bandwidth = False
+    if compiled_matrix is not None and not is_compiled_input(data):
+        has_cached_laurent_coefficients = all(
+            "laurent" in entry for entry in compiled_matrix["entries"]
+        )
+        has_cached_bandwidth = compiled_matrix["bandwidth"] is not None
+        if ( with_laurent_coefficients and
+             not has_cached_laurent_coefficients or
+             needs_bandwidth(compiled_matrix["size"]) and
+             not has_cached_bandwidth ):
+            compiled_matrix = None
+
+    if compiled_matrix is None:
+        indeterminates, e_mat = parse_input_data(data)
+        compiled_matrix = compile_matrix(
+            e_mat,
+            indeterminates,
+            with_laurent_coefficients = (
+                with_laurent_coefficients or has_cached_laurent_coefficients
+            ),
+            with_bandwidth = (
+                has_cached_bandwidth or needs_bandwidth(len(e_mat))
+            )
+        )
+        if cache_dir is not None:
+            store_cached_matrix(cache_dir, key, compiled_matrix)
+
+    n = len(compiled_matrix["indeterminates"])
 
     # TODO: use `logging` module instead of printing to `stderr`:
     #
@@ -33,28 +824,410 @@ def go( input_file_name,
            .format(process_time() - input_parsing_start_time),
            file = stderr )
 
-    initialization_start_time = process_time()
+    next_first_index = first_indices.start
+    timing = (0, 0, 0, 0)
 
-    matrix_sampler = make_matrix_sampler( e_mat,
-                                          indeterminates,
-                                          sampling_number )
+    if resume:
+        checkpoint = load_checkpoint(checkpoint_file_name)
+        if checkpoint["parameters"] != parameters:
+            raise ValueError( "the checkpoint in '{}' has been saved with "
+                              "different parameters or input"
+                              .format(checkpoint_file_name) )
+        next_first_index = checkpoint["next_first_index"]
+        timing = tuple(checkpoint["timing"])
 
-    sample_index_iterator_maker = make_sample_index_iterator_maker(
-        len(indeterminates),
-        sampling_number,
-        periodicity_selection_parameter
+        output_size = checkpoint["output_size"]
+
+    else:
+        output_size = None
+
+    if output_format == "npy":
+        record_dtype = result_dtype(n, sampling_number)
+    else:
+        record_dtype = None
+
+    if output_format in ("runs", "regions"):
+        run_length_format = output_format
+        if output_format == "regions" and n != 2:
+            raise ValueError( "the output format \"regions\" requires 2 "
+                              "indeterminates" )
+    else:
+        run_length_format = None
+
+    sampling_numbers = processing_options.get("sampling_numbers")
+
+    criteria = selection_criteria(
+        eigenvalue_zero_threshold,
+        interesting_signature_parameter,
+        processing_options.get("eigenvalue_zero_thresholds"),
+        processing_options.get("interesting_signature_parameters")
     )
 
-    # TODO: use `logging` module instead of printing to `stderr`
-    print( "Initialization took {:.3g}s."
-           .format(process_time() - initialization_start_time),
-           file = stderr )
+    # The names and the parameters of the output files by their keys
+    if len(criteria) > 1:
+        output_specs = {
+            (z, g): ( criteria_output_file_name(output_file_name, z, g),
+                      dict( parameters,
+                            eigenvalue_zero_threshold = z,
+                            interesting_signature_parameter = g ) )
+            for z, g in criteria
+        }
+    elif sampling_numbers is None:
+        output_specs = {None: (output_file_name, parameters)}
+    else:
+        output_specs = {
+            q: ( multiresolution_output_file_name(output_file_name, q),
+                 dict(parameters, sampling_number=q) )
+            for q in sampling_numbers
+        }
+
+    output_dest = {
+        key: _open_output( name,
+                           record_dtype,
+                           output_parameters,
+                           output_size if key is None else None )
+        for key, (name, output_parameters) in output_specs.items()
+    }
+    if None in output_dest:
+        output_dest = output_dest[None]
+
+    if shard is not None:
+        _write_shard_metadata(output_specs, record_dtype, complete=False)
+
+    completed = False
+
+    verification_pool = None
+
+    if eigenvalues_file_name is not None:
+        eigenvalue_dtype = eigenvalue_record_dtype( n,
+                                                    sampling_number,
+                                                    compiled_matrix["size"] )
+        eigenvalues_dest = open_result_file( eigenvalues_file_name,
+                                             eigenvalue_dtype,
+                                             parameters )
+        process_options = dict(eigenvalue_recorder=make_eigenvalue_recorder(
+            eigenvalues_dest,
+            eigenvalue_dtype
+        ))
+    else:
+        process_options = {}
 
-    process_data( matrix_sampler,
-                  sample_index_iterator_maker,
-                  eigenvalue_zero_threshold,
-                  interesting_signature_parameter,
-                  caution = caution )
+    if caution and block_size is not None:
+        hermiticity_check_options = dict(
+            check_interval = caution_interval,
+            random_fraction = caution_random_fraction,
+            seed = getrandbits(64),
+            steps = sampling_number
+        )
+        hermiticity_checker = make_hermiticity_checker(
+            **hermiticity_check_options
+        )
+        process_options["hermiticity_checker"] = hermiticity_checker
+    else:
+        hermiticity_check_options = hermiticity_checker = None
+
+    if profile_file_name is not None:
+        # NOTE: putting imports here seems to be against Style Guide for
+        #   Python Code (PEP 8)
+        from cProfile import Profile
+
+        profiler = Profile()
+    else:
+        profiler = None
+
+    if profiler is not None or progress_interval is not None:
+        instrument, get_stage_totals = make_stage_instrumenter(profiler)
+    else:
+        instrument = get_stage_totals = None
+
+    if progress_interval is not None:
+        progress_handler = add_progress_handler(progress_file_name)
+        report_progress = make_progress_reporter(
+            count_sample_indices( n,
+                                  sampling_number,
+                                  periodicity_selection_parameter,
+                                  range(next_first_index, first_indices.stop),
+                                  canonical,
+                                  sampling_numbers ),
+            progress_interval,
+            get_stage_totals
+        )
+    else:
+        report_progress = None
+
+    try:
+        if coarse_sampling_number is not None:
+            initialization_start_time = process_time()
+
+            matrix_sampler, eigenvalue_solver, bandwidth = (
+                make_batch_processing_tools(
+                    compiled_matrix,
+                    sampling_number,
+                    eigenvalue_zero_threshold,
+                    **{ name: processing_options[name]
+                        for name in ( "sampling_method",
+                                      "solving_method",
+                                      "band_storage" )
+                        if name in processing_options }
+                )
+            )
+
+            print( "Initialization took {:.3g}s."
+                   .format(process_time() - initialization_start_time),
+                   file = stderr )
+
+            process_data_adaptively( matrix_sampler,
+                                     n,
+                                     sampling_number,
+                                     coarse_sampling_number,
+                                     eigenvalue_zero_threshold,
+                                     interesting_signature_parameter,
+                                     block_size,
+                                     output_dest = output_dest,
+                                     eigenvalue_solver = eigenvalue_solver,
+                                     bandwidth = bandwidth,
+                                     record_dtype = record_dtype )
+            completed = True
+            return
+
+        if jobs > 1:
+            # NOTE:  The worker processes initialize their own samplers from
+            #   the compiled matrix, so that no functions need to be
+            #   pickled.
+            from .parallelising import process_slabs_in_pool
+
+            def make_slab_result_iterator(slabs):
+                return process_slabs_in_pool(
+                    jobs,
+                    compiled_matrix,
+                    sampling_number,
+                    periodicity_selection_parameter,
+                    block_size,
+                    canonical,
+                    dict( eigenvalue_zero_threshold =
+                              eigenvalue_zero_threshold,
+                          interesting_signature_parameter =
+                              interesting_signature_parameter,
+                          caution = caution,
+                          record_dtype = record_dtype,
+                          run_length_format = run_length_format,
+                          pipeline_threads = pipeline_threads,
+                          pipeline_queue_depth = pipeline_queue_depth,
+                          **processing_options ),
+                    slabs,
+                    output_dest = output_dest,
+                    hermiticity_check_options = hermiticity_check_options,
+                    hermiticity_checker = hermiticity_checker
+                )
+
+        else:
+            initialization_start_time = process_time()
+
+            if processing_options.get("verification_precision") is not None:
+                verification_pool = make_verification_pool(
+                    verification_jobs,
+                    compiled_matrix,
+                    sampling_number,
+                    eigenvalue_zero_threshold,
+                    processing_options["verification_precision"]
+                )
+
+            process = make_data_processor( compiled_matrix,
+                                           sampling_number,
+                                           periodicity_selection_parameter,
+                                           eigenvalue_zero_threshold,
+                                           interesting_signature_parameter,
+                                           caution = caution,
+                                           block_size = block_size,
+                                           record_dtype = record_dtype,
+                                           run_length_format =
+                                               run_length_format,
+                                           verification_pool =
+                                               verification_pool,
+                                           instrument = instrument,
+                                           pipeline_threads =
+                                               pipeline_threads,
+                                           pipeline_queue_depth =
+                                               pipeline_queue_depth,
+                                           **processing_options )
+
+            # TODO: use `logging` module instead of printing to `stderr`
+            print( "Initialization took {:.3g}s."
+                   .format(process_time() - initialization_start_time),
+                   file = stderr )
+
+            if checkpoint_file_name is None:
+                sample_index_iterator_maker = make_index_iterator_maker(
+                    n,
+                    sampling_number,
+                    periodicity_selection_parameter,
+                    block_size,
+                    first_indices = first_indices,
+                    canonical = canonical,
+                    sampling_numbers = sampling_numbers
+                )
+
+                process( sample_index_iterator_maker,
+                         output_dest = output_dest,
+                         progress_reporter = report_progress,
+                         **process_options )
+                completed = True
+                return
+
+            def make_slab_result_iterator(slabs):
+                return _process_slabs( process,
+                                       n,
+                                       sampling_number,
+                                       periodicity_selection_parameter,
+                                       block_size,
+                                       canonical,
+                                       slabs,
+                                       output_dest = output_dest,
+                                       hermiticity_checker =
+                                           hermiticity_checker )
+
+        # NOTE:  The finest slabs are used, to lose as little work as
+        #   possible when resuming from a checkpoint, and to bound the
+        #   output of a slab kept in memory by a worker process (see
+        #   `process_slabs_in_pool`).
+        slabs = [ range(i1, i1 + 1)
+                  for i1 in range(next_first_index, first_indices.stop) ]
+
+        if checkpoint_file_name is None:
+            checkpointer = None
+        else:
+            checkpointer = make_checkpointer( checkpoint_file_name,
+                                              parameters,
+                                              output_dest,
+                                              checkpoint_interval )
+
+        point_count = 0
+        for slab, slab_timing in make_slab_result_iterator(slabs):
+            timing = tuple(t + dt for t, dt in zip(timing, slab_timing))
+            if checkpointer is not None:
+                checkpointer(slab.stop, timing)
+            if report_progress is not None and point_count is not None:
+                slab_point_count = count_sample_indices(
+                    n,
+                    sampling_number,
+                    periodicity_selection_parameter,
+                    slab,
+                    canonical,
+                    sampling_numbers
+                )
+                if slab_point_count is None:
+                    point_count = None
+                else:
+                    point_count += slab_point_count
+                    report_progress(point_count, None, timing)
+
+        if report_progress is not None and point_count is not None:
+            report_progress(point_count, None, timing, final=True)
+
+        if checkpointer is not None:
+            checkpointer(first_indices.stop, timing, force=True)
+
+        # NOTE:  With worker processes, the reported times are the sums of
+        #   the processor times of all of them.
+        report_timing(*timing)
+        if hermiticity_checker is not None:
+            _, get_hermiticity_check_summary, _ = hermiticity_checker
+            report_hermiticity_check(get_hermiticity_check_summary())
+
+        completed = True
+
+    finally:
+        if verification_pool is not None:
+            verification_pool.shutdown()
+
+        if eigenvalues_file_name is not None:
+            close_result_file(eigenvalues_dest, eigenvalue_dtype)
+
+        if progress_interval is not None:
+            remove_progress_handler(progress_handler)
+
+        if profiler is not None:
+            profiler.dump_stats(profile_file_name)
+
+        if isinstance(output_dest, dict):
+            for dest in output_dest.values():
+                _close_output(dest, record_dtype)
+        else:
+            _close_output(output_dest, record_dtype)
+
+        if shard is not None and completed:
+            _write_shard_metadata(output_specs, record_dtype, complete=True)
+
+
+def go_from_eigenvalues( eigenvalues_file_name,
+                         eigenvalue_zero_threshold,
+                         interesting_signature_parameter,
+                         block_size = 4096,
+                         output_file_name = None,
+                         output_format = "text",
+                         eigenvalue_zero_thresholds = None,
+                         interesting_signature_parameters = None ):
+    """
+    Read the eigenvalues saved by `go` with `eigenvalues_file_name`, and
+    analyse them and print out the results as `go` does, possibly with
+    other zero thresholds and signature parameters, without sampling the
+    matrices again.
+    """
+    eigenvalue_records, metadata = load_results(eigenvalues_file_name)
+    n = eigenvalue_records["inds"].shape[1]
+
+    parameters = dict(
+        metadata,
+        eigenvalue_zero_threshold = eigenvalue_zero_threshold,
+        interesting_signature_parameter = interesting_signature_parameter,
+        eigenvalue_zero_thresholds = eigenvalue_zero_thresholds,
+        interesting_signature_parameters = interesting_signature_parameters,
+        output_format = output_format
+    )
+    del parameters["dtype"]
+
+    if output_format == "npy":
+        record_dtype = result_dtype(n, metadata["sampling_number"])
+    else:
+        record_dtype = None
+
+    criteria = selection_criteria( eigenvalue_zero_threshold,
+                                   interesting_signature_parameter,
+                                   eigenvalue_zero_thresholds,
+                                   interesting_signature_parameters )
+
+    if len(criteria) > 1:
+        output_dests = {
+            (z, g): _open_output( criteria_output_file_name(
+                                      output_file_name,
+                                      z,
+                                      g
+                                  ),
+                                  record_dtype,
+                                  dict( parameters,
+                                        eigenvalue_zero_threshold = z,
+                                        interesting_signature_parameter = g ) )
+            for z, g in criteria
+        }
+    else:
+        output_dests = {
+            criteria[0]: _open_output( output_file_name,
+                                       record_dtype,
+                                       parameters )
+        }
+
+    try:
+        process_stored_eigenvalues(
+            eigenvalue_records,
+            make_criteria_classifier( criteria,
+                                      output_dests,
+                                      record_dtype = record_dtype ),
+            block_size
+        )
+
+    finally:
+        for dest in output_dests.values():
+            _close_output(dest, record_dtype)
 
 
 # *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
@@ -67,8 +1240,45 @@ if __name__ == "__main__":
     from ._basic_testing_tools import run_and_time
 
     def _basic_tests():
-        # TODO: implement
-        assert False
+        from io import StringIO
+
+        indeterminates, e_mat = parse_input_data(
+            { "indeterminates": "s t",
+              "matrix": [ ["-1 - s - t - s*t", "s + s*t", "0"],
+                          ["1 + t", "-1 - s - t - s*t", "s + s*t"],
+                          ["0", "1 + t", "-1 - s - t - s*t"] ] }
+        )
+        compiled_matrix = compile_matrix(e_mat, indeterminates)
+        steps = 6
+
+        for r in [None, 2]:
+            outputs = []
+            for block_size, processing_options in [
+                (None, {}),
+                (1, {}),
+                (7, {}),
+                (7, dict(band_storage = "always")),
+                (1000, dict(sampling_method = "tensor"))
+            ]:
+                output_dest = StringIO()
+                process = make_data_processor( compiled_matrix,
+                                               steps,
+                                               r,
+                                               1e-12,
+                                               None,
+                                               caution = True,
+                                               block_size = block_size,
+                                               **processing_options )
+                process( make_index_iterator_maker( 2,
+                                                    steps,
+                                                    r,
+                                                    block_size ),
+                         output_dest = output_dest,
+                         message_output_dest = StringIO(),
+                         with_timing_report = False )
+                outputs.append(output_dest.getvalue())
+            assert outputs[0]
+            assert all(output == outputs[0] for output in outputs)
 
     t = run_and_time(_basic_tests)
     print("The module passed basic tests in {:.3g}s.".format(t))
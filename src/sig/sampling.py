@@ -2,12 +2,24 @@ import numpy as nmp
 from functools import reduce
 from math import pi
 from operator import mul
-from sympy.utilities import lambdify
 
+from .compiling import ( compile_matrix,
+                         entry_functions,
+                         entry_laurent_coefficients )
+
+
+# The maximal memory size in bytes of the values of the entries computed in
+# advance by the FFT sampling (see `make_compiled_fft_batch_matrix_sampler`)
+FFT_MEMORY_LIMIT = 2**30
 
-def make_matrix_sampler(e_mat, indeterminates, steps):
 
-    # Build look-up tables t1, t2, t3
+def _make_look_up_tables(steps):
+    """
+    Build look-up tables t1, t2, t3 indexed by the sampling indices:
+    `t1[i]` is the value of a parameter on the unit circle, `t2[i]` is the
+    value substituted into the input polynomials (`s = -1/a`), and `t3[i]`
+    is the corresponding factor `1 - a` of the scaling.
+    """
     t0 = nmp.exp(nmp.linspace(0, pi, steps + 1)[1:steps]*1j)
     t0 /= nmp.abs(t0)
 
@@ -20,16 +32,23 @@ def make_matrix_sampler(e_mat, indeterminates, steps):
     t2 = -nmp.conj(t1)
     t3 = -t1 + 1
 
+    return (t1, t2, t3)
+
+
+def make_compiled_matrix_sampler(compiled_matrix, steps):
+    """
+    Make a matrix sampler from a compiled matrix (see `compile_matrix`).
+    """
+    _, t2, t3 = _make_look_up_tables(steps)
+
     def zero_func(*_): return 0
 
-    # Using `zero_func` for zeros is faster
-    def func_from_expr(e):
-        if e:
-            return lambdify(indeterminates, e)
-        else:
-            return zero_func
+    k = compiled_matrix["size"]
 
-    f_mat = [[func_from_expr(e) for e in row] for row in e_mat]
+    # Using `zero_func` for zeros is faster
+    f_mat = [[zero_func]*k for _ in range(k)]
+    for j, l, f in entry_functions(compiled_matrix):
+        f_mat[j][l] = f
 
     def matrix_sampler(inds):
         vals = tuple(t2[i] for i in inds)
@@ -41,6 +60,421 @@ def make_matrix_sampler(e_mat, indeterminates, steps):
     return matrix_sampler
 
 
+def make_matrix_sampler(e_mat, indeterminates, steps):
+
+    return make_compiled_matrix_sampler(
+        compile_matrix( e_mat,
+                        indeterminates,
+                        with_laurent_coefficients = False,
+                        with_bandwidth = False ),
+        steps
+    )
+
+
+def bands_to_dense(bands):
+    """
+    Convert a stack of matrices of shape (batch, 2*b + 1, k) in the LAPACK
+    general band storage, where `bands[:, b + j - l, l]` is the (j, l)
+    entry, into a stack of dense matrices of shape (batch, k, k).
+    """
+    batch, width, k = bands.shape
+    b = width//2
+    mats = nmp.zeros((batch, k, k), dtype=bands.dtype)
+    for d in range(-b, b + 1):
+        js = nmp.arange(max(0, d), min(k, k + d))
+        mats[:, js, js - d] = bands[:, b + d, js - d]
+    return mats
+
+
+def hermitize_bands(bands):
+    """
+    Compute the sums M + M^H of the matrices M of a stack of matrices in the
+    LAPACK general band storage (see `bands_to_dense`).  Return them as an
+    array of shape (batch, b + 1, k) in the upper Hermitian band storage
+    used by `scipy.linalg.eig_banded`, where `upper[:, b + j - l, l]` is
+    the (j, l) entry for j <= l.
+    """
+    b = bands.shape[1]//2
+    k = bands.shape[2]
+    upper = bands[:, :(b + 1), :].copy()
+    for d in range(b + 1):
+        # The (l, j) entry of M for j = l - d is `bands[:, b + d, j]`
+        upper[:, b - d, d:] += nmp.conj(bands[:, b + d, :(k - d)])
+    return upper
+
+
+def _make_monomial_evaluator(exponents, steps):
+    """
+    Make a function that takes an integer array of shape (batch, n) of
+    index n-uples and returns the array of shape (batch, m) of the values
+    of the m monomials with the given array of exponents of shape (m, n)
+    at the corresponding sample points.  The values are computed from the
+    tables of the powers `t2[i]**e` (see `_make_look_up_tables`) for every
+    exponent `e` that occurs, which are shared by all the monomials.
+    """
+    _, t2, _ = _make_look_up_tables(steps)
+
+    power_tables = []
+    for variable_exponents in exponents.T:
+        powers, power_inds = nmp.unique( variable_exponents,
+                                         return_inverse = True )
+        power_tables.append((t2[:, None]**powers, power_inds.ravel()))
+
+    def monomial_evaluator(inds_block):
+        vals = None
+        for (table, power_inds), inds in zip(power_tables, inds_block.T):
+            # NOTE: negative indices are taken modulo the size of the table
+            factors = table[nmp.ix_(inds, power_inds)]
+            if vals is None:
+                vals = factors
+            else:
+                vals *= factors
+        return vals
+
+    return monomial_evaluator
+
+
+def _make_batch_matrix_sampler_from_entries( k, steps,
+                                             f_entries,
+                                             grid_entries = None,
+                                             bandwidth = None,
+                                             tensor_entries = None ):
+    """
+    Make a batch matrix sampler of k-by-k matrices from a list of triples
+    `(j, l, f)`, where `f` is a function of the values of the
+    indeterminates that can be evaluated on NumPy arrays.  The entries
+    whose values on the grid of sample points are computed in advance can
+    be given by a pair `grid_entries` of the list of their positions
+    `(j, l)`, which must be within the band if `bandwidth` is given, and a
+    function that takes an integer array of shape (batch, n) of index
+    n-uples and returns the array of shape (batch, number of positions) of
+    the values of the entries at these points.  The entries can also be
+    given by a triple `tensor_entries` of the list of their positions
+    `(j, l)`, a monomial evaluator (see `_make_monomial_evaluator`) and the
+    array of shape (m, number of positions) of the coefficients of the m
+    monomials in the entries.  The (j, l) entries not listed are zero.  If
+    `bandwidth` is given, the sampler returns the matrices in the LAPACK
+    general band storage (see `bands_to_dense`), and the entries outside of
+    the band are ignored.
+    """
+    _, t2, t3 = _make_look_up_tables(steps)
+
+    if grid_entries is not None:
+        grid_positions, evaluate_grid_entries = grid_entries
+
+    if tensor_entries is not None:
+        positions, evaluate_monomials, coefficient_tensor = tensor_entries
+
+    if bandwidth is None:
+        shape = (k, k)
+    else:
+        shape = (2*bandwidth + 1, k)
+        f_entries = [ (bandwidth + j - l, l, f)
+                      for j, l, f in f_entries
+                      if abs(j - l) <= bandwidth ]
+        if grid_entries is not None:
+            grid_positions = [ (bandwidth + j - l, l)
+                               for j, l in grid_positions ]
+        if tensor_entries is not None:
+            in_band = [ abs(j - l) <= bandwidth for j, l in positions ]
+            positions = [ (bandwidth + j - l, l)
+                          for (j, l), b in zip(positions, in_band) if b ]
+            coefficient_tensor = coefficient_tensor[:, in_band]
+
+    if grid_entries is not None and grid_positions:
+        grid_flat_inds = nmp.ravel_multi_index( tuple(zip(*grid_positions)),
+                                                shape )
+    else:
+        grid_entries = None
+
+    if tensor_entries is not None and positions:
+        tensor_rows, tensor_columns = (list(c) for c in zip(*positions))
+    else:
+        tensor_entries = None
+
+    def batch_matrix_sampler(inds_block):
+        inds_block = nmp.asarray(inds_block, dtype=int)
+        if inds_block.ndim == 1:
+            inds_block = inds_block.reshape(-1, 1)
+
+        mats = nmp.zeros((inds_block.shape[0],) + shape, dtype=complex)
+
+        if f_entries:
+            vals = [t2[inds] for inds in inds_block.T]
+            for j, l, f in f_entries:
+                # NOTE: constant entries evaluate to scalars, which are
+                #   broadcast by the assignment
+                mats[:, j, l] = f(*vals)
+
+        if grid_entries is not None:
+            # NOTE:  This is faster than assigning to `mats` with two index
+            #   lists.
+            nmp.put_along_axis( mats.reshape(len(mats), -1),
+                                nmp.broadcast_to( grid_flat_inds,
+                                                  (len(mats),
+                                                   len(grid_flat_inds)) ),
+                                evaluate_grid_entries(inds_block),
+                                axis = 1 )
+
+        if tensor_entries is not None:
+            mats[:, tensor_rows, tensor_columns] = (
+                evaluate_monomials(inds_block) @ coefficient_tensor
+            )
+
+        # Multiply the factors in the same order as `matrix_sampler` does
+        scale = t3[inds_block[:, 0]]
+        for inds in inds_block.T[1:]:
+            scale = scale*t3[inds]
+        mats *= scale[:, None, None]
+
+        return mats
+
+    return batch_matrix_sampler
+
+
+def make_compiled_batch_matrix_sampler( compiled_matrix, steps,
+                                        bandwidth = None ):
+    """
+    Make a function that computes a whole block of sample matrices at
+    once from a compiled matrix (see `compile_matrix`).  The function takes
+    an integer array of shape (batch, n) whose rows are index n-uples (as
+    yielded by a sample index iterator) and returns a C-contiguous complex
+    array of shape (batch, k, k), or of shape (batch, 2*bandwidth + 1, k) in
+    the LAPACK general band storage if `bandwidth` is given (see
+    `bands_to_dense`).
+
+    Every nonzero entry is evaluated with NumPy broadcasting over the
+    columns of the index array, and the scaling by (1-a)(1-b)... is applied
+    to the whole block at once.
+    """
+    return _make_batch_matrix_sampler_from_entries(
+        compiled_matrix["size"],
+        steps,
+        entry_functions(compiled_matrix),
+        bandwidth = bandwidth
+    )
+
+
+def make_batch_matrix_sampler( e_mat, indeterminates, steps,
+                               bandwidth = None ):
+    """
+    Do the same as `make_compiled_batch_matrix_sampler` for a matrix of
+    SymPy expressions in `indeterminates`.
+    """
+    return make_compiled_batch_matrix_sampler(
+        compile_matrix( e_mat,
+                        indeterminates,
+                        with_laurent_coefficients = False,
+                        with_bandwidth = False ),
+        steps,
+        bandwidth
+    )
+
+
+def make_compiled_fft_batch_matrix_sampler( compiled_matrix, steps,
+                                            bandwidth = None ):
+    """
+    Make a batch matrix sampler (see `make_compiled_batch_matrix_sampler`)
+    that computes the values of every Laurent polynomial entry on the grid
+    of sample points in advance with FFT.  Other nonzero entries are
+    evaluated as by `make_compiled_batch_matrix_sampler`.  The matrix must
+    have been compiled with the Laurent polynomial coefficients.
+
+    The sample points are the (2*steps)-th roots of unity, and the value of
+    `s**e` at `s = -1/a`, `a = exp(2*pi*i*p/(2*steps))`, is
+    `(-1)**e * exp(-2*pi*i*p*e/(2*steps))`, so the values of a Laurent
+    polynomial on the grid form the discrete Fourier transform of its
+    (sign-adjusted) array of coefficients, with the exponents taken modulo
+    2*steps.  Only the last n-1 dimensions are transformed in advance, for
+    every exponent of the first indeterminate occurring in the entries, and
+    the values on a row of the grid with a given first index are summed
+    over these exponents when a block of sample points needs them.  Every
+    such entry thus takes m*(2*steps)**(n-1) complex numbers of memory,
+    where m is the number of the distinct exponents of the first
+    indeterminate in the matrix, and the rows of the last block are kept
+    for the next one.  Raise `ValueError` if the transformed entries would
+    take more than `FFT_MEMORY_LIMIT` bytes.
+    """
+    n = len(compiled_matrix["indeterminates"])
+    grid_size = 2*steps
+
+    f_entries = []
+    positions = []
+    coeffs_list = []
+
+    for (j, l, f), (_, _, coeffs) in zip(
+        entry_functions(compiled_matrix),
+        entry_laurent_coefficients(compiled_matrix)
+    ):
+        if coeffs is None:
+            f_entries.append((j, l, f))
+        elif bandwidth is None or abs(j - l) <= bandwidth:
+            positions.append((j, l))
+            coeffs_list.append(coeffs)
+
+    first_exponents = nmp.unique(
+        nmp.concatenate( [nmp.zeros(0, dtype=int)] +
+                         [exponents[:, 0] for exponents, _ in coeffs_list] ) %
+        grid_size
+    )
+
+    memory_size = 16*grid_size**(n - 1)*len(first_exponents)*len(positions)
+    if memory_size > FFT_MEMORY_LIMIT:
+        raise ValueError( "the FFT sampling would take {:.3g} GB of memory "
+                          "for the values of the entries, use the tensor "
+                          "sampling instead".format(memory_size/2**30) )
+
+    # NOTE:  The entries are along the last axis, so that the values of the
+    #   entries at a sample point are contiguous.
+    grid = nmp.zeros( (grid_size,)*(n - 1) +
+                      (len(first_exponents), len(positions)),
+                      dtype = complex )
+    for position_ind, (exponents, coefficients) in enumerate(coeffs_list):
+        coefficients = nmp.where( exponents.sum(axis=1) % 2,
+                                  -coefficients,
+                                  coefficients )
+        nmp.add.at( grid,
+                    tuple((exponents[:, 1:] % grid_size).T) +
+                    ( nmp.searchsorted( first_exponents,
+                                        exponents[:, 0] % grid_size ),
+                      position_ind ),
+                    coefficients )
+    if n > 1:
+        grid = nmp.fft.fftn(grid, axes=range(n - 1))
+
+    # The factors exp(-2*pi*i*p*e/(2*steps)) by the first index p and the
+    # exponent e of the first indeterminate
+    phases = nmp.exp( nmp.outer(nmp.arange(grid_size), first_exponents)*
+                      (-2j*pi/grid_size) )
+
+    # The values of the entries on the rows of the grid with the first
+    # indices of the last block
+    rows = {}
+
+    def evaluate_grid_entries(inds_block):
+        nonlocal rows
+
+        first_inds = inds_block[:, 0]
+        order = nmp.argsort(first_inds, kind="stable")
+        row_first_inds, row_starts = nmp.unique( first_inds[order],
+                                                 return_index = True )
+
+        block_rows = {}
+        vals = nmp.empty((len(inds_block), len(positions)), dtype=complex)
+        for i1, start, end in zip( row_first_inds.tolist(),
+                                   row_starts.tolist(),
+                                   [*row_starts[1:].tolist(), len(order)] ):
+            row = rows.get(i1)
+            if row is None:
+                row = nmp.tensordot(phases[i1], grid, axes=(0, n - 1))
+            block_rows[i1] = row
+            # NOTE: negative indices are taken modulo the size of the grid
+            row_inds = order[start:end]
+            vals[row_inds] = row[tuple(inds_block[row_inds, 1:].T)]
+        rows = block_rows
+
+        return vals
+
+    return _make_batch_matrix_sampler_from_entries(
+        compiled_matrix["size"],
+        steps,
+        f_entries,
+        grid_entries = (positions, evaluate_grid_entries),
+        bandwidth = bandwidth
+    )
+
+
+def make_fft_batch_matrix_sampler( e_mat, indeterminates, steps,
+                                   bandwidth = None ):
+    """
+    Do the same as `make_compiled_fft_batch_matrix_sampler` for a matrix of
+    SymPy expressions in `indeterminates`.
+    """
+    return make_compiled_fft_batch_matrix_sampler(
+        compile_matrix(e_mat, indeterminates),
+        steps,
+        bandwidth
+    )
+
+
+def make_compiled_tensor_batch_matrix_sampler( compiled_matrix, steps,
+                                               bandwidth = None ):
+    """
+    Make a batch matrix sampler (see `make_compiled_batch_matrix_sampler`)
+    that expands all the Laurent polynomial entries of the matrix into one
+    array of the coefficients of all the distinct monomials occurring in
+    them, of shape (number of monomials, number of such entries).  A block
+    of matrices is then computed as one matrix product of the array of the
+    values of the monomials at the sample points, taken from shared tables
+    of powers (see `_make_monomial_evaluator`), by this array.  Other
+    nonzero entries are evaluated as by `make_compiled_batch_matrix_sampler`.
+    The matrix must have been compiled with the Laurent polynomial
+    coefficients.
+
+    Unlike `make_compiled_fft_batch_matrix_sampler`, this computes only the
+    sample points asked for, and takes no memory proportional to the size
+    of the grid, so it suits sparse sets of points, like those selected
+    with a periodicity parameter.
+    """
+    n = len(compiled_matrix["indeterminates"])
+
+    f_entries = []
+    positions = []
+    exponents_list = [nmp.zeros((0, n), dtype=int)]
+    coefficients_list = [nmp.zeros(0, dtype=complex)]
+    position_inds_list = [nmp.zeros(0, dtype=int)]
+
+    for (j, l, f), (_, _, coeffs) in zip(
+        entry_functions(compiled_matrix),
+        entry_laurent_coefficients(compiled_matrix)
+    ):
+        if coeffs is None:
+            f_entries.append((j, l, f))
+            continue
+
+        exponents, coefficients = coeffs
+        exponents_list.append(exponents)
+        coefficients_list.append(coefficients)
+        position_inds_list.append(nmp.full(len(coefficients), len(positions)))
+        positions.append((j, l))
+
+    monomial_exponents, monomial_inds = nmp.unique(
+        nmp.concatenate(exponents_list),
+        axis = 0,
+        return_inverse = True
+    )
+    coefficient_tensor = nmp.zeros( (len(monomial_exponents), len(positions)),
+                                    dtype = complex )
+    nmp.add.at( coefficient_tensor,
+                ( monomial_inds.ravel(),
+                  nmp.concatenate(position_inds_list) ),
+                nmp.concatenate(coefficients_list) )
+
+    return _make_batch_matrix_sampler_from_entries(
+        compiled_matrix["size"],
+        steps,
+        f_entries,
+        bandwidth = bandwidth,
+        tensor_entries = ( positions,
+                           _make_monomial_evaluator( monomial_exponents,
+                                                     steps ),
+                           coefficient_tensor )
+    )
+
+
+def make_tensor_batch_matrix_sampler( e_mat, indeterminates, steps,
+                                      bandwidth = None ):
+    """
+    Do the same as `make_compiled_tensor_batch_matrix_sampler` for a matrix
+    of SymPy expressions in `indeterminates`.
+    """
+    return make_compiled_tensor_batch_matrix_sampler(
+        compile_matrix(e_mat, indeterminates),
+        steps,
+        bandwidth
+    )
+
+
 # *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
 # --------------------------------------------------------------------------
 # ## Basic testing
@@ -51,8 +485,104 @@ if __name__ == "__main__":
     from ._basic_testing_tools import run_and_time
 
     def _basic_tests():
-        # TODO: implement
-        assert False
+        from sympy import symbols
+        from sympy.parsing.sympy_parser import parse_expr
+        from .compiling import matrix_bandwidth
+        indeterminates = symbols("s t")
+        e_mat = [ [parse_expr(s) for s in row]
+                  for row in [ ["-1 - s - t - s*t", "s + s*t", "0"],
+                               ["1 + t", "-1 - s - t - s*t", "s + s*t"],
+                               ["0", "1 + t", "-1 - s - t - s*t"] ] ]
+        steps = 7
+        matrix_sampler = make_matrix_sampler(e_mat, indeterminates, steps)
+        batch_matrix_sampler = make_batch_matrix_sampler( e_mat,
+                                                          indeterminates,
+                                                          steps )
+        inds_block = nmp.array([(1, 1), (3, -2), (7, 7), (2, -6)])
+        mats = batch_matrix_sampler(inds_block)
+        assert mats.shape == (4, 3, 3)
+        assert mats.flags.c_contiguous
+        for inds, mat in zip(inds_block, mats):
+            assert nmp.allclose(mat, matrix_sampler(tuple(inds)))
+        fft_batch_matrix_sampler = make_fft_batch_matrix_sampler(
+            e_mat,
+            indeterminates,
+            steps
+        )
+        assert nmp.allclose(fft_batch_matrix_sampler(inds_block), mats)
+        # The rows of the last block are reused
+        assert nmp.allclose( fft_batch_matrix_sampler(inds_block[::-1]),
+                             mats[::-1] )
+        assert nmp.allclose( make_fft_batch_matrix_sampler(
+                                 e_mat,
+                                 indeterminates,
+                                 steps,
+                                 bandwidth = 1
+                             )(inds_block),
+                             make_batch_matrix_sampler(
+                                 e_mat,
+                                 indeterminates,
+                                 steps,
+                                 bandwidth = 1
+                             )(inds_block) )
+        tensor_batch_matrix_sampler = make_tensor_batch_matrix_sampler(
+            e_mat,
+            indeterminates,
+            steps
+        )
+        assert nmp.allclose(tensor_batch_matrix_sampler(inds_block), mats)
+        assert nmp.allclose( make_tensor_batch_matrix_sampler(
+                                 e_mat,
+                                 indeterminates,
+                                 steps,
+                                 bandwidth = 1
+                             )(inds_block),
+                             make_batch_matrix_sampler(
+                                 e_mat,
+                                 indeterminates,
+                                 steps,
+                                 bandwidth = 1
+                             )(inds_block) )
+        u = symbols("u")
+        for other_indeterminates, other_e_mat, other_inds_block in [
+            ( (u,),
+              [ [parse_expr("u + 1/u"), parse_expr("2 - u**3")],
+                [parse_expr("1"), parse_expr("u**2 + 3*u")] ],
+              nmp.array([(1,), (4,), (-3,), (7,)]) ),
+            ( indeterminates + (u,),
+              [ [parse_expr("s*t*u - 1"), parse_expr("s/u + t**2")],
+                [parse_expr("1 + t*u"), parse_expr("s**2 + 1/t")] ],
+              nmp.array([(1, 1, 1), (3, -2, 5), (7, 7, -6), (2, -6, 0)]) )
+        ]:
+            assert nmp.allclose( make_fft_batch_matrix_sampler(
+                                     other_e_mat,
+                                     other_indeterminates,
+                                     steps
+                                 )(other_inds_block),
+                                 make_batch_matrix_sampler(
+                                     other_e_mat,
+                                     other_indeterminates,
+                                     steps
+                                 )(other_inds_block) )
+        try:
+            make_fft_batch_matrix_sampler( e_mat,
+                                           indeterminates + (u,),
+                                           2**20 )
+        except ValueError:
+            pass
+        else:
+            assert False
+        assert matrix_bandwidth(e_mat) == 1
+        bands = make_batch_matrix_sampler( e_mat,
+                                           indeterminates,
+                                           steps,
+                                           bandwidth = 1 )(inds_block)
+        assert bands.shape == (4, 3, 3)
+        assert nmp.allclose(bands_to_dense(bands), mats)
+        hmats = mats + mats.conj().swapaxes(-1, -2)
+        upper = hermitize_bands(bands)
+        assert nmp.allclose(upper[:, 1, :], hmats[:, [0, 1, 2], [0, 1, 2]])
+        assert nmp.allclose(upper[:, 0, 1:], hmats[:, [0, 1], [1, 2]])
 
     t = run_and_time(_basic_tests)
     print("The module passed basic tests in {:.3g}s.".format(t))
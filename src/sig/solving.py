@@ -0,0 +1,394 @@
+# XXX:  In spite of Style Guide for Python Code (PEP 8), not all imports in
+#   this file are at the beginning: SciPy is only imported when needed, to
+#   make the startup faster.
+import math
+import numpy as nmp
+
+
+def solve_eigenvalues(mats):
+    """
+    Compute the eigenvalues of a stack of Hermitian matrices of shape
+    (batch, k, k).  Return an array of shape (batch, k) whose rows are in
+    the ascending order.
+    """
+    return nmp.linalg.eigvalsh(mats)
+
+
+# The limit of the growth of the entries in the LDL^H factorizations
+# without pivoting (see `_ldl_pivots`) relative to the Frobenius norms of
+# the matrices, above which the factorizations are not trusted
+LDL_GROWTH_LIMIT = 1e3
+
+
+def _ldl_pivots(mats):
+    """
+    Compute the LDL^H factorizations without pivoting of a stack of
+    Hermitian matrices of shape (batch, k, k) at once, column by column.
+    Return the pair of the array of the diagonal factors (the pivots) of
+    shape (batch, k) and the array of the largest diagonal entries of
+    |L||D||L|^H, which bound the backward errors of the factorizations up
+    to the rounding unit (or NaN where some pivot vanishes).
+    """
+    batch, k, _ = mats.shape
+    ls = nmp.empty_like(mats)
+    pivots = nmp.empty((batch, k))
+    growth = nmp.empty((batch, k))
+
+    with nmp.errstate(divide="ignore", invalid="ignore"):
+        for i in range(k):
+            col = mats[:, i:, i]
+            if i:
+                l_row = ls[:, i, :i]
+                col = col - nmp.matmul(
+                    ls[:, i:, :i],
+                    (l_row.conj()*pivots[:, :i])[:, :, None]
+                )[:, :, 0]
+                growth[:, i] = (
+                    (l_row.real**2 + l_row.imag**2)*nmp.abs(pivots[:, :i])
+                ).sum(axis=1)
+            else:
+                growth[:, i] = 0
+            pivots[:, i] = col[:, 0].real
+            ls[:, (i + 1):, i] = col[:, 1:]/pivots[:, i, None]
+
+    growth += nmp.abs(pivots)
+    return (pivots, growth.max(axis=1))
+
+
+def make_ldl_inertia_solver(eigenvalue_zero_threshold):
+    """
+    Make a function that can be used instead of `solve_eigenvalues` when
+    only the signatures of the matrices and the "suspicious" eigenvalues
+    are needed.
+
+    Let `delta` be the suspicion threshold used by
+    `make_eigenvalues_analyser`.  For a stack of matrices A, the LDL^H
+    factorizations of A + delta*I and A - delta*I are computed at once
+    (see `_ldl_pivots`).  By Sylvester's law of inertia, their pivots
+    contain as many negative values as A has eigenvalues below -delta and
+    below delta, respectively.  If these numbers are equal, A has no
+    eigenvalues in the suspicion band, and values of the right signs are
+    returned instead of the eigenvalues: the negative pivots of the first
+    factorization shifted by -delta and the positive pivots of the second
+    one shifted by delta.  Otherwise, or if a factorization is not
+    trusted because of a vanishing pivot or of the growth of its entries
+    (see `LDL_GROWTH_LIMIT`), the actual eigenvalues are computed, for all
+    such matrices of the stack at once.  Thus the signatures and the
+    "suspicious" eigenvalues found from the returned values are the same,
+    but the minimal by absolute value non-zero one is only an estimate.
+
+    The factorizations are computed by NumPy operations on the whole stack,
+    column by column, so this is faster than `solve_eigenvalues` only for
+    small matrices: by a factor of about 1.3 to 1.7 for k up to 6, and it
+    is slower from k = 8 on (see `benchmarking`).
+    """
+    eigenvalue_zero_suspicion_threshold = math.sqrt(
+        eigenvalue_zero_threshold
+    )
+
+    def ldl_inertia_solver(mats):
+        batch, k, _ = mats.shape
+        diagonal = (slice(None), range(k), range(k))
+        shifted_mats = nmp.concatenate((mats, mats))
+        shifted_mats[:batch][diagonal] += eigenvalue_zero_suspicion_threshold
+        shifted_mats[batch:][diagonal] -= eigenvalue_zero_suspicion_threshold
+        pivots, growth = _ldl_pivots(shifted_mats)
+        lower_pivots, upper_pivots = pivots[:batch], pivots[batch:]
+
+        neg_counts = (lower_pivots < 0).sum(axis=1)
+        pos_mask = upper_pivots > 0
+        trusted = (
+            ( neg_counts + pos_mask.sum(axis=1) == k ) &
+            ( nmp.maximum(growth[:batch], growth[batch:]) <=
+              LDL_GROWTH_LIMIT*_frobenius_norms(mats) )
+        )
+
+        # Take the negative values of the first factorization and the
+        # positive ones of the second, in the ascending order
+        vals_block = nmp.where(
+            nmp.arange(k) < neg_counts[:, None],
+            ( nmp.sort(lower_pivots, axis=1) -
+              eigenvalue_zero_suspicion_threshold ),
+            ( nmp.sort(upper_pivots, axis=1) +
+              eigenvalue_zero_suspicion_threshold )
+        )
+
+        untrusted = nmp.flatnonzero(~trusted)
+        if untrusted.size:
+            vals_block[untrusted] = nmp.linalg.eigvalsh(mats[untrusted])
+
+        return vals_block
+
+    return ldl_inertia_solver
+
+
+def solve_banded_eigenvalues(uppers):
+    """
+    Compute the eigenvalues of a stack of Hermitian band matrices given in
+    the upper band storage as an array of shape (batch, b + 1, k) (see
+    `hermitize_bands`).  Return an array of shape (batch, k) whose rows are
+    in the ascending order.
+    """
+    from scipy.linalg import eigvals_banded, eigvalsh_tridiagonal
+
+    vals_block = nmp.empty(uppers.shape[::2])
+
+    if uppers.shape[1] == 2:
+        # A Hermitian tridiagonal matrix is unitarily similar to the real
+        # symmetric one with the absolute values of the off-diagonal
+        # entries.
+        for j, upper in enumerate(uppers):
+            vals_block[j] = eigvalsh_tridiagonal( upper[1].real,
+                                                  nmp.abs(upper[0, 1:]),
+                                                  check_finite = False )
+
+    else:
+        for j, upper in enumerate(uppers):
+            vals_block[j] = eigvals_banded(upper, check_finite=False)
+
+    return vals_block
+
+
+def _frobenius_norms(mats, banded=False):
+    """
+    Compute the Frobenius norms of a stack of Hermitian matrices, given
+    either as dense matrices or in the upper band storage.
+    """
+    squares = (mats.real**2 + mats.imag**2).sum(axis=-2)
+    if banded:
+        # Every off-diagonal entry of the band occurs twice in the matrix
+        squares = 2*squares - mats[:, -1].real**2
+    return nmp.sqrt(squares.sum(axis=-1))
+
+
+def make_continuation_solver( eigenvalue_zero_threshold,
+                              eigenvalue_solver = solve_eigenvalues,
+                              banded = False,
+                              max_stride = 64,
+                              retry_interval = 16 ):
+    """
+    Make a function that can be used instead of `eigenvalue_solver` when
+    only the signatures of the matrices and the "suspicious" eigenvalues
+    are needed, and that skips the computation of the eigenvalues of the
+    matrices close enough to some nearby matrix whose eigenvalues have been
+    computed (an "anchor" matrix).
+
+    Let `delta` be the suspicion threshold used by
+    `make_eigenvalues_analyser`, and the margin of an anchor matrix be the
+    minimal absolute value of its eigenvalues minus `delta`.  By Weyl's
+    inequality, the eigenvalues of a matrix A differ from the respective
+    eigenvalues of an anchor matrix by at most the spectral norm of their
+    difference, which is at most its Frobenius norm.  If this norm is less
+    than the margin, A has no eigenvalues in the suspicion band and the
+    same inertia as the anchor matrix, and its eigenvalues are replaced by
+    those of the anchor matrix.  Thus the signatures and the "suspicious"
+    eigenvalues found from the returned values are the same, but the
+    minimal by absolute value non-zero one is only an estimate.
+
+    In a stack of matrices, every `stride`-th matrix (starting with the
+    first one) is an anchor.  The eigenvalues of all the anchors are
+    computed with one call of `eigenvalue_solver`, the distances of every
+    other matrix to the preceding and the following anchors are computed
+    at once, and the eigenvalues of the matrices close to neither of them
+    are computed with one more call.  The `stride` is doubled (up to
+    `max_stride`) after a stack where at least 7/8 of the other matrices
+    have been close enough, and halved after a stack where less than a half
+    of them have been.  When it drops to 1, the stacks are passed to
+    `eigenvalue_solver` as they are, and the anchors are tried again with
+    the stride 2 only every `retry_interval` stacks.
+
+    Since the anchors are among the matrices that would be solved anyway,
+    this computes the eigenvalues of at most as many matrices as
+    `eigenvalue_solver`, and it pays off when consecutive matrices are
+    close, as on fine grids swept in the usual order (where consecutive
+    sample points are neighbours).  If they are not, as with large dense
+    matrices, for which the bound by the Frobenius norm is too crude, the
+    cost of the distances is only paid for the stacks where the anchors are
+    tried again.
+    """
+    eigenvalue_zero_suspicion_threshold = math.sqrt(
+        eigenvalue_zero_threshold
+    )
+
+    stride = 2
+    # The number of the stacks passed as they are since the stride has
+    # dropped to 1
+    plain_count = 0
+
+    def continuation_solver(mats):
+        nonlocal stride, plain_count
+
+        if stride == 1:
+            plain_count += 1
+            if plain_count < retry_interval:
+                return eigenvalue_solver(mats)
+            stride = 2
+            plain_count = 0
+
+        count = len(mats)
+        vals_block = nmp.empty(mats.shape[::2] if banded else mats.shape[:2])
+        if not count:
+            return vals_block
+
+        anchor_positions = nmp.arange(0, count, stride)
+        anchor_vals = eigenvalue_solver(mats[anchor_positions])
+        vals_block[anchor_positions] = anchor_vals
+        margins = ( nmp.abs(anchor_vals).min(axis=1) -
+                    eigenvalue_zero_suspicion_threshold )
+
+        other_mask = nmp.ones(count, dtype=bool)
+        other_mask[anchor_positions] = False
+        other_positions = nmp.flatnonzero(other_mask)
+        if not other_positions.size:
+            return vals_block
+
+        # The indices in `anchor_positions` of the preceding and the
+        # following anchors of the other matrices (the last matrices may
+        # have no following anchor)
+        preceding = other_positions//stride
+        following = nmp.minimum(preceding + 1, len(anchor_positions) - 1)
+
+        other_mats = mats[other_positions]
+        close_to_preceding = _frobenius_norms(
+            other_mats - mats[anchor_positions[preceding]],
+            banded
+        ) < margins[preceding]
+        close_to_following = ~close_to_preceding & (
+            _frobenius_norms(
+                other_mats - mats[anchor_positions[following]],
+                banded
+            ) < margins[following]
+        )
+
+        vals_block[other_positions[close_to_preceding]] = anchor_vals[
+            preceding[close_to_preceding]
+        ]
+        vals_block[other_positions[close_to_following]] = anchor_vals[
+            following[close_to_following]
+        ]
+
+        far = ~(close_to_preceding | close_to_following)
+        if far.any():
+            vals_block[other_positions[far]] = eigenvalue_solver(
+                other_mats[far]
+            )
+
+        far_count = nmp.count_nonzero(far)
+        if 8*far_count <= len(other_positions):
+            stride = min(2*stride, max_stride)
+        elif 2*far_count > len(other_positions):
+            stride //= 2
+
+        return vals_block
+
+    return continuation_solver
+
+
+def make_eigenvalue_solver( eigenvalue_zero_threshold,
+                            method = "eigvalsh",
+                            banded = False ):
+    """
+    Make the function computing the eigenvalues of stacks of Hermitian
+    matrices (or other values with the same inertia and "suspicious"
+    values) by the given method: "eigvalsh", "ldl" or "continuation" (see
+    `make_continuation_solver`).  For matrices in the upper band storage,
+    "ldl" is not supported, and `solve_banded_eigenvalues` is used.
+    """
+    if method == "continuation":
+        return make_continuation_solver(
+            eigenvalue_zero_threshold,
+            solve_banded_eigenvalues if banded else solve_eigenvalues,
+            banded
+        )
+    elif banded:
+        if method != "eigvalsh":
+            raise ValueError( "solving method '{}' does not support band "
+                              "storage".format(method) )
+        return solve_banded_eigenvalues
+    elif method == "eigvalsh":
+        return solve_eigenvalues
+    elif method == "ldl":
+        return make_ldl_inertia_solver(eigenvalue_zero_threshold)
+    else:
+        raise ValueError("unknown solving method '{}'".format(method))
+
+
+# *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
+# --------------------------------------------------------------------------
+# ## Basic testing
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    from ._basic_testing_tools import run_and_time
+
+    def _basic_tests():
+        from .analysing import make_batch_eigenvalues_analyser
+        eigenvalue_zero_threshold = 1e-12
+        analyse_eigenvalues_block = make_batch_eigenvalues_analyser(
+            eigenvalue_zero_threshold
+        )
+        ldl_inertia_solver = make_ldl_inertia_solver(
+            eigenvalue_zero_threshold
+        )
+        rng = nmp.random.RandomState(0)
+        mats = ( rng.standard_normal((50, 6, 6)) +
+                 1j*rng.standard_normal((50, 6, 6)) )
+        mats += mats.conj().swapaxes(-1, -2)
+        # Make some of the matrices singular
+        mats[::5, 0, :] = 0
+        mats[::5, :, 0] = 0
+        signatures, suspicious, _ = analyse_eigenvalues_block(
+            solve_eigenvalues(mats)
+        )
+        ldl_signatures, ldl_suspicious, _ = analyse_eigenvalues_block(
+            ldl_inertia_solver(mats)
+        )
+        assert (ldl_signatures == signatures).all()
+        assert (ldl_suspicious[0] == suspicious[0]).all()
+        assert (ldl_suspicious[1] == suspicious[1]).all()
+        for b in [1, 2]:
+            band_mats = nmp.triu(nmp.tril(mats, b), -b)
+            uppers = nmp.stack([ nmp.concatenate(( nmp.zeros(d),
+                                                   band_mats[0].diagonal(d) ))
+                                 for d in range(b, -1, -1) ])[None]
+            assert nmp.allclose( solve_banded_eigenvalues(uppers)[0],
+                                 solve_eigenvalues(band_mats[:1])[0] )
+
+        # A path of matrices passing through singular ones
+        ts = nmp.linspace(-1, 1, 401)
+        path_mats = ( mats[1] + ts[:, None, None]*mats[2] ).astype(complex)
+        solved_counts = []
+
+        def counting_solver(mats):
+            solved_counts.append(len(mats))
+            return solve_eigenvalues(mats)
+
+        continuation_solver = make_continuation_solver(
+            eigenvalue_zero_threshold,
+            counting_solver
+        )
+        signatures, suspicious, _ = analyse_eigenvalues_block(
+            solve_eigenvalues(path_mats)
+        )
+        for start in range(0, len(path_mats), 100):
+            continuation_signatures, continuation_suspicious, _ = (
+                analyse_eigenvalues_block(
+                    continuation_solver(path_mats[start:(start + 100)])
+                )
+            )
+            assert ( continuation_signatures ==
+                     signatures[start:(start + 100)] ).all()
+            for j in range(2):
+                assert ( continuation_suspicious[j] ==
+                         suspicious[j][start:(start + 100)] ).all()
+        assert len(set(map(tuple, signatures.tolist()))) > 1
+        assert sum(solved_counts) < len(path_mats)//2
+        uppers = nmp.stack([ nmp.concatenate(( nmp.zeros(d),
+                                               path_mats[0].diagonal(d) ))
+                             for d in range(5, -1, -1) ])[None]
+        assert nmp.isclose( _frobenius_norms(uppers, banded=True)[0],
+                            nmp.linalg.norm(path_mats[0]) )
+
+    t = run_and_time(_basic_tests)
+    print("The module passed basic tests in {:.3g}s.".format(t))
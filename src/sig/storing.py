@@ -0,0 +1,202 @@
+import numpy as nmp
+from json import dump as dump_json
+from json import load as load_json
+from os.path import getsize
+from struct import pack
+
+# The size of the header of the .npy result files.  It is fixed so that
+# the header can be rewritten in place when the number of records changes.
+_HEADER_SIZE = 256
+
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def result_dtype(n, steps):
+    """
+    Return the NumPy structured data type of the records of a result file:
+    the n-uple of indices, the signature (p, n, z), the minimal by
+    absolute value non-zero eigenvalue, and the flag telling whether the
+    signature has been verified with high precision (see `verifying`).
+    """
+    if steps < 2**15:
+        index_type = "<i2"
+    else:
+        index_type = "<i4"
+
+    return nmp.dtype([ ("inds", index_type, (n,)),
+                       ("p", "<u2"),
+                       ("n", "<u2"),
+                       ("z", "<u2"),
+                       ("min_nonzero", "<f8"),
+                       ("verified", "?") ])
+
+
+def eigenvalue_record_dtype(n, steps, k):
+    """
+    Return the NumPy structured data type of the records of a file of
+    eigenvalues: the n-uple of indices and the k eigenvalues of the
+    matrix in the ascending order.
+    """
+    return nmp.dtype([ ("inds", result_dtype(n, steps)["inds"]),
+                       ("eigenvalues", "<f8", (k,)) ])
+
+
+def make_eigenvalue_recorder(f, dtype):
+    """
+    Make a function that takes an integer array of index n-uples and the
+    array of the eigenvalues of the corresponding matrices, and writes them
+    as records of type `dtype` (see `eigenvalue_record_dtype`) to the file
+    `f` opened by `open_result_file`.
+    """
+    def eigenvalue_recorder(inds_block, eigenvalues_block):
+        records = nmp.empty(len(inds_block), dtype=dtype)
+        records["inds"] = inds_block
+        records["eigenvalues"] = eigenvalues_block
+        f.write(records.tobytes())
+
+    return eigenvalue_recorder
+
+
+def _npy_header(dtype, count):
+    header = ( "{{'descr': {!r}, 'fortran_order': False, 'shape': ({},), }}"
+               .format(nmp.lib.format.dtype_to_descr(dtype), count) )
+    header_size = _HEADER_SIZE - len(_NPY_MAGIC) - 2
+    if len(header) >= header_size:
+        raise ValueError("the record data type is too long for the header")
+    header = header.ljust(header_size - 1) + "\n"
+    return _NPY_MAGIC + pack("<H", header_size) + header.encode("latin1")
+
+
+def metadata_file_name(file_name):
+    return file_name + ".json"
+
+
+def write_metadata(file_name, metadata):
+    """
+    Write the metadata of the output file `file_name` to its metadata file
+    (see `metadata_file_name`).
+    """
+    with open(metadata_file_name(file_name), "w") as mf:
+        dump_json(metadata, mf)
+
+
+def load_metadata(file_name):
+    """
+    Load the metadata of the output file `file_name` written by
+    `write_metadata` or `open_result_file`.
+    """
+    with open(metadata_file_name(file_name)) as mf:
+        return load_json(mf)
+
+
+def open_result_file(file_name, dtype, metadata, resume_size=None):
+    """
+    Open a .npy result file for appending records as raw bytes, and write
+    the metadata (the parameters of the run) to the accompanying JSON file.
+    If `resume_size` is given, the existing file is truncated to this size
+    instead (see `checkpointing`).  The header of the file is only updated
+    by `close_result_file`, but `load_results` can read the file anyway.
+    """
+    if resume_size is None:
+        f = open(file_name, "wb")
+        f.write(_npy_header(dtype, 0))
+        write_metadata(file_name, dict(metadata, dtype=str(dtype)))
+    else:
+        f = open(file_name, "r+b")
+        f.truncate(resume_size)
+        f.seek(0, 2)
+
+    return f
+
+
+def close_result_file(f, dtype):
+    """
+    Write the actual number of records into the header of a result file
+    opened by `open_result_file`, and close it.
+    """
+    f.flush()
+    count = (f.tell() - _HEADER_SIZE)//dtype.itemsize
+    f.seek(0)
+    f.write(_npy_header(dtype, count))
+    f.close()
+
+
+def load_results(file_name, mmap_mode="r"):
+    """
+    Load the records of a result file as a (memory-mapped by default)
+    structured array, and its metadata.  The number of records is computed
+    from the size of the file, so the file may be still being written or
+    may not have been closed properly.
+    """
+    metadata = load_metadata(file_name)
+
+    with open(file_name, "rb") as f:
+        nmp.lib.format.read_magic(f)
+        _, _, dtype = nmp.lib.format.read_array_header_1_0(f)
+        offset = f.tell()
+
+    count = (getsize(file_name) - offset)//dtype.itemsize
+
+    if mmap_mode is None:
+        records = nmp.fromfile( file_name,
+                                dtype = dtype,
+                                count = count,
+                                offset = offset )
+    else:
+        records = nmp.memmap( file_name,
+                              dtype = dtype,
+                              mode = mmap_mode,
+                              offset = offset,
+                              shape = (count,) )
+
+    return (records, metadata)
+
+
+# *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
+# --------------------------------------------------------------------------
+# ## Basic testing
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    from ._basic_testing_tools import run_and_time
+
+    def _basic_tests():
+        from os import remove
+        from tempfile import mkdtemp
+        file_name = mkdtemp() + "/results.npy"
+        dtype = result_dtype(2, 10)
+        records = nmp.zeros(5, dtype=dtype)
+        records["inds"] = [(1, 2), (3, -4), (5, 6), (7, -8), (9, 10)]
+        records["p"] = [1, 2, 3, 4, 5]
+        records["min_nonzero"] = [0.5, -0.25, nmp.nan, 1, 2]
+        f = open_result_file(file_name, dtype, {"sampling_number": 10})
+        f.write(records[:3].tobytes())
+        f.flush()
+        loaded_records, metadata = load_results(file_name)
+        assert metadata["sampling_number"] == 10
+        assert loaded_records.size == 3
+        f.write(records[3:].tobytes())
+        close_result_file(f, dtype)
+        loaded_records = nmp.load(file_name, mmap_mode="r")
+        assert loaded_records.dtype == dtype
+        assert (loaded_records["inds"] == records["inds"]).all()
+        assert (loaded_records["p"] == records["p"]).all()
+        remove(file_name)
+        remove(metadata_file_name(file_name))
+
+        dtype = eigenvalue_record_dtype(2, 10, 3)
+        f = open_result_file(file_name, dtype, {})
+        record_eigenvalues = make_eigenvalue_recorder(f, dtype)
+        record_eigenvalues( nmp.array([(1, 2), (3, -4)]),
+                            nmp.array([[-1, 0, 1], [0, 1, 2]]) )
+        record_eigenvalues(nmp.array([(5, 6)]), nmp.array([[1, 2, 3]]))
+        close_result_file(f, dtype)
+        loaded_records, _ = load_results(file_name)
+        assert loaded_records["inds"].tolist() == [[1, 2], [3, -4], [5, 6]]
+        assert loaded_records["eigenvalues"][1].tolist() == [0, 1, 2]
+        remove(file_name)
+        remove(metadata_file_name(file_name))
+
+    t = run_and_time(_basic_tests)
+    print("The module passed basic tests in {:.3g}s.".format(t))
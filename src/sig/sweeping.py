@@ -1,5 +1,16 @@
+import numpy as nmp
 from itertools import chain as iter_chain
+from itertools import filterfalse as iter_filter_false
+from itertools import combinations
 from itertools import product as iter_product
+from functools import reduce
+from math import gcd
+try:
+    from math import lcm
+except ImportError:
+    # NOTE:  `math.lcm` is new in Python 3.9.
+    def lcm(*integers):
+        return reduce(lambda a, b: a*b//gcd(a, b), integers, 1)
 
 
 def _splice_first(t):
@@ -7,34 +18,199 @@ def _splice_first(t):
     return x + tuple(ys)
 
 
-def make_sample_index_iterator_maker(n, steps, r):
+def _periodicity_residues(n, r):
+    if r % n:
+        return [r, -r]
+    else:
+        return [r]
+
+
+def _periodicity_restricted_second_indices(n, steps, r):
+    """
+    Return the set of the residues modulo 2*steps of the second indices
+    that are selected together with the first index `steps` by the
+    periodicity parameter r.
+    """
+    return { ((m - steps + n - 1) % (2*n) - n + 1) % (2*steps)
+             for m in _periodicity_residues(n, r) }
+
+
+def make_conjugate_index_expander(n, steps, r):
+    """
+    Make a function that takes a canonical n-uple of indices yielded by an
+    iterator made by `make_sample_index_iterator_maker(n, steps, r,
+    canonical=True)` and returns the list of the n-uples that the
+    corresponding non-canonical iterator would yield in addition and that
+    parametrize the complex conjugates of the same numbers (the list is
+    either empty or has one element).
+    """
+    if n == 1:
+        return lambda _inds: []
+
+    if r is not None:
+        steps_pair_inds = _periodicity_restricted_second_indices(n, steps, r)
+        # The second indices as yielded, by their residues
+        yielded_second_inds = {
+            i2 % (2*steps): i2
+            for i2 in ( (m - steps + n - 1) % (2*n) - n + 1
+                        for m in _periodicity_residues(n, r) )
+        }
+
+    def conjugate_index_expander(inds):
+        if inds[0] != steps:
+            return []
+
+        conj_inds = _conjugate_indices(inds, steps)
+        if all( (i - j) % (2*steps) == 0
+                for i, j in zip(inds, conj_inds) ):
+            return []
+
+        if r is None:
+            return [conj_inds]
+
+        i2 = conj_inds[1] % (2*steps)
+        if i2 not in steps_pair_inds:
+            return []
+        return [(steps, yielded_second_inds[i2]) + conj_inds[2:]]
+
+    return conjugate_index_expander
+
+
+def _conjugate_indices(inds, steps):
+    """
+    Return the n-uple of indices that parametrize the complex conjugates of
+    the numbers parametrized by `inds`.
+    """
+    return tuple(i if i % (2*steps) == steps else -i for i in inds)
+
+
+def _is_canonical(inds, steps):
+    """
+    Tell if the n-uple of indices is the canonical representative of its
+    orbit under the simultaneous conjugation of all the parameters: the
+    first index that does not parametrize a real number (1 or -1) must
+    parametrize a number with positive imaginary part.
+    """
+    for i in inds:
+        i %= 2*steps
+        if i != 0 and i != steps:
+            return i < steps
+    return True
+
+
+def _make_canonical_product_iterator(n, steps, first_indices):
+    """
+    Iterate over the canonical (see `_is_canonical`) n-uples among those
+    iterated over by `make_sample_index_iterator_maker(n, steps, None,
+    first_indices)`, in the same order.
+    """
+    indr1 = range(1, steps + 1)
+    indr2 = range(-steps + 1, 0)
+
+    # If the first index is less than `steps`, the n-uple is canonical
+    iterators = [ iter_product(
+        range(first_indices.start, min(first_indices.stop, steps)),
+        *[iter_chain(indr1, indr2) for _ in range(1, n)]
+    ) ]
+
+    if steps in first_indices:
+        if n == 1:
+            iterators.append(iter([(steps,)]))
+        else:
+            iterators.append(
+                (steps,) + inds
+                for inds in _make_canonical_product_iterator(n - 1, steps,
+                                                             indr1)
+            )
+
+    return iter_chain(*iterators)
+
+
+def make_sample_index_iterator_maker( n, steps, r,
+                                      first_indices = None,
+                                      canonical = False,
+                                      sampling_numbers = None ):
     """
     Make a generator of iterators that iterate over n-uples of integers
     that parametrize certain complex numbers on the unit circle with a
     given number of steps on a semicircle.
+    If `first_indices` is given, it must be a subrange of
+    `range(1, steps + 1)`, and only the n-uples whose first index is in
+    this subrange are iterated over (in the same order).
+    If `canonical` is true, only one representative of every orbit of the
+    simultaneous conjugation of all the parameters is iterated over (the
+    orbits only differ by the conjugation if the first index is `steps`),
+    see also `make_conjugate_index_expander`.
+    If `sampling_numbers` is given, it must be a list of divisors of
+    `steps`, and only the n-uples that parametrize points of the grid with
+    one of these numbers of steps on a semicircle are iterated over (see
+    `make_multiresolution_result_writer`).
     """
+    if sampling_numbers is not None:
+        make_unrestricted_sample_index_iterator = (
+            make_sample_index_iterator_maker( n, steps, r,
+                                              first_indices,
+                                              canonical )
+        )
+        ratios = [steps//q for q in sampling_numbers]
+        if 1 in ratios:
+            return make_unrestricted_sample_index_iterator
+
+        def is_on_some_grid(inds):
+            return any( all(i % ratio == 0 for i in inds)
+                        for ratio in ratios )
+
+        return lambda: filter( is_on_some_grid,
+                               make_unrestricted_sample_index_iterator() )
 
     indr1 = range(1, steps + 1)
+    if first_indices is None:
+        first_indices = indr1
     indr2 = range(-steps + 1, 0)
 
+    if canonical and n > 1:
+        if r is None:
+            return lambda: _make_canonical_product_iterator( n, steps,
+                                                             first_indices )
+
+        make_low_sample_index_iterator = make_sample_index_iterator_maker(
+            n, steps, r,
+            range(first_indices.start, min(first_indices.stop, steps))
+        )
+        make_high_sample_index_iterator = make_sample_index_iterator_maker(
+            n, steps, r,
+            range(steps, steps + 1) if steps in first_indices else range(0)
+        )
+        steps_pair_inds = _periodicity_restricted_second_indices(n, steps, r)
+
+        # NOTE:  Not every selected pair of the first two indices has its
+        #   conjugate pair selected, so the non-canonical n-uples are only
+        #   skipped if their conjugates are iterated over.
+        def is_redundant(inds):
+            return not ( _is_canonical(inds, steps) or
+                         ( _conjugate_indices(inds[1:2], steps)[0] %
+                           (2*steps) ) not in steps_pair_inds )
+
+        return lambda: iter_chain(
+            make_low_sample_index_iterator(),
+            iter_filter_false(is_redundant, make_high_sample_index_iterator())
+        )
+
     if r is None:
         return lambda: iter_product(
-            indr1,
+            first_indices,
             *[iter_chain(indr1, indr2) for _ in range(1, n)]
         )
 
     else:
         if n == 1:
-            return lambda: iter(indr1)
+            return lambda: iter(first_indices)
 
         else:
-            if r % n:
-                rr = [r, -r]
-            else:
-                rr = [r]
+            rr = _periodicity_residues(n, r)
 
             def make_2ind_iterator():
-                for i1 in indr1:
+                for i1 in first_indices:
                     for m in rr:
                         i2 = (m - i1 + n - 1) % (2*n) - n + 1
                         yield (i1, i2)
@@ -51,6 +227,245 @@ def make_sample_index_iterator_maker(n, steps, r):
                 )
 
 
+def _make_index_chunk_iterator_maker(n, steps, r, chunk_size, first_indices):
+    """
+    Make a generator of iterators that iterate over integer arrays of shape
+    (chunk_size, n) whose rows are the n-uples that the iterators made by
+    `make_sample_index_iterator_maker(n, steps, r, first_indices)` iterate
+    over, in the same order.  The last chunk may be shorter.
+
+    The n-uples are the products of the "prefixes" (the first indices, or
+    the pairs of the first two indices selected by the periodicity
+    parameter r) and of the other indices, each running over the same
+    cycle of values.  The n-uple at a given position in the order is thus
+    given by the digits of the position in the base of the length of the
+    cycle, which are computed for a whole chunk of positions at once.
+    """
+    cycle = nmp.concatenate(( nmp.arange(1, steps + 1),
+                              nmp.arange(-steps + 1, 0) ))
+
+    first_indices = nmp.asarray(first_indices, dtype=int)
+    if r is None or n == 1:
+        prefixes = first_indices.reshape(-1, 1)
+    else:
+        rr = _periodicity_residues(n, r)
+        i1 = nmp.repeat(first_indices, len(rr))
+        i2 = (nmp.tile(rr, len(first_indices)) - i1 + n - 1) % (2*n) - n + 1
+        prefixes = nmp.stack((i1, i2), axis=1)
+
+    prefix_length = prefixes.shape[1]
+    count = len(prefixes)*len(cycle)**(n - prefix_length)
+
+    def make_index_chunk_iterator():
+        for start in range(0, count, chunk_size):
+            positions = nmp.arange(start, min(start + chunk_size, count))
+            chunk = nmp.empty((len(positions), n), dtype=int)
+            for j in range(n - 1, prefix_length - 1, -1):
+                positions, digits = nmp.divmod(positions, len(cycle))
+                chunk[:, j] = cycle[digits]
+            chunk[:, :prefix_length] = prefixes[positions]
+            yield chunk
+
+    return make_index_chunk_iterator
+
+
+def _are_canonical(inds_block, steps):
+    """
+    Do the same as `_is_canonical` for every row of an integer array of
+    n-uples of indices.
+    """
+    residues = inds_block % (2*steps)
+    nonreal = (residues != 0) & (residues != steps)
+    first_nonreal = nmp.argmax(nonreal, axis=1)
+    return ( ~nonreal.any(axis=1) |
+             ( residues[nmp.arange(len(residues)), first_nonreal] <
+               steps ) )
+
+
+def _rebatch(chunks, block_size):
+    """
+    Iterate over the rows of the arrays of the iterable `chunks` in arrays
+    of `block_size` rows (the last one may be shorter).
+    """
+    pending = []
+    pending_count = 0
+
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_count += len(chunk)
+        if pending_count < block_size:
+            continue
+
+        rows = nmp.concatenate(pending)
+        full_count = len(rows) - len(rows) % block_size
+        for start in range(0, full_count, block_size):
+            yield rows[start:(start + block_size)]
+        pending = [rows[full_count:]]
+        pending_count = len(rows) - full_count
+
+    if pending_count:
+        yield nmp.concatenate(pending)
+
+
+def make_sample_index_block_iterator_maker( n, steps, r, block_size,
+                                            first_indices = None,
+                                            canonical = False,
+                                            sampling_numbers = None ):
+    """
+    Make a generator of iterators that iterate over integer arrays of shape
+    (block_size, n) whose rows are the n-uples that the iterators made by
+    `make_sample_index_iterator_maker(n, steps, r, first_indices,
+    canonical, sampling_numbers)` iterate over, in the same order.  The last
+    block may be shorter.
+
+    The blocks are computed with NumPy (see
+    `_make_index_chunk_iterator_maker`), without making a tuple for every
+    n-uple.  With `canonical` or `sampling_numbers`, the rows not selected
+    are filtered out of every block, and the rest are gathered into blocks
+    of `block_size` rows again.
+    """
+    if first_indices is None:
+        first_indices = range(1, steps + 1)
+
+    make_index_chunk_iterator = _make_index_chunk_iterator_maker(
+        n, steps, r, block_size, first_indices
+    )
+
+    selectors = []
+
+    if canonical and n > 1:
+        if r is None:
+            selectors.append(lambda inds_block: _are_canonical( inds_block,
+                                                                steps ))
+        else:
+            steps_pair_inds = list(
+                _periodicity_restricted_second_indices(n, steps, r)
+            )
+
+            # NOTE:  As in `make_sample_index_iterator_maker`, only the
+            #   non-canonical n-uples whose conjugates are iterated over are
+            #   skipped.
+            def select_not_redundant(inds_block):
+                i2 = inds_block[:, 1]
+                conj_i2 = nmp.where(i2 % (2*steps) == steps, i2, -i2)
+                return ( _are_canonical(inds_block, steps) |
+                         ~nmp.isin(conj_i2 % (2*steps), steps_pair_inds) )
+
+            selectors.append(select_not_redundant)
+
+    if sampling_numbers is not None:
+        ratios = [steps//q for q in sampling_numbers]
+        if 1 not in ratios:
+            def select_on_some_grid(inds_block):
+                return nmp.logical_or.reduce([
+                    (inds_block % ratio == 0).all(axis=1)
+                    for ratio in ratios
+                ])
+
+            selectors.append(select_on_some_grid)
+
+    if not selectors:
+        return make_index_chunk_iterator
+
+    def make_sample_index_block_iterator():
+        def selected_chunks():
+            for chunk in make_index_chunk_iterator():
+                selected = nmp.logical_and.reduce([ select(chunk)
+                                                    for select in selectors ])
+                yield chunk[selected]
+
+        return _rebatch(selected_chunks(), block_size)
+
+    return make_sample_index_block_iterator
+
+
+def _count_canonical_products(n, steps, first_indices):
+    """
+    Count the n-uples iterated over by `_make_canonical_product_iterator(n,
+    steps, first_indices)`.
+    """
+    count = ( len(range(first_indices.start, min(first_indices.stop, steps))) *
+              (2*steps - 1)**(n - 1) )
+    if steps in first_indices:
+        if n == 1:
+            count += 1
+        else:
+            count += _count_canonical_products( n - 1, steps,
+                                                range(1, steps + 1) )
+    return count
+
+
+def count_sample_indices( n, steps, r,
+                          first_indices = None,
+                          canonical = False,
+                          sampling_numbers = None ):
+    """
+    Count the n-uples that the iterators made by
+    `make_sample_index_iterator_maker(n, steps, r, first_indices,
+    canonical, sampling_numbers)` iterate over, without iterating.  Return
+    `None` if the number is not known in advance (with `canonical` and
+    either `r` or `sampling_numbers`).
+    """
+    if first_indices is None:
+        first_indices = range(1, steps + 1)
+
+    if sampling_numbers is not None:
+        ratios = [steps//q for q in sampling_numbers]
+        if 1 in ratios:
+            return count_sample_indices(n, steps, r, first_indices, canonical)
+        if r is not None or canonical:
+            return None
+
+        # Count the n-uples on the union of the grids by the
+        # inclusion-exclusion principle: those on the grids of the ratios of
+        # a set of ratios are the multiples of their least common multiple
+        count = 0
+        for subset_size in range(1, len(ratios) + 1):
+            for subset in combinations(ratios, subset_size):
+                m = lcm(*subset)
+                multiples = len(range(
+                    -(-first_indices.start//m)*m,
+                    first_indices.stop,
+                    m
+                ))
+                count += (-1)**(subset_size + 1)*(
+                    multiples*(2*(steps//m) - 1)**(n - 1)
+                )
+        return count
+
+    if canonical and n > 1:
+        if r is None:
+            return _count_canonical_products(n, steps, first_indices)
+        else:
+            return None
+
+    if r is None:
+        return len(first_indices)*(2*steps - 1)**(n - 1)
+    elif n == 1:
+        return len(first_indices)
+    else:
+        return ( len(first_indices)*len(_periodicity_residues(n, r)) *
+                 (2*steps - 1)**(n - 2) )
+
+
+def split_first_index_range(steps, count, first_indices=None):
+    """
+    Split `range(1, steps + 1)`, the range of the first index, or the range
+    `first_indices` if it is given, into at most `count` consecutive
+    subranges ("slabs") of almost equal lengths.  The splitting depends only
+    on the arguments, so that it can be reproduced by separate runs (see
+    the shards in `go`).
+    """
+    if first_indices is None:
+        first_indices = range(1, steps + 1)
+
+    length = len(first_indices)
+    count = min(count, length)
+    bounds = [ first_indices.start + (length*j)//count
+               for j in range(count + 1) ]
+    return [range(b0, b1) for b0, b1 in zip(bounds, bounds[1:])]
+
+
 # *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
 # --------------------------------------------------------------------------
 # ## Basic testing
@@ -61,8 +476,105 @@ if __name__ == "__main__":
     from ._basic_testing_tools import run_and_time
 
     def _basic_tests():
-        # TODO: implement
-        assert False
+        for n, steps, r, first_indices, expected_inds in [
+            (1, 3, None, None, [(1,), (2,), (3,)]),
+            ( 2, 2, None, None,
+              [(1, 1), (1, 2), (1, -1), (2, 1), (2, 2), (2, -1)] ),
+            ( 2, 3, None, range(2, 4),
+              [ (2, 1), (2, 2), (2, 3), (2, -2), (2, -1),
+                (3, 1), (3, 2), (3, 3), (3, -2), (3, -1) ] ),
+            (1, 3, 2, None, [1, 2, 3]),
+            ( 2, 3, 1, None,
+              [(1, 0), (1, 2), (2, -1), (2, 1), (3, 2), (3, 0)] ),
+            ( 3, 2, 2, None,
+              [ (1, 1, 1), (1, 1, 2), (1, 1, -1),
+                (1, 3, 1), (1, 3, 2), (1, 3, -1),
+                (2, 0, 1), (2, 0, 2), (2, 0, -1),
+                (2, 2, 1), (2, 2, 2), (2, 2, -1) ] )
+        ]:
+            assert list(make_sample_index_iterator_maker(
+                n, steps, r, first_indices
+            )()) == expected_inds
+        assert [ block.tolist() for block in
+                 make_sample_index_block_iterator_maker(2, 3, 1, 4)() ] == [
+            [[1, 0], [1, 2], [2, -1], [2, 1]], [[3, 2], [3, 0]]
+        ]
+        assert list(make_sample_index_iterator_maker(
+            2, 4, None, sampling_numbers = [2]
+        )()) == [(2, 2), (2, 4), (2, -2), (4, 2), (4, 4), (4, -2)]
+        for n, steps, r, first_indices, canonical, sampling_numbers in [
+            (1, 6, None, None, False, None),
+            (3, 6, None, range(2, 5), False, None),
+            (2, 6, 3, None, False, None),
+            (3, 6, 2, range(4, 7), False, None),
+            (2, 6, None, None, True, None),
+            (3, 6, None, range(5, 7), True, None),
+            (2, 12, None, None, False, [4, 6]),
+            (3, 12, None, range(3, 10), False, [2, 3, 12]),
+            (3, 12, None, range(3, 10), False, [2, 3]),
+            (2, 6, 3, None, True, None),
+            (3, 6, 4, range(5, 7), True, None),
+            (3, 12, 1, None, True, [4, 6]),
+            (1, 6, 2, range(2, 5), True, None)
+        ]:
+            count = count_sample_indices( n, steps, r,
+                                          first_indices,
+                                          canonical,
+                                          sampling_numbers )
+            assert count is None or count == sum(
+                1 for _ in make_sample_index_iterator_maker(
+                    n, steps, r, first_indices, canonical, sampling_numbers
+                )()
+            )
+            for block_size in [1, 5, 64]:
+                blocks = list(make_sample_index_block_iterator_maker(
+                    n, steps, r, block_size,
+                    first_indices, canonical, sampling_numbers
+                )())
+                assert all(len(block) == block_size for block in blocks[:-1])
+                assert ( [ tuple(inds) for block in blocks
+                           for inds in block.tolist() ] ==
+                         [ inds if isinstance(inds, tuple) else (inds,)
+                           for inds in make_sample_index_iterator_maker(
+                               n, steps, r,
+                               first_indices, canonical, sampling_numbers
+                           )() ] )
+        assert count_sample_indices(2, 6, 3, canonical=True) is None
+
+        assert list(_make_canonical_product_iterator(2, 2, range(1, 3))) == [
+            (1, 1), (1, 2), (1, -1), (2, 1), (2, 2)
+        ]
+        assert make_conjugate_index_expander(2, 2, None)((2, 1)) == [(2, -1)]
+        assert make_conjugate_index_expander(2, 2, None)((2, 2)) == []
+        assert make_conjugate_index_expander(2, 2, None)((1, 1)) == []
+        # The canonical n-uples and their expansions are the whole sweep
+        for n, steps, r in iter_product( [2, 3],
+                                         [4, 5],
+                                         [None, 1, 2, 3] ):
+            all_inds = list(make_sample_index_iterator_maker(n, steps, r)())
+            canonical_inds = list(make_sample_index_iterator_maker(
+                n, steps, r, canonical = True
+            )())
+            # NOTE:  With a periodicity parameter, the non-canonical n-uples
+            #   whose conjugates are not selected are also iterated over.
+            assert r is not None or all( _is_canonical(inds, steps)
+                                         for inds in canonical_inds )
+            expand_conjugates = make_conjugate_index_expander(n, steps, r)
+            expanded_inds = [ conj_inds for inds in canonical_inds
+                              for conj_inds in expand_conjugates(inds) ]
+            assert not any( _is_canonical(inds, steps)
+                            for inds in expanded_inds )
+            assert ( sorted(canonical_inds + expanded_inds) ==
+                     sorted(all_inds) )
+            assert len(set(all_inds)) == len(all_inds)
+            # The canonical n-uples are iterated over in the same order
+            all_inds_iterator = iter(all_inds)
+            assert all(inds in all_inds_iterator for inds in canonical_inds)
+        slabs = split_first_index_range(10, 3)
+        assert slabs == [range(1, 4), range(4, 7), range(7, 11)]
+        assert ( split_first_index_range(10, 2, slabs[2]) ==
+                 [range(7, 9), range(9, 11)] )
+        assert len(split_first_index_range(10, 5, slabs[0])) == 3
 
     t = run_and_time(_basic_tests)
     print("The module passed basic tests in {:.3g}s.".format(t))
@@ -0,0 +1,184 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from math import nan
+
+from .compiling import entry_functions
+
+
+def make_high_precision_signature_computer( compiled_matrix,
+                                            steps,
+                                            eigenvalue_zero_threshold,
+                                            precision = 50 ):
+    """
+    Make a function that takes an n-uple of sampling indices, evaluates the
+    compiled matrix (see `compile_matrix`) at the corresponding roots of
+    unity with `precision` significant decimal digits using mpmath, and
+    computes its eigenvalues with the same precision.  The function returns
+    the pair of the signature (p, n, z) and the minimal by absolute value
+    non-zero eigenvalue (NaN if there is none).  The matrices are built in
+    the same way as by the matrix samplers in `sampling`.
+    """
+    # NOTE: mpmath is imported only when needed, to make the startup faster
+    import mpmath
+
+    k = compiled_matrix["size"]
+    f_entries = entry_functions(compiled_matrix, "mpmath")
+
+    def signature_computer(inds):
+        with mpmath.workdps(precision):
+            # The parameters on the unit circle
+            t1 = [mpmath.expjpi(mpmath.mpf(i)/steps) for i in inds]
+
+            vals = [-mpmath.conj(a) for a in t1]
+            factor = mpmath.fprod(1 - a for a in t1)
+            mat = mpmath.matrix(k, k)
+            for j, l, f in f_entries:
+                mat[j, l] = mpmath.mpc(f(*vals))*factor
+
+            # Transform the matrix to a truly Hermitian one, as with the
+            # floating-point matrices:
+            mat += mat.H
+            eigenvalues = mpmath.eighe(mat, eigvals_only=True)
+
+            n = 0
+            z = 0
+            min_nonzero_val = None
+
+            for v in eigenvalues:
+                if abs(v) <= eigenvalue_zero_threshold:
+                    z += 1
+                    continue
+                if v < 0:
+                    n += 1
+                if min_nonzero_val is None or abs(v) < abs(min_nonzero_val):
+                    min_nonzero_val = v
+
+            p = len(eigenvalues) - (n + z)
+
+            if min_nonzero_val is None:
+                return ((p, n, z), nan)
+            else:
+                return ((p, n, z), float(min_nonzero_val))
+
+    return signature_computer
+
+
+def make_inline_verifier(signature_computer):
+    """
+    Make a verifier (see `process_data`) that computes the signatures with
+    `signature_computer` right away, in the current process.
+    """
+    def verifier(inds):
+        future = Future()
+        future.set_result(signature_computer(inds))
+        return future
+
+    return verifier
+
+
+# The state of a verification worker process, set up by `_initialize_worker`
+_worker_state = {}
+
+
+def _initialize_worker( compiled_matrix,
+                        sampling_number,
+                        eigenvalue_zero_threshold,
+                        precision ):
+
+    _worker_state["compute_signature"] = (
+        make_high_precision_signature_computer( compiled_matrix,
+                                                sampling_number,
+                                                eigenvalue_zero_threshold,
+                                                precision )
+    )
+
+
+def _verify(inds):
+    return _worker_state["compute_signature"](inds)
+
+
+def make_verification_pool( jobs,
+                            compiled_matrix,
+                            sampling_number,
+                            eigenvalue_zero_threshold,
+                            precision = 50 ):
+    """
+    Start `jobs` worker processes for recomputing the signatures with high
+    precision from the compiled matrix (see `compile_matrix`).  Return the
+    executor, which is to be shut down by the caller.
+    """
+    return ProcessPoolExecutor(
+        jobs,
+        initializer = _initialize_worker,
+        initargs = ( compiled_matrix,
+                     sampling_number,
+                     eigenvalue_zero_threshold,
+                     precision )
+    )
+
+
+def make_pool_verifier(executor):
+    """
+    Make a verifier (see `process_data`) that submits the computations of
+    the signatures to a pool made by `make_verification_pool`, so that they
+    run concurrently with the sampling.
+    """
+    def verifier(inds):
+        return executor.submit(_verify, tuple(inds))
+
+    return verifier
+
+
+# *-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-
+# --------------------------------------------------------------------------
+# ## Basic testing
+# --------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    from ._basic_testing_tools import run_and_time
+
+    def _basic_tests():
+        import numpy as nmp
+        from sympy import symbols, sympify
+        from .analysing import make_eigenvalues_analyser
+        from .compiling import compile_matrix
+        from .sampling import make_matrix_sampler
+
+        indeterminates = symbols("s t")
+        e_mat = [ [sympify(e) for e in row]
+                  for row in [ ["-1 - s - t - s*t", "s + s*t", "0"],
+                               ["1 + t", "-1 - s - t - s*t", "s + s*t"],
+                               ["0", "1 + t", "-1 - s - t - s*t"] ] ]
+        steps = 6
+        eigenvalue_zero_threshold = 1e-12
+        get_sample_matrix = make_matrix_sampler(e_mat, indeterminates, steps)
+        analyse_eigenvalues = make_eigenvalues_analyser(
+            eigenvalue_zero_threshold
+        )
+        compute_signature = make_high_precision_signature_computer(
+            compile_matrix(e_mat, indeterminates),
+            steps,
+            eigenvalue_zero_threshold,
+            precision = 30
+        )
+        verify = make_inline_verifier(compute_signature)
+        for inds in [(1, 1), (2, 5), (3, -2), (6, 6), (4, -5)]:
+            mat = get_sample_matrix(inds)
+            mat += mat.H
+            eigenvalues = nmp.linalg.eigvalsh(mat)
+            signature, _ = analyse_eigenvalues(eigenvalues)
+            verified_signature, min_nonzero_val = verify(inds).result()
+            assert verified_signature == signature
+            nonzero_vals = eigenvalues[
+                nmp.abs(eigenvalues) > eigenvalue_zero_threshold
+            ]
+            if nonzero_vals.size:
+                assert nmp.isclose( min_nonzero_val,
+                                    nonzero_vals[
+                                        nmp.argmin(nmp.abs(nonzero_vals))
+                                    ] )
+            else:
+                assert nmp.isnan(min_nonzero_val)
+
+    t = run_and_time(_basic_tests)
+    print("The module passed basic tests in {:.3g}s.".format(t))